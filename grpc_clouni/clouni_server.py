@@ -23,7 +23,7 @@ def exit_gracefully(server, logger, x, y):
 
 
 class TranslatorServer(object):
-    def __init__(self, argv):
+    def __init__(self, argv, defer_facts=False):
         self.template_file = argv['template_file_content']
         self.validate_only = argv['validate_only']
         self.is_delete = argv['delete']
@@ -44,13 +44,14 @@ class TranslatorServer(object):
         self.working_dir = os.getcwd()
 
         self.output = translate(self.template_file, self.validate_only, self.provider, self.configuration_tool, self.cluster_name, self.is_delete,
-                           extra={'global': self.extra}, a_file=False)
+                           extra={'global': self.extra}, a_file=False, defer_facts=defer_facts)
 
 
 class ClouniServicer(api_pb2_grpc.ClouniServicer):
-    def __init__(self, logger):
+    def __init__(self, logger, defer_facts=False):
         super().__init__()
         self.logger = logger
+        self.defer_facts = defer_facts
 
     def Clouni(self, request, context):
         self.logger.info("Request received")
@@ -64,7 +65,7 @@ class ClouniServicer(api_pb2_grpc.ClouniServicer):
             else:
                 self.logger.info("Request - status OK")
                 response.status = ClouniResponse.Status.OK
-            response.content = TranslatorServer(args).output
+            response.content = TranslatorServer(args, defer_facts=self.defer_facts).output
 
             self.logger.info("Response send")
             return response
@@ -154,12 +155,17 @@ def parse_args(argv):
                         action='store_true',
                         default=False,
                         help='Makes server work in foreground')
+    parser.add_argument('--defer-facts',
+                        action='store_true',
+                        default=False,
+                        help='Do not gather cloud facts at translation, the output scripts gather them when they run')
     try:
         args, args_list = parser.parse_known_args(argv)
     except argparse.ArgumentError:
         logging.critical("Failed to parse arguments. Exiting")
         sys.exit(1)
-    return args.max_workers, args.host, args.port, args.verbose, args.no_host_error, args.stop, args.foreground
+    return args.max_workers, args.host, args.port, args.verbose, args.no_host_error, args.stop, args.foreground, \
+        args.defer_facts
 
 def serve(argv =  None):
     # Log init
@@ -174,7 +180,7 @@ def serve(argv =  None):
     # Argparse
     if argv is None:
         argv = sys.argv[1:]
-    max_workers, hosts, port, verbose, no_host_error, stop, foreground = parse_args(argv)
+    max_workers, hosts, port, verbose, no_host_error, stop, foreground, defer_facts = parse_args(argv)
     if stop:
         try:
             with open("/tmp/.clouni-server.pid", mode='r') as f:
@@ -223,7 +229,7 @@ def serve(argv =  None):
     try:
         server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
         api_pb2_grpc.add_ClouniServicer_to_server(
-            ClouniServicer(logger), server)
+            ClouniServicer(logger, defer_facts=defer_facts), server)
 
         host_exist = False
         for host in hosts:
@@ -24,6 +24,19 @@ class TranslatorShell(object):
         self.public_key_path = args.public_key_path
         self.log_level = args.log_level
         self.debug = args.debug
+        self.refresh_facts = args.refresh_facts
+        self.defer_facts = args.defer_facts
+        self.translation_workers = args.translation_workers
+        self.resume = args.resume
+        self.executor = args.executor
+        self.timeline = None
+        if args.timeline:
+            self.timeline = self.get_path_prefix()
+        self.graph = None
+        if args.graph:
+            self.graph = self.get_path_prefix()
+        self.graph_max_workers = args.graph_max_workers
+        self.incremental = args.incremental
 
         for i in args.extra:
             i_splitted = [j.strip() for j in i.split('=', 1)]
@@ -44,9 +57,18 @@ class TranslatorShell(object):
         self.working_dir = os.getcwd()
         output = translate(self.template_file, self.validate_only, self.provider, self.configuration_tool,
                            self.cluster_name, public_key_path=self.public_key_path, host_ip_parameter=self.host_ip_parameter, is_delete=self.is_delete,
-                           extra={'global': self.extra}, log_level=self.log_level, debug=self.debug)
+                           extra={'global': self.extra}, log_level=self.log_level, debug=self.debug,
+                           refresh_facts=self.refresh_facts, defer_facts=self.defer_facts,
+                           translation_workers=self.translation_workers, resume=self.resume,
+                           timeline=self.timeline, executor=self.executor, graph=self.graph,
+                           graph_max_workers=self.graph_max_workers, incremental=self.incremental)
         self.output_print(output)
 
+    def get_path_prefix(self):
+        if self.output_file:
+            return os.path.splitext(self.output_file)[0]
+        return os.path.join(os.getcwd(), self.cluster_name)
+
     def get_parser(self):
         parser = argparse.ArgumentParser(prog="clouni")
 
@@ -95,13 +117,54 @@ class TranslatorShell(object):
         parser.add_argument('--public-key-path',
                             default='~/.ssh/id_rsa.pub',
                             help="Set path to public key for configuration software on cloud servers")
+        parser.add_argument('--refresh-facts',
+                            action='store_true',
+                            default=False,
+                            help='Invalidate the saved results of cloud facts sources of the provider')
+        parser.add_argument('--defer-facts',
+                            action='store_true',
+                            default=False,
+                            help='Do not gather cloud facts at translation, the output script gathers them when it runs')
+        parser.add_argument('--translation-workers',
+                            default=1,
+                            type=int,
+                            help='Number of processes translating the templates to the provider templates, default 1')
+        parser.add_argument('--resume',
+                            action='store_true',
+                            default=False,
+                            help='Skip the operations finished by the previous deployment of the cluster')
+        parser.add_argument('--timeline',
+                            action='store_true',
+                            default=False,
+                            help='Write the timeline of executed operations as Chrome trace and CSV next to the '
+                                 'output file')
+        parser.add_argument('--executor',
+                            default=None,
+                            choices=['ansible', 'simulated'],
+                            help='Backend executing the operations, the simulated backend does not change the cloud '
+                                 'and sleeps for the configured latencies of modules')
+        parser.add_argument('--graph',
+                            action='store_true',
+                            default=False,
+                            help='Do not generate the script, write the graph of operations as DOT and JSON next to '
+                                 'the output file and print the analysis of its parallelism')
+        parser.add_argument('--graph-max-workers',
+                            default=None,
+                            type=int,
+                            help='Positive limit of running operations for the wall time estimated by --graph, not '
+                                 'limited by default')
+        parser.add_argument('--incremental',
+                            action='store_true',
+                            default=False,
+                            help='Translate only the templates changed since the previous translation of the cluster '
+                                 'and the templates depending on them, run only their operations')
         return parser
 
     def output_print(self, output_msg):
         if self.output_file:
             with open(self.output_file, 'w') as file_obj:
                 file_obj.write(output_msg)
-        if self.debug:
+        if self.debug or self.graph:
             print(output_msg)
 
 def main(args=None):
@@ -311,6 +311,26 @@ class TestAnsibleProvider(BaseAnsibleProvider):
                 tasks.extend(play['tasks'])
             self.check_scalable_capabilities(tasks)
 
+    def test_scalable_group(self):
+        if hasattr(self, 'check_scalable_capabilities'):
+            template = copy.deepcopy(self.DEFAULT_TEMPLATE)
+            testing_parameter = {
+                "min_instances": 1,
+                "default_instances": 5,
+                "max_instances": 10
+            }
+            template = self.update_template_capability_properties(template, self.NODE_NAME, "scalable",
+                                                                  testing_parameter)
+            playbook = self.get_ansible_create_output(template)
+
+            tasks = []
+            for play in playbook:
+                tasks.extend(play['tasks'])
+            self.check_scalable_capabilities(tasks, testing_parameter)
+            sequences = set(task['with_sequence'] for task in tasks if 'with_sequence' in task)
+            assert 'start=1 end=5 format=%d' in sequences
+            assert 'start=1 end=10 format=%d' not in sequences
+
     def test_host_of_software_component(self):
         if hasattr(self, "check_host_of_software_component"):
             template = copy.deepcopy(self.DEFAULT_TEMPLATE)
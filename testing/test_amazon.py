@@ -245,6 +245,9 @@ class TestAnsibleAmazonOutput (unittest.TestCase, TestAnsibleProvider):
     def test_scalable_capabilities(self):
         super(TestAnsibleAmazonOutput, self).test_scalable_capabilities()
 
+    def test_scalable_group(self):
+        super(TestAnsibleAmazonOutput, self).test_scalable_group()
+
     def check_scalable_capabilities(self, tasks, testing_value=None):
         server_name = None
         default_instances = 2
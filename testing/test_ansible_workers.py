@@ -0,0 +1,270 @@
+import os
+import shutil
+import tempfile
+import unittest
+from queue import Queue
+
+from toscatranslator.configuration_tools.ansible.runner import AnsibleJob, AnsibleWorkerPool, get_journal_path, \
+    read_journal, reset_journal, write_journal_entry, get_plain_data, pop_error, pop_playbook_error
+from toscatranslator.configuration_tools.ansible.timeline import get_chrome_trace, get_csv_rows
+from toscatranslator.configuration_tools.ansible.simulator import get_simulated_worker_pool, get_playbook_modules
+from toscatranslator.configuration_tools.ansible.configuration_tool import AnsibleConfigurationTool
+
+LIMITS = {
+    'max_workers': 3,
+    'max_workers_per_provider': 2,
+    'max_workers_per_host': 1
+}
+
+
+def job(provider, host, priority=0):
+    return AnsibleJob([{'hosts': host, 'tasks': []}], 'node', 'create', None, 'test', provider, LIMITS,
+                      priority=priority)
+
+
+class TestAnsibleWorkerPool(unittest.TestCase):
+    def setUp(self):
+        self.worker_pool = AnsibleWorkerPool()
+
+    def test_limits(self):
+        self.worker_pool.running = 2
+        self.worker_pool.running_by_provider = {'openstack': 2}
+        self.worker_pool.running_by_host = {'localhost': 1, 'server': 1}
+        self.assertFalse(self.worker_pool.can_start(job('openstack', 'other')))
+        self.assertFalse(self.worker_pool.can_start(job('amazon', 'server')))
+        self.assertTrue(self.worker_pool.can_start(job('amazon', 'other')))
+        self.worker_pool.running = 3
+        self.assertFalse(self.worker_pool.can_start(job('amazon', 'other')))
+
+    def test_no_limits(self):
+        self.worker_pool.running = 100
+        no_limits_job = AnsibleJob([], None, None, None, 'test', 'openstack', {})
+        self.assertTrue(self.worker_pool.can_start(no_limits_job))
+        self.assertEqual(no_limits_job.title, 'playbook')
+
+    def test_priority(self):
+        self.worker_pool.waiting = [job('amazon', 'first'), job('amazon', 'second', priority=5),
+                                    job('amazon', 'third', priority=5)]
+        self.assertEqual([j.host for j in self.worker_pool.get_waiting_by_priority()], ['second', 'third', 'first'])
+
+    def test_start_without_lock(self):
+        locked = []
+        self.worker_pool.start_job = lambda started_job: locked.append(self.worker_pool.lock.locked())
+        self.worker_pool.submit(job('amazon', 'first'))
+        self.worker_pool.submit(job('amazon', 'first'))
+        self.assertEqual(locked, [False])
+        self.assertEqual(self.worker_pool.running, 1)
+        self.assertEqual(list(self.worker_pool.workers.values()), [None])
+        self.assertEqual(len(self.worker_pool.waiting), 1)
+
+    def test_finish_task(self):
+        coalesced_job = AnsibleJob([{'hosts': 'localhost', 'tasks': []}], None, None, Queue(), 'test', 'openstack',
+                                   LIMITS, operations=['server.create', 'port.create'])
+        coalesced_job.started = 1.0
+        finished_job = dict(outputs={}, error=None, tasks=[])
+        self.worker_pool.finish_task(coalesced_job, dict(task='Create server', started=1.0, finished=2.0,
+                                                         status='changed', outputs={'server': {'id': 'a1'}}),
+                                     finished_job)
+        self.worker_pool.finish_task(coalesced_job, dict(task='Operation finished: server.create', started=2.0,
+                                                         finished=3.0, status='ok'), finished_job)
+        self.worker_pool.finish_task(coalesced_job, dict(task='Operation finished: port.create', started=3.0,
+                                                         finished=4.0, status='failed'), finished_job)
+        self.assertEqual(finished_job['outputs'], {'server': {'id': 'a1'}})
+        self.assertEqual([t['name'] for t in finished_job['tasks']],
+                         ['Create server', 'Operation finished: server.create', 'Operation finished: port.create'])
+        self.assertEqual(coalesced_job.finished_operations, ['server.create'])
+        self.assertEqual(coalesced_job.q.get_nowait(), 'server.create')
+        self.assertTrue(coalesced_job.q.empty())
+
+    def test_plain_data(self):
+        class Text(str):
+            pass
+
+        class Mapping(dict):
+            pass
+
+        data = get_plain_data(Mapping({Text('name'): Text('a'), Text('with_items'): (1, True)}))
+        self.assertEqual(data, {'name': 'a', 'with_items': [1, True]})
+        self.assertEqual([type(v) for v in data], [str, str])
+
+
+class TestAnsibleJournal(unittest.TestCase):
+    def setUp(self):
+        reset_journal('test_journal')
+
+    def tearDown(self):
+        os.remove(get_journal_path('test_journal'))
+
+    def test_journal(self):
+        write_journal_entry('test_journal', 'network', 'create', {'network_id': {'id': 'a1'}})
+        write_journal_entry('test_journal', 'server', 'create', {})
+        with open(get_journal_path('test_journal'), 'a') as journal_file:
+            journal_file.write('{"node": "port", "oper')
+        journal = read_journal('test_journal')
+        self.assertEqual(sorted(journal.keys()), ['network.create', 'server.create'])
+        self.assertEqual(journal['network.create']['outputs'], {'network_id': {'id': 'a1'}})
+        reset_journal('test_journal')
+        self.assertEqual(read_journal('test_journal'), {})
+
+    def test_not_private_journal(self):
+        write_journal_entry('test_journal', 'network', 'create', {})
+        directory = os.path.dirname(get_journal_path('test_journal'))
+        os.chmod(directory, 0o777)
+        try:
+            self.assertEqual(read_journal('test_journal'), {})
+        finally:
+            os.chmod(directory, 0o700)
+
+
+class TestDurationsHistory(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'scheduler', 'durations.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_durations_history(self):
+        AnsibleConfigurationTool.save_durations_history(self.path, {'tosca.nodes.Compute.create': 2.0})
+        self.assertEqual(os.stat(os.path.dirname(self.path)).st_mode & 0o777, 0o700)
+        self.assertEqual(AnsibleConfigurationTool.load_durations_history(self.path),
+                         {'tosca.nodes.Compute.create': 2.0})
+        os.chmod(os.path.dirname(self.path), 0o777)
+        self.assertEqual(AnsibleConfigurationTool.load_durations_history(self.path), {})
+
+
+class TestAnsibleTimeline(unittest.TestCase):
+    def setUp(self):
+        self.timeline = [{
+            'cluster_name': 'test', 'name': 'server', 'op': 'create', 'title': 'server.create', 'host': 'localhost',
+            'pid': 100, 'submitted': 10.0, 'started': 10.5, 'finished': 12.5, 'status': 'ok',
+            'tasks': [{'name': 'os_server', 'started': 11.0, 'finished': 12.0, 'status': 'changed'}]
+        }]
+
+    def test_chrome_trace(self):
+        events = [e for e in get_chrome_trace(self.timeline)['traceEvents'] if e['ph'] == 'X']
+        self.assertEqual([(e['cat'], e['ts'], e['dur']) for e in events],
+                         [('wait', 0, 500000), ('play', 500000, 2000000), ('task', 1000000, 1000000)])
+
+    def test_csv_rows(self):
+        rows = get_csv_rows(self.timeline)
+        self.assertEqual([(r['kind'], r['start'], r['duration'], r['status']) for r in rows],
+                         [('play', 0.5, 2.0, 'ok'), ('task', 1.0, 1.0, 'changed')])
+        self.assertEqual(rows[0]['wait'], 0.5)
+
+
+class TestSimulatedExecutor(unittest.TestCase):
+    def test_playbook_modules(self):
+        playbook = [{'hosts': 'localhost', 'tasks': [
+            {'include_vars': 'id_vars.yaml'},
+            {'name': 'Create server', 'os_server': {'name': 'server'}, 'register': 'server'},
+            {'block': [{'set_fact': {'a': 1}}], 'rescue': [{'fail': {}}]},
+            {'with_sequence': 'start=1 end=2', 'os_port': {'name': 'port'}}
+        ]}]
+        self.assertEqual(get_playbook_modules(playbook), ['include_vars', 'os_server', 'set_fact', 'os_port'])
+
+    def test_limits(self):
+        pool = get_simulated_worker_pool({'seed': '1', 'time_scale': '0.01', 'default': ['constant', '1']})
+        q = Queue()
+        for i in range(4):
+            pool.submit(AnsibleJob([{'hosts': 'localhost', 'tasks': [{'os_server': {}}]}], 'server_%s' % i, 'create',
+                                   q, 'test', 'openstack', {'max_workers': 2}))
+        self.assertEqual((pool.running, len(pool.waiting)), (2, 2))
+        self.assertEqual(sorted(q.get(timeout=5) for _ in range(4)),
+                         ['server_%s.create' % i for i in range(4)])
+        timeline = sorted(pool.timeline, key=lambda r: r['started'])
+        self.assertGreaterEqual(timeline[2]['started'], min(timeline[0]['finished'], timeline[1]['finished']))
+
+    def test_failure(self):
+        pool = get_simulated_worker_pool({'time_scale': '0.01', 'default': ['constant', '1'],
+                                          'fail_operations': 'server_0.create'})
+        q = Queue()
+        for i in range(3):
+            pool.submit(AnsibleJob([{'hosts': 'localhost', 'tasks': [{'os_server': {}}]}], 'server_%s' % i, 'create',
+                                   q, 'test', 'openstack', {'max_workers': 1}))
+        self.assertEqual(q.get(timeout=5), 'server_0.create')
+        self.assertEqual(pop_error('test', 'server_0', 'create', pool=pool), 'simulated failure')
+        pool.cancel('test')
+        self.assertEqual(sorted([q.get(timeout=5), q.get(timeout=5)]), ['server_1.create', 'server_2.create'])
+        # the waiting playbook is cancelled, the running one is finished
+        self.assertEqual([pop_error('test', 'server_%s' % i, 'create', pool=pool) for i in (1, 2)].count(None), 1)
+        self.assertEqual(len(pool.timeline), 2)
+
+    def test_clusters_failure(self):
+        pool = get_simulated_worker_pool({'time_scale': '0.01', 'default': ['constant', '1'],
+                                          'fail_operations': 'server.create'})
+        q = Queue()
+        pool.submit(AnsibleJob([{'hosts': 'localhost', 'tasks': [{'os_server': {}}]}], 'server', 'create', q,
+                               'first', 'openstack', {'max_workers': 1}))
+        self.assertEqual(q.get(timeout=5), 'server.create')
+        self.assertIsNone(pop_error('second', 'server', 'create', pool=pool))
+        self.assertEqual(pop_error('first', 'server', 'create', pool=pool), 'simulated failure')
+
+    def test_playbook_failure(self):
+        pool = get_simulated_worker_pool({'time_scale': '0.01', 'default': ['constant', '1'],
+                                          'fail_operations': 'playbook'})
+        q = Queue()
+        pool.submit(AnsibleJob([{'hosts': 'localhost', 'tasks': [{'os_networks_facts': {}}]}], None, None, q, 'test',
+                               'openstack', {}))
+        self.assertEqual(q.get(timeout=5), 'Done')
+        self.assertEqual(pop_playbook_error('test', pool=pool), 'simulated failure')
+        self.assertIsNone(pop_playbook_error('test', pool=pool))
+
+    def test_terminate(self):
+        pool = get_simulated_worker_pool({'time_scale': '0.01', 'default': ['constant', '10']})
+        q = Queue()
+        pool.submit(AnsibleJob([{'hosts': 'localhost', 'tasks': [{'os_server': {}}, {'os_port': {}}]}], 'server',
+                               'create', q, 'test', 'openstack', {}))
+        pool.cancel('test', terminate=True)
+        self.assertEqual(q.get(timeout=5), 'server.create')
+        self.assertEqual(pop_error('test', 'server', 'create', pool=pool), 'terminated after the failure of other operation')
+        self.assertLess(len(pool.timeline[0]['tasks']), 2)
+
+
+class Operation(object):
+    def __init__(self, name):
+        self.name = name
+        self.operation = 'create'
+
+
+class TestCoalescedOperations(unittest.TestCase):
+    def operations(self):
+        operations = []
+        for name in ('server_0', 'server_1'):
+            operations.append((Operation(name), {'name': 'Create OpenStack component: %s:create' % name,
+                                                 'hosts': 'localhost', 'tasks': [
+                {'include_vars': 'id_vars.yaml'},
+                {'os_server': {'name': name}, 'register': name, 'with_sequence': 'start=1 end=1 format=%d'},
+                {'lineinfile': {'path': 'id_vars.yaml', 'line': name}}
+            ]}))
+        return operations
+
+    def test_coalesced_play(self):
+        play = AnsibleConfigurationTool().get_coalesced_play(self.operations(), 'os_server',
+                                                             {'async_timeout': 60, 'async_poll_delay': 2})
+        self.assertEqual(play['name'], 'Create OpenStack component: server_0:create, server_1:create')
+        self.assertEqual(get_playbook_modules([play]),
+                         ['include_vars', 'os_server', 'include_vars', 'os_server',
+                          'async_status', 'lineinfile', 'set_fact', 'async_status', 'lineinfile', 'set_fact'])
+        self.assertEqual(play['tasks'][1]['poll'], 0)
+        self.assertEqual(play['tasks'][4]['loop'], '{{ server_0.results }}')
+        self.assertEqual(play['tasks'][4]['retries'], 31)
+        self.assertEqual(play['tasks'][6]['name'], 'Operation finished: server_0.create')
+
+    def test_async_task_index(self):
+        tasks = self.operations()[0][1]['tasks']
+        self.assertEqual(AnsibleConfigurationTool.get_async_task_index(tasks, 'os_server'), 1)
+        tasks[1]['until'] = 'server_0 is succeeded'
+        self.assertIsNone(AnsibleConfigurationTool.get_async_task_index(tasks, 'os_server'))
+
+    def test_simulated_coalesced_job(self):
+        play = AnsibleConfigurationTool().get_coalesced_play(self.operations(), 'os_server',
+                                                             {'async_timeout': 60, 'async_poll_delay': 2})
+        pool = get_simulated_worker_pool({'time_scale': '0.01', 'default': ['constant', '0'],
+                                          'os_server': ['constant', '10']})
+        q = Queue()
+        pool.submit(AnsibleJob([play], None, None, q, 'test', 'openstack', {}, operations=['server_0.create',
+                                                                                           'server_1.create']))
+        self.assertEqual([q.get(timeout=5), q.get(timeout=5)], ['server_0.create', 'server_1.create'])
+        # both servers are created at the same time
+        self.assertLess(pool.run_times[('test', 'server_1.create')], 0.15)
@@ -0,0 +1,65 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from toscatranslator.providers.common.definitions_snapshot import DefinitionsSnapshotStorage
+from toscatranslator.providers.common.tosca_template import ProviderToscaTemplate
+
+
+class TestDefinitionsSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'definitions.yaml')
+        with open(self.filename, 'w') as f:
+            f.write('node_types:\n'
+                    '  tosca.nodes.Root: {properties: {name: {type: string}}}\n'
+                    '  tosca.nodes.SoftwareComponent: {derived_from: tosca.nodes.Root}\n')
+        self.snapshot_directory = os.path.join(self.directory, 'snapshots')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_shared_snapshot(self):
+        storage = DefinitionsSnapshotStorage(directory=self.snapshot_directory)
+        snapshot = storage.get([self.filename])
+        self.assertIs(storage.get([self.filename]), snapshot)
+        self.assertEqual(snapshot.definitions['tosca.nodes.SoftwareComponent']['properties'],
+                         {'name': {'type': 'string'}})
+        self.assertEqual(snapshot.software_types, {'tosca.nodes.SoftwareComponent'})
+        self.assertEqual(os.stat(self.snapshot_directory).st_mode & 0o777, 0o700)
+
+        storage.clear()
+        loaded_snapshot = storage.get([self.filename])
+        self.assertIsNot(loaded_snapshot, snapshot)
+        self.assertEqual(loaded_snapshot.to_dict(), snapshot.to_dict())
+        self.assertEqual(loaded_snapshot.software_types, snapshot.software_types)
+
+    def test_not_private_directory(self):
+        os.makedirs(self.snapshot_directory, mode=0o777)
+        os.chmod(self.snapshot_directory, 0o777)
+        storage = DefinitionsSnapshotStorage(directory=self.snapshot_directory)
+        storage.get([self.filename])
+        self.assertEqual(os.listdir(self.snapshot_directory), [])
+
+    def test_size(self):
+        other_filename = os.path.join(self.directory, 'other.yaml')
+        with open(other_filename, 'w') as f:
+            f.write('node_types:\n  tosca.nodes.Root: {}\n')
+        storage = DefinitionsSnapshotStorage(directory=self.snapshot_directory, max_size=1)
+        snapshot = storage.get([self.filename])
+        storage.get([other_filename])
+        self.assertEqual(len(storage._snapshots), 1)
+        self.assertIsNot(storage.get([self.filename]), snapshot)
+
+    def test_template_definitions_copy(self):
+        storage = DefinitionsSnapshotStorage(directory=self.snapshot_directory)
+        snapshot = storage.get([self.filename])
+        tosca = ProviderToscaTemplate.__new__(ProviderToscaTemplate)
+        tosca.definitions = dict(snapshot.file_definitions[self.filename])
+        tosca.software_types = set()
+        tosca.fulfil_definitions_with_parents(snapshot)
+        self.assertEqual(tosca.software_types, {'tosca.nodes.SoftwareComponent'})
+        tosca.definitions['tosca.nodes.SoftwareComponent']['properties']['name']['default'] = 'changed'
+        self.assertEqual(snapshot.definitions['tosca.nodes.SoftwareComponent']['properties'],
+                         {'name': {'type': 'string'}})
@@ -0,0 +1,69 @@
+import unittest
+import json, os, shutil, tempfile
+from unittest import mock
+
+from toscatranslator.providers.common.fact_cache import FactCache
+
+FACTS_SOURCE = 'os_networks_facts'
+
+
+class TestFactCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        with mock.patch.dict(os.environ, {'OS_CLOUD': 'test'}):
+            self.fact_cache = FactCache('openstack', directory=self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_put_get(self):
+        self.assertIsNone(self.fact_cache.get(FACTS_SOURCE, {}))
+        self.fact_cache.put(FACTS_SOURCE, {}, {'openstack_networks': [{'id': 'a1'}], 'invocation': {}})
+        self.assertEqual(self.fact_cache.get(FACTS_SOURCE, {}), {'openstack_networks': [{'id': 'a1'}]})
+        self.assertIsNone(self.fact_cache.get(FACTS_SOURCE, {'name': 'net1'}))
+        self.assertEqual((self.fact_cache.hits, self.fact_cache.misses), (1, 2))
+
+    def test_expired(self):
+        self.fact_cache.put(FACTS_SOURCE, {}, {'openstack_networks': []})
+        filename = self.fact_cache.get_filename(FACTS_SOURCE, {})
+        with open(filename, 'r') as file_obj:
+            entry = json.load(file_obj)
+        entry['created'] -= self.fact_cache.get_ttl(FACTS_SOURCE)
+        with open(filename, 'w') as file_obj:
+            json.dump(entry, file_obj)
+        self.assertIsNone(self.fact_cache.get(FACTS_SOURCE, {}))
+
+    def test_invalidate_and_size(self):
+        self.fact_cache.max_entries = 2
+        for i in range(3):
+            self.fact_cache.put(FACTS_SOURCE, {'name': i}, {})
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+        self.fact_cache.invalidate()
+        self.assertEqual(len(os.listdir(self.directory)), 0)
+
+    def test_not_private_directory(self):
+        self.fact_cache.put(FACTS_SOURCE, {}, {'openstack_networks': [{'id': 'a1'}]})
+        os.chmod(self.directory, 0o777)
+        self.assertIsNone(self.fact_cache.get(FACTS_SOURCE, {}))
+        self.fact_cache.put(FACTS_SOURCE, {'name': 'net1'}, {'openstack_networks': []})
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+    def test_identity(self):
+        home = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, home)
+        with mock.patch.dict(os.environ, {'HOME': home}, clear=True):
+            fact_cache = FactCache('openstack', directory=self.directory)
+            self.assertIsNone(fact_cache.identity)
+            fact_cache.put(FACTS_SOURCE, {}, {'openstack_networks': []})
+            self.assertEqual(os.listdir(self.directory), [])
+
+            clouds_file = os.path.join(home, 'clouds.yaml')
+            os.environ['OS_CLIENT_CONFIG_FILE'] = clouds_file
+            with open(clouds_file, 'w') as file_obj:
+                file_obj.write('clouds: {test: {auth: {auth_url: "http://first:5000"}}}')
+            first_identity = FactCache('openstack', directory=self.directory).identity
+            with open(clouds_file, 'w') as file_obj:
+                file_obj.write('clouds: {test: {auth: {auth_url: "http://second:5000"}}}')
+            second_identity = FactCache('openstack', directory=self.directory).identity
+        self.assertIsNotNone(first_identity)
+        self.assertNotEqual(first_identity, second_identity)
@@ -0,0 +1,67 @@
+import unittest
+
+from toscatranslator.providers.common.fact_matchers import FactMatcher, FactMatchError
+
+SUBNETS = [
+    {
+        'id': 'a1',
+        'name': 'Private-Net',
+        'network_id': 'net1',
+        'allocation_pool_start': '192.168.0.2',
+        'allocation_pool_end': '192.168.0.254'
+    },
+    {
+        'id': 'b2',
+        'name': 'public',
+        'network_id': 'net2',
+        'allocation_pool_start': ['10.0.0.2', '10.0.0.100'],
+        'allocation_pool_end': ['10.0.0.200', '10.0.0.150']
+    },
+    {
+        'id': 'c3',
+        'name': 'private-extra',
+        'network_id': 'net1',
+        'allocation_pool_start': [],
+        'allocation_pool_end': []
+    }
+]
+
+
+class TestFactMatchers(unittest.TestCase):
+    def setUp(self):
+        self.fact_matcher = FactMatcher()
+
+    def ids(self, condition, args):
+        return [f['id'] for f in self.fact_matcher.match(condition, SUBNETS, args)]
+
+    def test_equals(self):
+        self.assertEqual(self.ids('equals', ['network_id', 'net1']), ['a1', 'c3'])
+        self.assertEqual(self.ids('equals', {'network_id': 'net1', 'name': 'Private-Net'}), ['a1'])
+        self.assertEqual(self.ids('equals', ['network_id', 'net3']), [])
+        self.assertRaises(FactMatchError, self.fact_matcher.match, 'equals', SUBNETS, ['missing', 'net1'])
+
+    def test_contains(self):
+        self.assertEqual(self.ids('contains', ['name', 'PRIVATE']), ['a1', 'c3'])
+        self.assertEqual(self.ids('contains', [['name', 'network_id'], ['private', 'net1', 'extra']]), ['c3'])
+        self.assertEqual(self.ids('contains', [{'key': 'name'}, {'value': 'pub'}]), ['b2'])
+
+    def test_ip_contains(self):
+        args = ['allocation_pool_start', 'allocation_pool_end']
+        self.assertEqual(self.ids('ip_contains', args + ['192.168.0.10']), ['a1', 'c3'])
+        self.assertEqual(self.ids('ip_contains', args + [['10.0.0.120', '10.0.0.140']]), ['b2', 'c3'])
+        self.assertEqual(self.ids('ip_contains', args + ['10.0.0.50']), ['c3'])
+        # the fact without ranges matches any address as in the artifact
+        self.assertEqual([f['id'] for f in self.fact_matcher.match('ip_contains', [{'id': 'd4'}],
+                                                                   args + ['10.0.0.50'])], ['d4'])
+
+    def test_facts_key(self):
+        self.assertEqual(self.ids('equals', ['network_id', 'net1']), ['a1', 'c3'])
+        subnets = [dict(subnet) for subnet in SUBNETS]
+        subnets[0]['network_id'] = 'net3'
+        # the index is built for the new list of facts, the same key means the same facts
+        self.assertEqual([f['id'] for f in self.fact_matcher.match('equals', subnets, ['network_id', 'net1'])],
+                         ['c3'])
+        self.assertEqual([f['id'] for f in self.fact_matcher.match('equals', SUBNETS, ['network_id', 'net1'],
+                                                                   facts_key='subnets')], ['a1', 'c3'])
+        self.assertEqual([f['id'] for f in self.fact_matcher.match('equals', subnets, ['network_id', 'net2'],
+                                                                   facts_key='subnets')], ['b2'])
@@ -0,0 +1,172 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from toscatranslator.providers.common.fact_resolver import FactResolver, FactRecorder, NOT_FOUND
+from toscatranslator.providers.common.translator_to_provider import replay_translated_element
+
+
+class TaskResult(object):
+    def __init__(self, task_name, result, is_failed=False):
+        self.task_name = task_name
+        self.result = result
+        self.is_failed = is_failed
+        self.is_unreachable = False
+
+
+def lookup_tasks(name):
+    return [
+        {
+            'source': 'os_networks_facts',
+            'value': 'facts_result',
+            'executor': 'ansible',
+            'parameters': {}
+        },
+        {
+            'source': 'set_fact',
+            'parameters': {
+                'input_args': ['name', name]
+            },
+            'value': 'tmp_value',
+            'executor': 'ansible'
+        }
+    ]
+
+
+def matched_result(value):
+    return TaskResult('set_fact', {'results': [{'ansible_facts': {'matched_object': {'id': value}}}]})
+
+
+class TestFactResolver(unittest.TestCase):
+    def setUp(self):
+        self.fact_resolver = FactResolver(False, 'test')
+
+    def test_pending_lookups(self):
+        first = self.fact_resolver.lookup(lookup_tasks('net1'), 'openstack', 'id')
+        second = self.fact_resolver.lookup(lookup_tasks('net2'), 'openstack', 'id')
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.fact_resolver.lookup(lookup_tasks('net1'), 'openstack', 'id'), first)
+        self.assertEqual(len(self.fact_resolver.pending), 2)
+
+    def test_delete(self):
+        fact_resolver = FactResolver(True, 'test')
+        self.assertIsNone(fact_resolver.lookup(lookup_tasks('net1'), 'openstack', 'id'))
+        self.assertFalse(fact_resolver.resolve())
+
+    def test_facts_source_is_shared(self):
+        self.fact_resolver.lookup(lookup_tasks('net1'), 'openstack', 'id')
+        self.fact_resolver.lookup(lookup_tasks('net2'), 'openstack', 'id')
+        tasks, facts_sources = self.fact_resolver.get_lookups_tasks('openstack', self.fact_resolver.pending)
+        facts_tasks = [t for b in tasks if 'block' in b for t in b['block'] if 'os_networks_facts' in t]
+        self.assertEqual(len(facts_tasks), 1)
+        self.assertEqual(len([t for t in tasks if 'block' in t]), 3)
+        self.assertEqual(list(facts_sources.keys()), ['clouni_facts_0'])
+
+    def test_cached_facts(self):
+        class Cache(object):
+            def get(self, source, parameters):
+                return {'openstack_networks': [{'name': 'net1', 'id': 'a1'}]}
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.fact_resolver.lookup(lookup_tasks('net1'), 'openstack', 'id')
+        with mock.patch('toscatranslator.common.utils.get_tmp_clouni_dir', return_value=directory):
+            tasks, facts_sources = self.fact_resolver.get_lookups_tasks('openstack', self.fact_resolver.pending,
+                                                                         Cache())
+            self.assertEqual(facts_sources, {})
+            self.assertEqual(os.listdir(os.path.join(directory, 'test', 'facts')), ['clouni_facts_0.json'])
+
+            # the saved result is not used from the directory available to others
+            os.chmod(os.path.join(directory, 'test', 'facts'), 0o777)
+            tasks, facts_sources = self.fact_resolver.get_lookups_tasks('openstack', self.fact_resolver.pending,
+                                                                         Cache())
+            self.assertEqual(list(facts_sources.keys()), ['clouni_facts_0'])
+
+    def test_lookups_values(self):
+        for name in ('net1', 'net2', 'net3'):
+            self.fact_resolver.lookup(lookup_tasks(name), 'openstack', 'id')
+        lookups = self.fact_resolver.pending
+        results = [
+            TaskResult('os_networks_facts', {}),
+            TaskResult('clouni_fact_lookup_0', {}),
+            matched_result('a1'),
+            TaskResult('clouni_fact_lookup_1', {}),
+            TaskResult('fail', {}, is_failed=True),
+            TaskResult('clouni_fact_lookup_2', {}),
+            matched_result('c3')
+        ]
+        values = self.fact_resolver.get_lookups_values(results, lookups)
+        self.assertEqual([values[l.key] for l in lookups], ['a1', NOT_FOUND, 'c3'])
+
+    def test_condition_in_python(self):
+        tasks = lookup_tasks('net1') + [
+            {
+                'source': 'include',
+                'parameters': 'artifacts/equals.yaml',
+                'value': 'tmp_value',
+                'executor': 'ansible'
+            }
+        ]
+        self.fact_resolver.lookup(tasks, 'openstack', 'id', condition='equals')
+        lookups = self.fact_resolver.pending
+        tasks, _ = self.fact_resolver.get_lookups_tasks('openstack', lookups)
+        self.assertNotIn('include', [t for b in tasks if 'block' in b for task in b['block'] for t in task])
+        results = [
+            TaskResult('clouni_fact_lookup_0', {}),
+            TaskResult('set_fact', {'ansible_facts': {'input_facts': [{'name': 'net2', 'id': 'b2'},
+                                                                      {'name': 'net1', 'id': 'a1'}]}}),
+            TaskResult('set_fact', {'ansible_facts': {'input_args': ['name', 'net1']}})
+        ]
+        values = self.fact_resolver.get_lookups_values(results, lookups)
+        self.assertEqual(values[lookups[0].key], 'a1')
+
+        # the last of matched objects is taken as by the artifact of condition
+        results[1] = TaskResult('set_fact', {'ansible_facts': {'input_facts': [{'name': 'net1', 'id': 'a1'},
+                                                                               {'name': 'net1', 'id': 'b2'}]}})
+        values = self.fact_resolver.get_lookups_values(results, lookups)
+        self.assertEqual(values[lookups[0].key], 'b2')
+
+    def test_facts_key(self):
+        condition_task = {'source': 'include', 'parameters': 'artifacts/equals.yaml', 'value': 'tmp_value',
+                          'executor': 'ansible'}
+        for name in ('net1', 'net2'):
+            self.fact_resolver.lookup(lookup_tasks(name) + [condition_task], 'openstack', 'id', condition='equals')
+        first, second = self.fact_resolver.pending
+        self.assertEqual(first.facts_key, second.facts_key)
+        self.assertNotEqual(first.key, second.key)
+
+    def test_deferred_lookups(self):
+        fact_resolver = FactResolver(False, 'test', defer_facts=True)
+        value = fact_resolver.lookup(lookup_tasks('net1'), 'openstack', 'id', condition='equals')
+        self.assertEqual(value, "\\{\\{ clouni_fact_0 \\}\\}")
+        self.assertFalse(fact_resolver.resolve())
+        tasks = fact_resolver.get_deferred_tasks('openstack', 'id_vars_test.yaml')
+        lookup_block = [t for t in tasks if 'block' in t][-1]
+        self.assertIn('clouni_fact_0', lookup_block['block'][-1]['set_fact'])
+        self.assertEqual(lookup_block['rescue'][-1], {'set_fact': {'clouni_fact_0': NOT_FOUND}})
+        self.assertEqual(tasks[-1]['lineinfile']['path'], 'id_vars_test.yaml')
+        self.assertEqual(fact_resolver.get_deferred_conditions(), {'equals'})
+
+    def test_recorded_lookups(self):
+        self.fact_resolver.lookup(lookup_tasks('net0'), 'openstack', 'id')
+        fact_recorder = FactRecorder(self.fact_resolver)
+        first = fact_recorder.lookup(lookup_tasks('net1'), 'openstack', 'id')
+        second = fact_recorder.lookup(lookup_tasks(first), 'openstack', 'id')
+        placeholders = FactRecorder.replay(fact_recorder.recorded, self.fact_resolver)
+        self.assertEqual(placeholders[first], self.fact_resolver.lookup(lookup_tasks('net1'), 'openstack', 'id'))
+        self.assertEqual(placeholders[second],
+                         self.fact_resolver.lookup(lookup_tasks(placeholders[first]), 'openstack', 'id'))
+        self.assertEqual(len(self.fact_resolver.pending), 3)
+
+    def test_replayed_deferred_lookups(self):
+        fact_resolver = FactResolver(False, 'test', defer_facts=True)
+        fact_recorder = FactRecorder(fact_resolver, record_known_values=True)
+        placeholder = fact_recorder.lookup(lookup_tasks('net1'), 'openstack', 'id')
+        result = ({'openstack.nodes.Server': {'server': {'network': placeholder}}}, ['server'],
+                  [{'name': placeholder}], {}, fact_recorder.recorded)
+        new_element, tpl_names, artifacts, extra = replay_translated_element(result, fact_resolver)
+        self.assertEqual(new_element['openstack.nodes.Server']['server']['network'], '{{ clouni_fact_0 }}')
+        self.assertEqual(artifacts, [{'name': '{{ clouni_fact_0 }}'}])
+        self.assertEqual(tpl_names, ['server'])
@@ -0,0 +1,39 @@
+import unittest
+
+from toscatranslator.providers.common.format_templates import get_format_template
+
+
+class TestFormatTemplates(unittest.TestCase):
+    def setUp(self):
+        self.params = {
+            'name': 'server',
+            'value': 'master=true',
+            'buffer': {
+                'port': {
+                    'id': 22
+                }
+            }
+        }
+
+    def test_references(self):
+        template = get_format_template('{self[name]}_{self[buffer][port][id]}')
+        self.assertEqual(template.keys, ('name', 'buffer'))
+        self.assertTrue(template.uses_buffer)
+        self.assertEqual(template.format(self.params), ('server_22', True))
+
+    def test_json_output(self):
+        self.assertFalse(get_format_template('server {self[name]}').json_start)
+        self.assertIsNone(get_format_template('{self[buffer][port][id]}').json_start)
+        self.assertEqual(get_format_template('{self[buffer][port][id]}').format(self.params), (22, True))
+        self.assertEqual(get_format_template("['{self[name]}']").format(self.params), (['server'], False))
+
+    def test_missing_key(self):
+        self.assertEqual(get_format_template('{self[missing]}').format(self.params), ('{self[missing]}', False))
+
+    def test_escaped_brackets(self):
+        self.assertEqual(get_format_template('\\{ {self[name]} \\}').format(self.params), ('\\{ server \\}', False))
+        self.assertEqual(get_format_template('\\{ {self[name]} \\}').format(self.params, False), ('{ server }', False))
+
+    def test_params_are_not_changed(self):
+        get_format_template('{self}').format(self.params)
+        self.assertIn('buffer', self.params)
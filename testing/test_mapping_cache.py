@@ -0,0 +1,52 @@
+import copy
+import os
+import tempfile
+import unittest
+
+from toscatranslator.providers.common.mapping_cache import MappingCache, ReadOnlyDict, ReadOnlyList
+
+
+class TestMappingCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'map.yaml')
+        self.write_map('tosca.nodes.Compute: openstack.nodes.Server\n')
+
+    def write_map(self, data, mtime=None):
+        with open(self.filename, 'w') as f:
+            f.write(data)
+        if mtime is not None:
+            os.utime(self.filename, (mtime, mtime))
+
+    def test_shared_read_only_map(self):
+        cache = MappingCache()
+        first = cache.get_mapping([self.filename])
+        second = cache.get_mapping([self.filename])
+        self.assertIs(first, second)
+        self.assertIsInstance(first, ReadOnlyDict)
+        self.assertRaises(TypeError, first.update, {})
+        with self.assertRaises(TypeError):
+            first['tosca.nodes.Root'] = None
+
+    def test_copies_are_mutable(self):
+        self.write_map('tosca.nodes.Compute:\n  - properties: openstack.nodes.Server.properties\n')
+        cache = MappingCache()
+        mapping = cache.get_mapping([self.filename])
+        self.assertIsInstance(mapping['tosca.nodes.Compute'], ReadOnlyList)
+        mapping_copy = copy.deepcopy(mapping)
+        mapping_copy['tosca.nodes.Compute'].append({})
+        self.assertIs(type(mapping_copy['tosca.nodes.Compute']), list)
+        self.assertEqual(len(mapping['tosca.nodes.Compute']), 1)
+
+    def test_reload_on_change(self):
+        cache = MappingCache()
+        self.write_map('tosca.nodes.Compute: openstack.nodes.Server\n', mtime=1000)
+        self.assertEqual(cache.get_mapping([self.filename])['tosca.nodes.Compute'], 'openstack.nodes.Server')
+        self.write_map('tosca.nodes.Compute: amazon.nodes.Instance\n', mtime=2000)
+        self.assertEqual(cache.get_mapping([self.filename])['tosca.nodes.Compute'], 'amazon.nodes.Instance')
+
+    def test_lru_bound(self):
+        cache = MappingCache(max_size=2)
+        for i in range(5):
+            cache.get(i, lambda: i)
+        self.assertEqual(len(cache._entries), 2)
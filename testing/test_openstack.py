@@ -356,6 +356,9 @@ class TestAnsibleOpenStackOutput (unittest.TestCase, TestAnsibleProvider):
     def test_scalable_capabilities(self):
         super(TestAnsibleOpenStackOutput, self).test_scalable_capabilities()
 
+    def test_scalable_group(self):
+        super(TestAnsibleOpenStackOutput, self).test_scalable_group()
+
     def check_scalable_capabilities(self, tasks, testing_value=None):
         server_name = None
         default_instances = 2
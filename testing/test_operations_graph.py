@@ -0,0 +1,98 @@
+import unittest
+
+from toscatranslator.common.translator_to_configuration_dsl import translate
+from toscatranslator.providers.common.operations_graph import OperationsGraph, get_graph_analysis, get_graph_dot, \
+    estimate_wall_time
+from toscatranslator.providers.common.provider_resource import ProviderResourceOperation
+
+
+class TestOperationsGraph(unittest.TestCase):
+    def setUp(self):
+        self.graph = OperationsGraph()
+        self.graph.add_operation('server:create')
+        self.graph.add_dependencies('server:configure', ['server:create'])
+        self.graph.add_dependencies('port:create', ['server:create'])
+
+    def test_indexes(self):
+        self.assertIn('server:configure', self.graph)
+        self.assertNotIn('network:create', self.graph)
+        self.assertEqual(self.graph.get_dependencies('server:configure'), {'server:create'})
+        self.assertEqual(self.graph.get_dependents('server:create'), {'server:configure', 'port:create'})
+        self.assertEqual(list(self.graph.dependencies), ['server:create', 'server:configure', 'port:create'])
+
+    def test_insert_after(self):
+        self.graph.add_dependencies('rel:add_source', ['server:create'])
+        self.graph.insert_after('rel:pre_configure_source', 'server:create', banned_operations={'rel:add_source'})
+        self.assertEqual(self.graph.get_dependencies('rel:pre_configure_source'), {'server:create'})
+        self.assertEqual(self.graph.get_dependencies('port:create'), {'server:create', 'rel:pre_configure_source'})
+        self.assertEqual(self.graph.get_dependencies('rel:add_source'), {'server:create'})
+        self.assertEqual(self.graph.get_dependents('rel:pre_configure_source'), {'server:configure', 'port:create'})
+
+
+class Resource(object):
+    def __init__(self):
+        self.name = 'server'
+        self.configuration_args = {'name': 'server'}
+
+
+class TestProviderResourceOperation(unittest.TestCase):
+    def test_shared_resource(self):
+        resource = Resource()
+        create = ProviderResourceOperation(resource, 'create')
+        configure = ProviderResourceOperation(resource, 'configure')
+        self.assertEqual((create.name, create.operation, configure.operation), ('server', 'create', 'configure'))
+        create.configuration_args = {'name': 'replaced'}
+        self.assertIs(configure.configuration_args, resource.configuration_args)
+        self.assertRaises(AttributeError, setattr, create, 'host', 'localhost')
+        self.assertEqual(len({create, configure}), 2)
+
+
+class Operation(object):
+    def __init__(self, name):
+        self.name = name
+        self.operation = 'create'
+
+
+class TestGraphAnalysis(unittest.TestCase):
+    def setUp(self):
+        self.network, self.subnet, self.port, self.keypair, self.server = \
+            [Operation(name) for name in ('network', 'subnet', 'port', 'keypair', 'server')]
+        # keypair is not a key as in the graphs of provider template
+        self.graph = {
+            self.network: set(),
+            self.subnet: {self.network},
+            self.port: {self.subnet},
+            self.server: {self.port, self.keypair}
+        }
+
+    def test_analysis(self):
+        analysis = get_graph_analysis(self.graph, {self.server: 10}, max_workers=1)
+        self.assertEqual(analysis['operations'], 5)
+        self.assertEqual(analysis['critical_path'], ['network:create', 'subnet:create', 'port:create', 'server:create'])
+        self.assertEqual((analysis['critical_path_length'], analysis['critical_path_duration']), (4, 13))
+        self.assertEqual((analysis['max_width'], analysis['level_widths']), (2, [2, 1, 1, 1]))
+        self.assertEqual((analysis['sequential_time'], analysis['estimated_wall_time']), (14, 14))
+
+    def test_wall_time(self):
+        durations = {self.network: 1, self.subnet: 1, self.port: 1, self.keypair: 3, self.server: 1}
+        self.graph[self.keypair] = set()
+        self.assertEqual(estimate_wall_time(self.graph, durations), 4)
+        self.assertEqual(estimate_wall_time(self.graph, durations, max_workers=1), 7)
+        # the keypair is run together with the chain of network
+        self.assertEqual(estimate_wall_time(self.graph, durations, max_workers=2), 4)
+
+    def test_invalid_max_workers(self):
+        with self.assertRaises(SystemExit):
+            translate('', False, 'openstack', 'ansible', 'test', a_file=False, graph='operations',
+                      graph_max_workers=0)
+
+    def test_dot(self):
+        dot = get_graph_dot({self.subnet: {self.network}}, 'operations')
+        self.assertEqual(dot, 'digraph "operations" {\n  "network:create";\n  "subnet:create";\n'
+                              '  "network:create" -> "subnet:create";\n}\n')
+
+    def test_dot_instances(self):
+        self.subnet.instances = 3
+        dot = get_graph_dot({self.subnet: {self.network}}, 'operations')
+        self.assertIn('  "subnet:create" [label="subnet:create x3"];\n', dot)
+        self.assertIn('  "network:create";\n', dot)
@@ -0,0 +1,73 @@
+import unittest
+
+from toscatranslator.providers.common.tosca_template import ProviderToscaTemplate
+
+
+def get_template(node_templates, relationship_templates=None, definitions=None):
+    # NOTE: the template is not parsed, only the attributes used by the dependency resolution are set
+    tosca = ProviderToscaTemplate.__new__(ProviderToscaTemplate)
+    tosca.node_templates = node_templates
+    tosca.relationship_templates = relationship_templates or {}
+    tosca.definitions = definitions or {}
+    tosca.template_references = {}
+    tosca.template_dependencies = {}
+    tosca._relation_target_source = {}
+    return tosca
+
+
+class TestTemplateDependencies(unittest.TestCase):
+    def test_references(self):
+        tosca = get_template({
+            'server': {'type': 'tosca.nodes.Compute', 'properties': {'name': 'server'}},
+            'app': {'type': 'tosca.nodes.SoftwareComponent', 'properties': {
+                'address': {'get_attribute': ['server', 'public_address']},
+                'name': {'get_property': ['server', 'name']},
+                'port': {'get_operation_output': ['connection', 'Configure', 'pre_configure_source', 'port']},
+                'host': {'get_attribute': ['SELF', 'host']}}}
+        }, relationship_templates={'connection': {'type': 'tosca.relationships.ConnectsTo'}},
+            definitions={'tosca.nodes.Compute': {}, 'tosca.nodes.SoftwareComponent': {}})
+        tosca.node_templates = tosca.resolve_get_property_functions(tosca.node_templates,
+                                                                    references=tosca.template_references)
+        self.assertEqual(tosca.node_templates['app']['properties']['name'], 'server')
+        self.assertEqual(tosca.template_references, {'app': ['server', 'connection']})
+
+        tosca.resolve_in_template_dependencies()
+        self.assertEqual(tosca.template_dependencies, {'app': {'server', 'connection'}})
+        self.assertEqual(tosca._relation_target_source, {'connection': {'source': 'app', 'target': None}})
+
+    def test_requirement_types(self):
+        definitions = {
+            'openstack.nodes.Server': {'requirements': [{'key_name': {'node': 'openstack.nodes.Keypair'}},
+                                                        {'server': {'node': 'openstack.nodes.Server'}}]},
+            'openstack.nodes.Keypair': {},
+            'openstack.nodes.Network': {}
+        }
+        tosca = get_template({
+            'server_0': {'type': 'openstack.nodes.Server'},
+            'server_1': {'type': 'openstack.nodes.Server'},
+            'keypair_0': {'type': 'openstack.nodes.Keypair'},
+            'keypair_1': {'type': 'openstack.nodes.Keypair'},
+            'network': {'type': 'openstack.nodes.Network'}
+        }, definitions=definitions)
+        tosca.resolve_in_template_dependencies()
+        self.assertEqual(tosca.template_dependencies, {'server_0': {'keypair_0', 'keypair_1'},
+                                                       'server_1': {'keypair_0', 'keypair_1'}})
+
+    def test_provider_template_references(self):
+        tosca = get_template({
+            'server': {'type': 'openstack.nodes.Server', 'properties': {'meta': {'get_attribute': ['keypair', 'id']}}},
+            'keypair': {'type': 'openstack.nodes.Keypair', 'properties': {'name': {'get_attribute': ['port', 'id']}}},
+            'app_server': {'type': 'openstack.nodes.Server',
+                           'properties': {'meta': {'get_attribute': ['server', 'meta']}}}
+        })
+        tosca.translation_state = None
+        tosca.template_mapping = {'server': {'server', 'keypair'}, 'app': {'app_server'}}
+        tosca.template_references = {'server': [], 'app': ['server']}
+        tosca.tosca_elements_map_to_provider = lambda: {'tosca.nodes.Compute': 'openstack.nodes.Server'}
+        self.assertEqual(tosca.get_provider_template_references(),
+                         {'server': [], 'keypair': [], 'app_server': ['server']})
+
+        # the get functions added by the mapping can be in every provider template
+        tosca.tosca_elements_map_to_provider = lambda: {'tosca.nodes.Compute': {'get_attribute': ['server', 'id']}}
+        self.assertEqual(tosca.get_provider_template_references(),
+                         {'server': ['keypair'], 'keypair': ['port'], 'app_server': ['server']})
@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from toscatranslator.common.utils import get_transitive_dependents
+from toscatranslator.providers.common.translation_state import TranslationState
+
+
+class TestTranslationState(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.context = {'provider': 'openstack', 'inputs': {}}
+        self.element_templates = {
+            'network': {'type': 'tosca.nodes.network.Network'},
+            'port': {'type': 'tosca.nodes.network.Port'},
+            'server': {'type': 'tosca.nodes.Compute'}
+        }
+        self.dependencies = {'port': {'network'}}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def save_state(self, element_templates, dependencies):
+        state = TranslationState('cluster', self.context, directory=self.directory)
+        state.get_unchanged_elements(element_templates, dependencies)
+        for tmpl_name in element_templates:
+            state.add_element(tmpl_name, tmpl_name + '_result')
+        state.save()
+
+    def test_transitive_dependents(self):
+        dependencies = [{'b': {'a'}, 'c': {'b'}}, {'d': {'c'}, 'e': {'f'}}]
+        self.assertEqual(get_transitive_dependents(['a'], dependencies), {'a', 'b', 'c', 'd'})
+        self.assertEqual(get_transitive_dependents(['e'], dependencies), {'e'})
+
+    def test_unchanged_elements(self):
+        state = TranslationState('cluster', self.context, directory=self.directory)
+        self.assertEqual(state.get_unchanged_elements(self.element_templates, self.dependencies), {})
+        self.save_state(self.element_templates, self.dependencies)
+
+        element_templates = dict(self.element_templates)
+        element_templates['network'] = {'type': 'tosca.nodes.network.Network', 'properties': {'cidr': '10.0.0.0/24'}}
+        state = TranslationState('cluster', self.context, directory=self.directory)
+        self.assertEqual(state.get_unchanged_elements(element_templates, self.dependencies),
+                         {'server': 'server_result'})
+
+    def test_removed_dependency(self):
+        self.save_state(self.element_templates, self.dependencies)
+        element_templates = dict(self.element_templates)
+        del element_templates['network']
+        state = TranslationState('cluster', self.context, directory=self.directory)
+        self.assertEqual(state.get_unchanged_elements(element_templates, {}), {'server': 'server_result'})
+
+    def test_changed_context(self):
+        self.save_state(self.element_templates, self.dependencies)
+        state = TranslationState('cluster', {'provider': 'amazon', 'inputs': {}}, directory=self.directory)
+        self.assertIsNone(state.previous)
+        self.assertEqual(state.get_unchanged_elements(self.element_templates, self.dependencies), {})
+
+    def test_not_private_directory(self):
+        self.save_state(self.element_templates, self.dependencies)
+        os.chmod(self.directory, 0o777)
+        state = TranslationState('cluster', self.context, directory=self.directory)
+        self.assertIsNone(state.previous)
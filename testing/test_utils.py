@@ -1,6 +1,7 @@
 import unittest
 
 from toscatranslator.providers.common.python_sources import transform_units
+from toscatranslator.common.utils import get_longest_paths
 
 KIBS = '230 KiB'
 GIBS = '230 GiB'
@@ -42,3 +43,18 @@ class TestUtills(unittest.TestCase):
         self.assertEqual(transform_units(KIBS, 'KB', is_only_numb=True), 235.52)
         self.assertEqual(transform_units(KIBS, 'KiB', is_only_numb=True,is_without_b=True), 230.0)
 
+    def test_longest_paths(self):
+        graph = {
+            'network': set(),
+            'subnet': {'network'},
+            'port': {'subnet'},
+            'server': {'port', 'keypair'},
+            'keypair': set(),
+            'security_group': set()
+        }
+        weights = dict((v, 1) for v in graph)
+        weights['server'] = 10
+        lengths = get_longest_paths(graph, weights)
+        self.assertEqual(lengths['network'], 13)
+        self.assertEqual(lengths['keypair'], 11)
+        self.assertEqual(lengths['security_group'], 1)
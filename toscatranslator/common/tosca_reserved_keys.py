@@ -23,6 +23,9 @@ REQUIREMENT_KEYS = (NODE, NODE_FILTER, OCCURRENCES, CAPABILITY, RELATIONSHIP)
 NODE_TEMPLATE_KEYS = (TYPE, DESCRIPTION, METADATA, DIRECTIVES, PROPERTIES, ATTRIBUTES, CAPABILITIES, REQUIREMENTS, ARTIFACTS, INTERFACES)
 DERIVED_FROM = 'derived_from'
 
+(SCALABLE, MIN_INSTANCES, DEFAULT_INSTANCES, INSTANCES) = \
+    ('scalable', 'min_instances', 'default_instances', 'instances')
+
 (NAME, ID) = ('name', 'id')
 (NAME_SUFFIX, ID_SUFFIX) = ('_name', '_id')
 REQUIREMENT_DEFAULT_PARAMS = (NAME, ID)
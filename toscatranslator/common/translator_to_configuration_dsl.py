@@ -2,6 +2,9 @@ import six
 from toscaparser.tosca_template import ToscaTemplate
 
 from toscatranslator.providers.common.tosca_template import ProviderToscaTemplate
+from toscatranslator.providers.common.definitions_snapshot import get_definitions_snapshot
+from toscatranslator.providers.common.operations_graph import get_complete_graph, get_graph_analysis, \
+    export_operations_graph
 from toscatranslator.common.tosca_reserved_keys import IMPORTS, DEFAULT_ARTIFACTS_DIRECTORY,\
     EXECUTOR, NAME, TOSCA_ELEMENTS_MAP_FILE, TOSCA_ELEMENTS_DEFINITION_FILE
 from toscatranslator.common import utils
@@ -10,14 +13,16 @@ from toscatranslator.configuration_tools.combined.combine_configuration_tools im
 
 
 import logging
-import json, os, sys, yaml
+import copy, json, os, sys, yaml
 
 
 REQUIRED_CONFIGURATION_PARAMS = (TOSCA_ELEMENTS_DEFINITION_FILE, DEFAULT_ARTIFACTS_DIRECTORY, TOSCA_ELEMENTS_MAP_FILE)
 
 
 def translate(template_file, validate_only, provider, configuration_tool, cluster_name, is_delete=False,
-              a_file=True, extra=None, log_level='info', host_ip_parameter='public_address', public_key_path='~/.ssh/id_rsa.pub', debug=False):
+              a_file=True, extra=None, log_level='info', host_ip_parameter='public_address', public_key_path='~/.ssh/id_rsa.pub', debug=False,
+              refresh_facts=False, defer_facts=False, translation_workers=1, resume=False, timeline=None,
+              executor=None, graph=None, graph_max_workers=None, incremental=False):
     """
     Main function, is called by different shells, i.e. bash, Ansible module, grpc
     :param template_file: filename of TOSCA template or TOSCA template data if a_file is False
@@ -28,6 +33,18 @@ def translate(template_file, validate_only, provider, configuration_tool, cluste
     :param is_delete: generate dsl scripts for infrastructure deletion
     :param a_file: if template_file is filename
     :param extra: extra for template
+    :param refresh_facts: if the saved results of facts sources of the provider must be invalidated
+    :param defer_facts: if the facts of the provider are not gathered at translation but by the resulting scripts
+    :param translation_workers: number of processes translating the templates to the provider templates
+    :param resume: if the operations finished by the previous deployment of cluster are skipped
+    :param timeline: path prefix of Chrome trace and CSV files with the timeline of executed operations
+    :param executor: backend which executes the operations of configuration tool, i.e. ansible or simulated
+    :param graph: path prefix of DOT and JSON files with the graph of operations, if it is set the script is not
+    generated and the analysis of parallelism of the graph is returned
+    :param graph_max_workers: positive limit of running operations for the estimation of wall time in the analysis of
+    graph, not limited if it is None
+    :param incremental: if only the templates changed since the previous translation of cluster and the templates
+    depending on them are translated, only their operations are run if the cluster is deployed
     :return: string that is a script to deploy or delete infrastructure
     """
     log_map = dict(
@@ -47,6 +64,10 @@ def translate(template_file, validate_only, provider, configuration_tool, cluste
     logging.info("Deploying script for cluster %s will be created" % 'deletion' if is_delete else 'creation')
     logging.info("Extra parameters to the unit of deployment scripts will be added: %s" % json.dumps(extra))
     logging.info("Log level is set to %s" % log_level)
+    if graph_max_workers is not None and graph_max_workers < 1:
+        logging.error("Limit of running operations for the analysis of graph must be positive, got %s"
+                      % graph_max_workers)
+        sys.exit(1)
 
     config = Configuration()
     for sec in REQUIRED_CONFIGURATION_PARAMS:
@@ -75,7 +96,6 @@ def translate(template_file, validate_only, provider, configuration_tool, cluste
         default_import_files.append(os.path.join(utils.get_project_root_path(), def_file))
     logging.info("Default TOSCA template definition file to be imported \'%s\'" % json.dumps(default_import_files))
 
-    # Add default import of normative TOSCA types to the template
     template[IMPORTS] = template.get(IMPORTS, [])
     for i in range(len(template[IMPORTS])):
         if isinstance(template[IMPORTS][i], dict):
@@ -90,9 +110,18 @@ def translate(template_file, validate_only, provider, configuration_tool, cluste
                         template[IMPORTS][i] = import_value['file']
                     if import_value.get('repository', None) is not None:
                         logging.warning("Clouni doesn't support imports \'repository\'")
-    template[IMPORTS].extend(default_import_files)
     for i in range(len(template[IMPORTS])):
         template[IMPORTS][i] = os.path.abspath(template[IMPORTS][i])
+    if not template[IMPORTS]:
+        template.pop(IMPORTS)
+
+    # NOTE: normative types are added from the snapshot as the types of template, not parsed from files by tosca-parser.
+    # The types of template override them as if they were imported. The snapshot is shared, tosca-parser changes the
+    # definitions, so it gets the copy
+    definitions_snapshot = get_definitions_snapshot(default_import_files)
+    for section, section_definitions in copy.deepcopy(definitions_snapshot.type_sections).items():
+        section_definitions.update(template.get(section) or {})
+        template[section] = section_definitions
 
     try:
         tosca_parser_template_object = ToscaTemplate(yaml_dict_tpl=template, a_file=a_file)
@@ -120,7 +149,10 @@ def translate(template_file, validate_only, provider, configuration_tool, cluste
 
     # Parse and generate new TOSCA service template with only provider specific TOSCA types from normative types
     tosca = ProviderToscaTemplate(tosca_parser_template_object, provider, configuration_tool, cluster_name,
-                                  host_ip_parameter, public_key_path, is_delete, common_map_files=default_map_files)
+                                  host_ip_parameter, public_key_path, is_delete, common_map_files=default_map_files,
+                                  common_definition_files=default_import_files, refresh_facts=refresh_facts,
+                                  defer_facts=defer_facts, translation_workers=translation_workers,
+                                  incremental=incremental)
 
     # Init configuration tool class
     tool = get_configuration_tool_class(configuration_tool)(tosca.provider)
@@ -147,7 +179,22 @@ def translate(template_file, validate_only, provider, configuration_tool, cluste
         extra = {}
     extra_full = utils.deep_update_dict(extra, tosca.extra_configuration_tool_params.get(configuration_tool, {}))
 
+    if graph is not None:
+        operations_graph = get_complete_graph(tosca.reversed_provider_operations if is_delete
+                                              else tosca.provider_operations)
+        analysis = get_graph_analysis(operations_graph, tool.get_operations_durations(operations_graph, is_delete),
+                                      max_workers=graph_max_workers)
+        graph_files = export_operations_graph(tosca.provider_operations, tosca.reversed_provider_operations, graph,
+                                              analysis)
+        logging.info("Graph of operations was written to %s" % ', '.join(graph_files))
+        return yaml.dump(analysis, default_flow_style=False, sort_keys=False)
+
+    changed_templates = None
+    if not is_delete:
+        changed_templates = tosca.get_translated_templates()
     configuration_content = tool.to_dsl(tosca.provider_operations, tosca.reversed_provider_operations, tosca.cluster_name, is_delete,
                                         artifacts=tool_artifacts, target_directory=default_artifacts_directory,
-                                        inputs=tosca.inputs, outputs=tosca.outputs, extra=extra_full, debug=debug)
+                                        inputs=tosca.inputs, outputs=tosca.outputs, extra=extra_full, debug=debug,
+                                        fact_resolver=tosca.fact_resolver, resume=resume, timeline=timeline,
+                                        executor=executor, changed_templates=changed_templates)
     return configuration_content
@@ -7,6 +7,7 @@ import logging
 import six
 import yaml
 
+from graphlib import TopologicalSorter
 from random import randint,seed
 from time import time
 
@@ -66,6 +67,28 @@ def get_tmp_clouni_dir():
     return '/tmp/clouni'
 
 
+def make_private_dir(directory):
+    """
+    Create the directory available only to the current user, the files from it can be trusted
+    :param directory: path to directory
+    :return: True if the directory belongs to the current user and is not available to others
+    """
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        dir_stat = os.stat(directory)
+        if dir_stat.st_uid == os.getuid() and dir_stat.st_mode & 0o077 and not dir_stat.st_mode & 0o022:
+            # NOTE: the directory of the current user is only readable by others, nobody else could write to it
+            os.chmod(directory, 0o700)
+            dir_stat = os.stat(directory)
+    except OSError as e:
+        logging.warning("Directory \'%s\' can not be created: %s" % (directory, e))
+        return False
+    if dir_stat.st_uid != os.getuid() or dir_stat.st_mode & 0o077:
+        logging.warning("Directory \'%s\' is not private to the current user and is not used" % directory)
+        return False
+    return True
+
+
 def get_random_int(start, end):
     seed(time())
     r = randint(start, end)
@@ -116,4 +139,43 @@ def replace_brackets(data, with_splash=True):
         for i in data:
             r.append(replace_brackets(i, with_splash))
         return r
-    return data
\ No newline at end of file
+    return data
+
+
+def get_longest_paths(graph, weights):
+    """
+    Get the length of the longest path starting from every element of graph to the elements depending on it
+    :param graph: dict of element: set of elements on which it depends
+    :param weights: dict of element: weight, missing elements have weight 0
+    :return: dict of element: sum of weights of elements on the longest path including the element
+    """
+    dependents = {}
+    for v, dependencies in graph.items():
+        for d in dependencies:
+            dependents.setdefault(d, []).append(v)
+    lengths = {}
+    for v in reversed([*TopologicalSorter(graph).static_order()]):
+        lengths[v] = weights.get(v, 0) + max([lengths[d] for d in dependents.get(v, [])], default=0)
+    return lengths
+
+
+def get_transitive_dependents(names, dependencies):
+    """
+    Get the names and all the names depending on them directly or through other names
+    :param names: iterable of names
+    :param dependencies: list of dicts of name: set of names on which it depends
+    :return: set of names
+    """
+    dependents = {}
+    for graph in dependencies:
+        for name, name_dependencies in graph.items():
+            for d in name_dependencies:
+                dependents.setdefault(d, set()).add(name)
+    result = set(names)
+    stack = list(result)
+    while len(stack) > 0:
+        for dependent in dependents.get(stack.pop(), []):
+            if dependent not in result:
+                result.add(dependent)
+                stack.append(dependent)
+    return result
@@ -1,5 +1,6 @@
 import time
 from multiprocessing import Queue
+from queue import Empty
 from random import seed, randint
 
 from graphlib import TopologicalSorter
@@ -12,11 +13,17 @@ from toscatranslator.providers.common.provider_configuration import ProviderConf
 from toscatranslator.configuration_tools.common.configuration_tool import ConfigurationTool, \
     OUTPUT_IDS, OUTPUT_ID_RANGE_START, OUTPUT_ID_RANGE_END
 
-from toscatranslator.configuration_tools.ansible.runner import run_ansible, parallel_run_ansible, prepare_for_run
+from toscatranslator.configuration_tools.ansible.runner import run_ansible, parallel_run_ansible, prepare_for_run, \
+    MAX_WORKERS, MAX_WORKERS_PER_PROVIDER, MAX_WORKERS_PER_HOST, START_METHODS, DEFAULT_START_METHOD, pop_run_time, \
+    read_journal, reset_journal, rewrite_journal, pop_timeline, worker_pool, OPERATION_FINISHED_TASK_PREFIX, pop_error, \
+    pop_playbook_error
+from toscatranslator.configuration_tools.ansible.timeline import export_timeline
+from toscatranslator.configuration_tools.ansible.simulator import get_simulated_worker_pool
 from multiprocessing.connection import Listener
 
-import copy, sys, yaml, os, itertools, six, logging
+import copy, sys, yaml, os, itertools, six, logging, json, tempfile
 from shutil import copyfile, rmtree
+from distutils.dir_util import copy_tree
 
 SEPARATOR = '.'
 
@@ -28,6 +35,23 @@ ANSIBLE_RESERVED_KEYS = \
     ('register', 'path', 'file', 'state', 'lineinfile', 'set_fact', ' is defined', ' is undefined', 'include')
 
 REQUIRED_CONFIG_PARAMS = (INITIAL_ARTIFACTS_DIRECTORY, DEFAULT_HOST) = ("initial_artifacts_directory", "default_host")
+WORKERS = 'workers'
+WORKERS_PARAMS = (START_METHOD, PRELOAD_MODULES) = ('start_method', 'preload_modules')
+SCHEDULER = 'scheduler'
+SCHEDULER_PARAMS = (PRIORITY, DURATIONS_HISTORY, COALESCE_ASYNC, ASYNC_TIMEOUT, ASYNC_POLL_DELAY, ON_FAILURE) = \
+    ('priority', 'durations_history', 'coalesce_async', 'async_timeout', 'async_poll_delay', 'on_failure')
+PRIORITIES = (CRITICAL_PATH, NO_PRIORITY) = ('critical_path', 'none')
+FAILURE_POLICIES = (CONTINUE, DRAIN, TERMINATE) = ('continue', 'drain', 'terminate')
+DEFAULT_FAILURE_POLICY = DRAIN
+DEFAULT_OPERATION_DURATION = 1.0
+SCHEDULER_DIRECTORY = 'scheduler'
+DEFAULT_ASYNC_TIMEOUT = 3600
+DEFAULT_ASYNC_POLL_DELAY = 2
+LOOP = 'loop'
+WITH_SEQUENCE = 'with_sequence'
+EXECUTOR = 'executor'
+EXECUTOR_PARAMS = (BACKEND,) = ('backend',)
+EXECUTOR_BACKENDS = (ANSIBLE_EXECUTOR, SIMULATED_EXECUTOR) = ('ansible', 'simulated')
 
 
 class AnsibleConfigurationTool(ConfigurationTool):
@@ -48,14 +72,22 @@ class AnsibleConfigurationTool(ConfigurationTool):
 
         for param in REQUIRED_CONFIG_PARAMS:
             setattr(self, param, main_config[param])
+        self.workers_limits = None
+        self.executor = None
+        self.worker_pool = None
 
     def to_dsl(self, operations_graph, reversed_operations_graph, cluster_name, is_delete,
-               artifacts=None, target_directory=None, inputs=None, outputs=None, extra=None, debug=False):
+               artifacts=None, target_directory=None, inputs=None, outputs=None, extra=None, debug=False,
+               fact_resolver=None, resume=False, timeline=None, executor=None, changed_templates=None):
         if artifacts is None:
             artifacts = []
         if target_directory is None:
             target_directory = self.initial_artifacts_directory
 
+        if executor is not None:
+            self.executor = executor
+            self.worker_pool = None
+
         self.artifacts = {}
         for art in artifacts:
             self.artifacts[art[NAME]] = art
@@ -81,31 +113,96 @@ class AnsibleConfigurationTool(ConfigurationTool):
         elements.prepare()
         # first operations from on top of the graph in state 'ready'
 
+        priority, durations_history_path = self.get_scheduler_config()
+        durations_history = {}
+        if durations_history_path is not None:
+            durations_history = self.load_durations_history(durations_history_path)
+        graph = reversed_operations_graph if is_delete else operations_graph
+        priorities = {}
+        if priority == CRITICAL_PATH and not debug:
+            # the ready operations starting the longest chains of dependent operations are run first,
+            # the order of operations in the debug playbook is not changed
+            priorities = self.get_critical_path_priorities(graph, durations_history, is_delete)
+
         ansible_playbook = []
         if not debug:
             self.prepare_for_run()
         # function for initializing tmp clouni directory
         q = Queue()
         # queue for node names + operations
-        active = []
-        # list of parallel active operations
-        first = True
+        active = {}
+        # parallel active operations by node names + operations
+        journal = {}
+        # finished operations by node names + operations, the operations are written by workers
+        if resume or changed_templates is not None:
+            journal = read_journal(cluster_name)
+            if changed_templates is not None:
+                # the operations of changed templates and of the relationships between them are run again, the
+                # templates depending on the changed ones are changed too
+                changed_operations = set(v.name + SEPARATOR + v.operation for v in graph
+                                         if v.name in changed_templates or v.source in changed_templates or
+                                         v.target in changed_templates)
+                journal = dict((key, entry) for key, entry in journal.items() if key not in changed_operations)
+                if not debug:
+                    rewrite_journal(cluster_name, journal.values())
+            logging.info("Deployment of cluster %s is resumed, %s operations are finished" %
+                         (cluster_name, len(journal)))
+        elif not debug:
+            reset_journal(cluster_name)
+        first = len(journal) == 0
+        # id_vars file is kept when the deployment is resumed
 
+        # deferred fact lookups are executed before all operations, found values are written to id_vars file
+        if not is_delete and fact_resolver is not None:
+            fact_tasks = fact_resolver.get_deferred_tasks(self.provider, ids_file_path)
+            if len(fact_tasks) > 0:
+                facts_play = dict(
+                    name='Resolve fact lookups of ' + self.provider + ' cluster',
+                    hosts=self.default_host,
+                    tasks=[]
+                )
+                if first:
+                    first = False
+                    facts_play['tasks'].append(copy.deepcopy({FILE: {
+                        PATH: ids_file_path,
+                        STATE: 'absent'}}))
+                    facts_play['tasks'].append(copy.deepcopy({FILE: {
+                        PATH: ids_file_path,
+                        STATE: 'touch'}}))
+                facts_play['tasks'].extend(fact_tasks)
+                ansible_playbook.append(facts_play)
+                if not debug:
+                    # conditions are included by relative path from the playbook directory
+                    copy_tree(self.get_ansible_artifacts_directory(),
+                              os.path.join(utils.get_tmp_clouni_dir(), cluster_name, self.initial_artifacts_directory))
+                    self.parallel_run([facts_play], None, None, q, cluster_name)
+                    done = q.get()
+                    if done != 'Done':
+                        logging.error("Something wrong with multiprocessing queue")
+                        sys.exit(1)
+                    # NOTE: the operations depend on the values of lookups, none of them is run
+                    error = pop_playbook_error(cluster_name, pool=self.get_worker_pool())
+                    if error is not None:
+                        logging.error("Fact lookups of cluster %s have failed: %s" % (cluster_name, error))
+                        sys.exit(1)
+
+        coalesce_config = None
+        if not debug and not is_delete:
+            coalesce_config = self.get_coalesce_config()
+        failure_policy = self.get_failure_policy()
+        failed = {}
+        # failed and skipped operations: error, the operations depending on them are skipped
+
+        scheduling_start = time.time()
+        waiting_time = 0
+        operations_number = 0
         while elements.is_active():
-            node_name = None
-            # try to get new finished operation from queue and find it in list of active
-            # if get - mark done this operation (but before it find in graph)
-            # if ready operations exists - get it and execute, remove from active
-            try:
-                node_name = q.get_nowait()
-            except:
-                time.sleep(1)
-            if node_name is not None:
-                for node in active:
-                    if node.name == node_name.split(SEPARATOR)[0] and node.operation == node_name.split(SEPARATOR)[1]:
-                        active.remove(node)
-                        elements.done(node)
-            for v in elements.get_ready():
+            # ready operations are executed, then the scheduler waits for finished operations from queue,
+            # all the finished operations are marked done at once
+            coalesced = {}
+            # ready create operations by modules, they are run by one playbook with async tasks
+            for v in sorted(elements.get_ready(), key=lambda x: -priorities.get(x, 0)):
+                operations_number += 1
                 # in delete mode we skip all operations exept delete and create operation transforms to delete
                 if is_delete:
                     if v.operation == 'create':
@@ -113,6 +210,17 @@ class AnsibleConfigurationTool(ConfigurationTool):
                     else:
                         elements.done(v)
                         continue
+                if len(failed) > 0 and (failure_policy != CONTINUE or any(u in failed for u in graph[v])):
+                    logging.warning("Operation %s is skipped because of the failed operations" %
+                                    (v.name + ':' + v.operation))
+                    failed[v] = None
+                    elements.done(v)
+                    continue
+                if v.name + SEPARATOR + v.operation in journal:
+                    logging.info("Operation %s is skipped, it is finished in the journal" %
+                                 (v.name + ':' + v.operation))
+                    elements.done(v)
+                    continue
                 logging.debug("Creating ansible play from operation: %s" % v.name + ':' + v.operation)
                 extra_tasks_for_delete = self.get_extra_tasks_for_delete(v.type, v.name.replace('-', '_'),
                                                                          ids_file_path)
@@ -198,16 +306,63 @@ class AnsibleConfigurationTool(ConfigurationTool):
                 if len(ansible_play_for_elem['tasks']) > 0:
                     ansible_playbook.append(ansible_play_for_elem)
                 # run playbooks
-                if not debug:
-                    if len(ansible_play_for_elem['tasks']) > 0:
-                        self.parallel_run([ansible_play_for_elem], v.name, v.operation, q, cluster_name)
+                if not debug and len(ansible_play_for_elem['tasks']) > 0:
+                    if coalesce_config is not None and v.operation == 'create' and not v.is_software_component \
+                            and self.get_async_task_index(ansible_play_for_elem['tasks'], module_by_type) is not None:
+                        coalesced.setdefault(module_by_type, []).append((v, ansible_play_for_elem))
                     else:
-                        elements.done(v)
-                    # add element to active list
-                    active.append(v)
+                        self.parallel_run([ansible_play_for_elem], v.name, v.operation, q, cluster_name,
+                                          priority=priorities.get(v, 0), journal=True)
+                    # add element to active operations
+                    active[v.name + SEPARATOR + v.operation] = v
                 else:
                     elements.done(v)
-        if is_delete:
+            for module_by_type, operations in coalesced.items():
+                if len(operations) == 1:
+                    v, ansible_play_for_elem = operations[0]
+                    self.parallel_run([ansible_play_for_elem], v.name, v.operation, q, cluster_name,
+                                      priority=priorities.get(v, 0), journal=True)
+                    continue
+                coalesced_play = self.get_coalesced_play(operations, module_by_type, coalesce_config)
+                self.parallel_run([coalesced_play], None, None, q, cluster_name,
+                                  priority=max(priorities.get(v, 0) for v, _ in operations), journal=True,
+                                  operations=[v.name + SEPARATOR + v.operation for v, _ in operations])
+            if len(active) == 0:
+                continue
+            waiting_start = time.time()
+            node_names = [q.get()]
+            waiting_time += time.time() - waiting_start
+            while True:
+                try:
+                    node_names.append(q.get_nowait())
+                except Empty:
+                    break
+            for node_name in node_names:
+                node = active.pop(node_name, None)
+                if node is None:
+                    logging.error("Unknown operation finished: %s" % node_name)
+                    sys.exit(1)
+                run_time = pop_run_time(cluster_name, node.name, node.operation, pool=self.get_worker_pool())
+                error = pop_error(cluster_name, node.name, node.operation, pool=self.get_worker_pool())
+                if error is not None:
+                    if len(failed) == 0 and failure_policy != CONTINUE:
+                        # new operations are not started, waiting and running operations are cancelled
+                        self.get_worker_pool().cancel(cluster_name, terminate=failure_policy == TERMINATE)
+                    failed[node] = error
+                elif durations_history_path is not None and run_time is not None:
+                    key = self.get_operation_key(node, node.operation)
+                    if key in durations_history:
+                        run_time = (durations_history[key] + run_time) / 2
+                    durations_history[key] = run_time
+                elements.done(node)
+        if operations_number > 0:
+            scheduling_time = time.time() - scheduling_start - waiting_time
+            logging.info("Scheduled %s operations, scheduler overhead %.3f ms per operation, waited for operations "
+                         "%.1f s" % (operations_number, 1000 * scheduling_time / operations_number, waiting_time))
+        if not debug and durations_history_path is not None:
+            self.save_durations_history(durations_history_path, durations_history)
+        # id_vars file is kept if some resources are not deleted
+        if is_delete and len(failed) == 0:
             last_play = dict(
                 name='Renew id_vars_example.yaml',
                 hosts=self.default_host,
@@ -222,10 +377,23 @@ class AnsibleConfigurationTool(ConfigurationTool):
                 if done != 'Done':
                     logging.error("Something wrong with multiprocessing queue")
                     sys.exit(1)
+                error = pop_playbook_error(cluster_name, pool=self.get_worker_pool())
+                if error is not None:
+                    logging.error("File %s of cluster %s is not removed: %s" % (ids_file_path, cluster_name, error))
             ansible_playbook.append(last_play)
+        if not debug and timeline is not None:
+            timeline_files = export_timeline(pop_timeline(cluster_name, pool=self.get_worker_pool()), timeline)
+            logging.info("Timeline of operations was written to %s" % ', '.join(timeline_files))
         # delete dir with cluster_name in tmp clouni dir
         if not debug:
-            rmtree(os.path.join(utils.get_tmp_clouni_dir(), cluster_name))
+            rmtree(os.path.join(utils.get_tmp_clouni_dir(), cluster_name), ignore_errors=True)
+        if len(failed) > 0:
+            logging.error("Deployment of cluster %s has failed, failed operations: %s; skipped operations: %s" % (
+                cluster_name,
+                ', '.join(v.name + ':' + v.operation + ' (' + error + ')' for v, error in failed.items()
+                          if error is not None),
+                ', '.join(v.name + ':' + v.operation for v, error in failed.items() if error is None) or 'none'))
+            sys.exit(1)
         return yaml.dump(ansible_playbook, default_flow_style=False, sort_keys=False)
 
     def init_graph(self, operations_graph):
@@ -292,6 +460,7 @@ class AnsibleConfigurationTool(ConfigurationTool):
             additional_args_element = copy.deepcopy(additional_args.get(element_object.name, {}))
             additional_args = utils.deep_update_dict(additional_args_global,
                                                      additional_args_element)
+        additional_args.update(self.get_ansible_args_for_instances(element_object))
 
         ansible_tasks = []
 
@@ -348,6 +517,16 @@ class AnsibleConfigurationTool(ConfigurationTool):
                  'when': task_name + '_var' + '.changed'})
         return ansible_tasks
 
+    def get_ansible_args_for_instances(self, element_object):
+        """
+        Get the loop over the instances of the template, the tasks refer to the number of instance as item
+        :param element_object: ProviderResource
+        :return: dict of arguments to add to the tasks
+        """
+        if element_object.instances is None:
+            return {}
+        return {WITH_SEQUENCE: 'start=1 end=%s format=%%d' % element_object.instances}
+
     def get_ansible_tasks_from_interface(self, element_object, target_directory, is_delete, operation, cluster_name,
                                          additional_args=None):
         if additional_args is None:
@@ -357,6 +536,7 @@ class AnsibleConfigurationTool(ConfigurationTool):
             additional_args_element = copy.deepcopy(additional_args.get(element_object.name, {}))
             additional_args = utils.deep_update_dict(additional_args_global,
                                                      additional_args_element)
+        additional_args.update(self.get_ansible_args_for_instances(element_object))
         ansible_tasks = []
         scripts = []
 
@@ -650,11 +830,279 @@ class AnsibleConfigurationTool(ConfigurationTool):
     def prepare_for_run(self):
         prepare_for_run()
 
-    def parallel_run(self, ansible_play, name, op, q, cluster_name):
+    def parallel_run(self, ansible_play, name, op, q, cluster_name, priority=0, journal=False, operations=None):
         if self.provider == 'amazon':
             amazon_plugins_path = os.path.join(utils.get_project_root_path(), '.ansible/plugins/modules/cloud/amazon')
             if "ANSIBLE_LIBRARY" not in os.environ:
                 os.environ["ANSIBLE_LIBRARY"] = amazon_plugins_path
             elif amazon_plugins_path not in os.environ["ANSIBLE_LIBRARY"]:
                 os.environ["ANSIBLE_LIBRARY"] += os.pathsep + amazon_plugins_path
-        parallel_run_ansible(ansible_play, name, op, q, cluster_name)
+        start_method, preload_modules = self.get_workers_start_method()
+        parallel_run_ansible(ansible_play, name, op, q, cluster_name, provider=self.provider,
+                             limits=self.get_workers_limits(), start_method=start_method,
+                             preload_modules=preload_modules, priority=priority, journal=journal,
+                             pool=self.get_worker_pool(), operations=operations)
+
+    def get_worker_pool(self):
+        """
+        Get the pool which runs the playbooks: the pool of Ansible processes or the simulated executor which does not
+        run Ansible and sleeps for the latencies of modules
+        :return: AnsibleWorkerPool
+        """
+        if self.worker_pool is not None:
+            return self.worker_pool
+        executor_config = self.tool_config.get_section(EXECUTOR) or {}
+        backend = self.executor or executor_config.get(BACKEND) or ANSIBLE_EXECUTOR
+        if backend not in EXECUTOR_BACKENDS:
+            logging.error("Executor \'%s\' is not supported, supported executors are %s"
+                          % (backend, ', '.join(EXECUTOR_BACKENDS)))
+            sys.exit(1)
+        if backend == SIMULATED_EXECUTOR:
+            self.worker_pool = get_simulated_worker_pool(
+                self.tool_config.get_subsection(EXECUTOR, SIMULATED_EXECUTOR) or {})
+        else:
+            self.worker_pool = worker_pool
+        return self.worker_pool
+
+    def get_scheduler_config(self):
+        """
+        Get the priority of operations and the path of file with durations of operations from the configuration
+        of tool, relative path is relative to the private scheduler directory of tmp clouni directory
+        :return: name of priority, path of file or None if durations are not stored
+        """
+        scheduler_config = self.tool_config.get_section(SCHEDULER) or {}
+        priority = scheduler_config.get(PRIORITY) or NO_PRIORITY
+        if priority not in PRIORITIES:
+            logging.error("Configuration parameter \'%s\' of scheduler has unsupported value \'%s\', supported values "
+                          "are %s" % (PRIORITY, priority, ', '.join(PRIORITIES)))
+            sys.exit(1)
+        durations_history_path = scheduler_config.get(DURATIONS_HISTORY) or None
+        if durations_history_path is not None:
+            durations_history_path = os.path.join(utils.get_tmp_clouni_dir(), SCHEDULER_DIRECTORY,
+                                                  durations_history_path)
+        return priority, durations_history_path
+
+    def get_failure_policy(self):
+        """
+        Get the policy of running operations after the failure of operation: the operations depending on the failed
+        one are always skipped, with continue policy the other operations are run, with drain policy the running
+        operations are finished and the new ones are not started, with terminate policy the running ones are
+        terminated
+        :return: name of policy
+        """
+        scheduler_config = self.tool_config.get_section(SCHEDULER) or {}
+        failure_policy = scheduler_config.get(ON_FAILURE) or DEFAULT_FAILURE_POLICY
+        if failure_policy not in FAILURE_POLICIES:
+            logging.error("Configuration parameter '%s' of scheduler has unsupported value '%s', supported values "
+                          "are %s" % (ON_FAILURE, failure_policy, ', '.join(FAILURE_POLICIES)))
+            sys.exit(1)
+        return failure_policy
+
+    def get_coalesce_config(self):
+        """
+        Get the parameters of async tasks if the ready create operations with the same module must be run by one
+        playbook
+        :return: dict of async timeout and poll delay in seconds or None if the operations are not coalesced
+        """
+        scheduler_config = self.tool_config.get_section(SCHEDULER) or {}
+        if str(scheduler_config.get(COALESCE_ASYNC, 'false')).lower() not in ('true', 'yes', '1'):
+            return None
+        coalesce_config = {
+            ASYNC_TIMEOUT: scheduler_config.get(ASYNC_TIMEOUT) or DEFAULT_ASYNC_TIMEOUT,
+            ASYNC_POLL_DELAY: scheduler_config.get(ASYNC_POLL_DELAY) or DEFAULT_ASYNC_POLL_DELAY
+        }
+        for param, value in coalesce_config.items():
+            try:
+                coalesce_config[param] = int(value)
+            except ValueError:
+                coalesce_config[param] = 0
+            if coalesce_config[param] <= 0:
+                logging.error("Configuration parameter \'%s\' of scheduler has unsupported value \'%s\'"
+                              % (param, value))
+                sys.exit(1)
+        return coalesce_config
+
+    @staticmethod
+    def get_async_task_index(tasks, module_by_type):
+        """
+        Get the task of operation which calls the module of the type, it can be run asynchronously if it registers
+        the result and is not retried
+        :param tasks: list of tasks of operation
+        :param module_by_type: name of module
+        :return: index of task or None
+        """
+        for i, task in enumerate(tasks):
+            if module_by_type in task:
+                if REGISTER not in task or 'until' in task:
+                    return None
+                return i
+        return None
+
+    def get_coalesced_play(self, operations, module_by_type, coalesce_config):
+        """
+        Create one play for the create operations with the same module: the module tasks are started asynchronously
+        one after another, then for every operation the play waits for its module task and runs the rest tasks of
+        operation. The last task of every operation reports the operation as finished to the scheduler
+        :param operations: list of tuples of operation and its play, the operations do not depend on each other
+        :param module_by_type: name of module
+        :param coalesce_config: dict of async timeout and poll delay
+        :return: play
+        """
+        started_tasks = []
+        finished_tasks = []
+        for v, ansible_play_for_elem in operations:
+            tasks = copy.deepcopy(ansible_play_for_elem['tasks'])
+            i = self.get_async_task_index(tasks, module_by_type)
+            async_task = tasks[i]
+            register = async_task[REGISTER]
+            async_task['async'] = coalesce_config[ASYNC_TIMEOUT]
+            async_task['poll'] = 0
+            started_tasks.extend(tasks[:i + 1])
+            async_status_task = {
+                'async_status': {
+                    'jid': self.rap_ansible_variable(register + '.ansible_job_id')
+                },
+                REGISTER: register,
+                'until': register + '.finished',
+                'retries': coalesce_config[ASYNC_TIMEOUT] // coalesce_config[ASYNC_POLL_DELAY] + 1,
+                'delay': coalesce_config[ASYNC_POLL_DELAY],
+                'when': register + '.ansible_job_id' + IS_DEFINED
+            }
+            if any(key == LOOP or key.startswith('with_') for key in async_task):
+                # every item of loop is started as the separate job, the result of async_status of the item
+                # contains the result of module, so the rest tasks use the results as before
+                async_status_task['async_status']['jid'] = self.rap_ansible_variable('item.ansible_job_id')
+                async_status_task[LOOP] = self.rap_ansible_variable(register + '.results')
+                async_status_task['when'] = 'item.ansible_job_id' + IS_DEFINED
+            finished_tasks.append(async_status_task)
+            finished_tasks.extend(tasks[i + 1:])
+            finished_tasks.append({
+                'name': OPERATION_FINISHED_TASK_PREFIX + v.name + SEPARATOR + v.operation,
+                SET_FACT: {
+                    'clouni_finished_operation': v.name + SEPARATOR + v.operation
+                }
+            })
+        return dict(
+            name=operations[0][1]['name'].split(':')[0] + ': ' +
+                 ', '.join(v.name + ':' + v.operation for v, _ in operations),
+            hosts=self.default_host,
+            tasks=started_tasks + finished_tasks
+        )
+
+    @staticmethod
+    def load_durations_history(path):
+        # NOTE: the durations change the priorities of operations, so the file which could be written by other users
+        # is not used
+        if not utils.make_private_dir(os.path.dirname(path)) or not os.path.isfile(path):
+            return {}
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning("Durations of operations were not loaded from \'%s\': %s" % (path, e))
+            return {}
+
+    @staticmethod
+    def save_durations_history(path, durations_history):
+        if not utils.make_private_dir(os.path.dirname(path)):
+            return
+        try:
+            file_descriptor, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(file_descriptor, 'w') as f:
+                json.dump(durations_history, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning("Durations of operations were not saved to \'%s\': %s" % (path, e))
+
+    @staticmethod
+    def get_operation_key(v, operation):
+        return v.type + SEPARATOR + operation
+
+    def get_critical_path_priorities(self, operations_graph, durations_history, is_delete):
+        """
+        Get the priority of every operation as the length of the longest path of operations depending on it.
+        The length of operation is its duration from history, operations without history have the average duration
+        :param operations_graph: dict of operation: set of operations on which it depends
+        :param durations_history: dict of type and operation: duration in seconds
+        :param is_delete: in delete mode only create operations are run as delete
+        :return: dict of operation: priority
+        """
+        return utils.get_longest_paths(operations_graph,
+                                       self.get_operations_durations(operations_graph, is_delete, durations_history))
+
+    def get_operations_durations(self, operations_graph, is_delete, durations_history=None):
+        """
+        Get the duration of every operation from history, operations without history have the average duration,
+        in delete mode the operations which are not run have zero duration
+        :param operations_graph: dict of operation: set of operations on which it depends
+        :param is_delete: in delete mode only create operations are run as delete
+        :param durations_history: dict of type and operation: duration in seconds, it is loaded from the file of
+        scheduler configuration by default
+        :return: dict of operation: duration in seconds
+        """
+        if durations_history is None:
+            _, durations_history_path = self.get_scheduler_config()
+            durations_history = {}
+            if durations_history_path is not None:
+                durations_history = self.load_durations_history(durations_history_path)
+        default_duration = DEFAULT_OPERATION_DURATION
+        if len(durations_history) > 0:
+            default_duration = sum(durations_history.values()) / len(durations_history)
+        weights = {}
+        for v in operations_graph:
+            operation = v.operation
+            if is_delete:
+                if operation != 'create':
+                    weights[v] = 0
+                    continue
+                operation = 'delete'
+            weights[v] = durations_history.get(self.get_operation_key(v, operation), default_duration)
+        return weights
+
+    def get_workers_start_method(self):
+        """
+        Get the start method of processes running playbooks and the modules to be imported by forkserver
+        :return: name of start method, list of modules
+        """
+        workers_config = self.tool_config.get_section(WORKERS) or {}
+        start_method = workers_config.get(START_METHOD) or DEFAULT_START_METHOD
+        if start_method not in START_METHODS:
+            logging.error("Configuration parameter \'%s\' of workers has unsupported value \'%s\', supported values "
+                          "are %s" % (START_METHOD, start_method, ', '.join(START_METHODS)))
+            sys.exit(1)
+        preload_modules = workers_config.get(PRELOAD_MODULES) or []
+        if not isinstance(preload_modules, list):
+            preload_modules = [preload_modules]
+        return start_method, [m.strip() for m in preload_modules if m.strip()]
+
+    def get_workers_limits(self):
+        """
+        Get the limits of processes running playbooks from the configuration of tool, max_workers of the provider
+        configuration is the limit for the provider
+        :return: dict of limits
+        """
+        if self.workers_limits is not None:
+            return self.workers_limits
+        workers_config = self.tool_config.get_section(WORKERS) or {}
+        provider_workers_config = {}
+        if self.provider is not None:
+            provider_workers_config = ProviderConfiguration(self.provider).get_subsection(ANSIBLE, WORKERS) or {}
+        limits_config = {
+            MAX_WORKERS: workers_config.get(MAX_WORKERS),
+            MAX_WORKERS_PER_PROVIDER: provider_workers_config.get(MAX_WORKERS),
+            MAX_WORKERS_PER_HOST: workers_config.get(MAX_WORKERS_PER_HOST)
+        }
+        self.workers_limits = {}
+        for param, value in limits_config.items():
+            if value is None or value == '':
+                value = 0
+            try:
+                value = int(value)
+            except ValueError:
+                value = -1
+            if value < 0:
+                logging.error("Configuration parameter \'%s\' of workers has unsupported value \'%s\'"
+                              % (param, limits_config[param]))
+                sys.exit(1)
+            self.workers_limits[param] = value
+        return self.workers_limits
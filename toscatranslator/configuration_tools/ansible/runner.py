@@ -1,8 +1,11 @@
 import copy
+import json
 import logging
 import os
 import sys
-from multiprocessing import Process
+import threading
+import time
+from multiprocessing import get_context
 from shutil import copyfile
 
 import yaml
@@ -11,10 +14,17 @@ from distutils.dir_util import copy_tree
 from toscatranslator.common import utils
 from toscatranslator.common.utils import get_random_int
 
-
-import ast
-
 SEPARATOR = '.'
+WORKERS_LIMITS = (MAX_WORKERS, MAX_WORKERS_PER_PROVIDER, MAX_WORKERS_PER_HOST) = \
+    ('max_workers', 'max_workers_per_provider', 'max_workers_per_host')
+START_METHODS = ('fork', 'forkserver')
+DEFAULT_START_METHOD = 'forkserver'
+# NOTE: the modules imported once by the forkserver process, the workers are forked from it
+PRELOADED_MODULES = ['cotea.runner', 'cotea.arguments_maker', __name__]
+JOURNAL_DIRECTORY = 'journals'
+JOURNAL_FILE_NAME = 'journal_%s.jsonl'
+# NOTE: the task with this name prefix is added after the tasks of every operation of the coalesced playbook
+OPERATION_FINISHED_TASK_PREFIX = 'Operation finished: '
 
 
 def prepare_for_run():
@@ -23,15 +33,19 @@ def prepare_for_run():
         os.remove(successful_tasks_path)
 
 
-def run_ansible(ansible_playbook, cluster_name):
+def run_ansible(ansible_playbook, cluster_name, errors=None, task_finished=None):
     """
 
     :param ansible_playbook: dict which is equal to Ansible playbook in YAML
     :param cluster_name: name of cluster
-    :return: empty
+    :param errors: list to which the error message is appended if the playbook has failed
+    :param task_finished: function called with the name, the list of cotea TaskResult, start and finish time
+    of every task except meta tasks, the results are not collected if it is set
+    :return: list of cotea TaskResult of all tasks or empty list if task_finished is set
     """
 
-    # this strange thing recomended for cotea for using local modules in every process
+    # this strange thing recomended for cotea for using local modules in every process,
+    # the worker forked from forkserver has the modules already imported
     from cotea.runner import runner
     from cotea.arguments_maker import argument_maker
 
@@ -50,37 +64,602 @@ def run_ansible(ansible_playbook, cluster_name):
 
     r = runner(playbook_path, am)
     results = []
+    # NOTE: the successful tasks are kept for checking the deployment, the journal of cluster has only the finished
+    # operations. The workers append to the file concurrently, so every task is flushed by its own write
     with open(successful_tasks_path, "a") as successful_tasks_file:
         while r.has_next_play():
             current_play = r.get_cur_play_name()
 
             while r.has_next_task():
+                task_started = time.time()
                 task_results = r.run_next_task()
-                results.extend(task_results)
+                if task_finished is None:
+                    results.extend(task_results)
                 succ_task = r.get_prev_task()
-                for status in r.get_last_task_result():
-                    if status.is_unreachable or status.is_failed:
-                        continue
                 if succ_task is not None and succ_task.get_ds() is not None:
                     if 'meta' not in succ_task.get_ds():
-                        d = str(succ_task.get_ds())
-                        successful_tasks_file.write(
-                            yaml.dump([ast.literal_eval(d)], default_flow_style=False, sort_keys=False))
+                        if task_finished is not None:
+                            task_finished(r.get_prev_task_name(), task_results, task_started, time.time())
+                        if get_task_status(task_results) != 'failed':
+                            successful_tasks_file.write(
+                                yaml.dump([get_plain_data(succ_task.get_ds())], default_flow_style=False,
+                                          sort_keys=False))
+                            successful_tasks_file.flush()
 
+    if errors is not None and r.was_error():
+        errors.append(r.get_error_msg() or 'unknown error')
     r.finish_ansible()
     return results
 
 
-def run_and_finish(ansible_playbook, name, op, q, cluster_name):
-    results = run_ansible(ansible_playbook, cluster_name)
+def get_plain_data(data):
+    """
+    Convert the data structure of Ansible task to the builtin types to be dumped by yaml
+    :param data: data structure of task which contains the subclasses of dict, list and str
+    :return: the same data of dict, list, str and scalar types
+    """
+    if isinstance(data, dict):
+        return dict((get_plain_data(k), get_plain_data(v)) for k, v in data.items())
+    if isinstance(data, (list, tuple)):
+        return [get_plain_data(v) for v in data]
+    if isinstance(data, str):
+        return str(data)
+    return data
+
+
+def get_task_status(task_results):
+    if any(res.is_failed or res.is_unreachable for res in task_results):
+        return 'failed'
+    if len(task_results) > 0 and all(res.is_skipped for res in task_results):
+        return 'skipped'
+    if any(res.is_changed for res in task_results):
+        return 'changed'
+    return 'ok'
+
+
+def get_finish_message(results, name, op):
     if name is not None and op is not None:
         if name == 'artifacts' or op == 'artifacts':
-            q.put(results)
+            return results
+        return name + SEPARATOR + op
+    return 'Done'
+
+
+def get_logging_config():
+    """
+    Get the configuration of root logger to be set in the worker which does not inherit it from the parent
+    :return: dict of arguments of logging.basicConfig
+    """
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers:
+        if isinstance(handler, logging.FileHandler):
+            logging_config = dict(filename=handler.baseFilename, level=root_logger.level)
+            if handler.formatter is not None:
+                logging_config.update(format=handler.formatter._fmt, datefmt=handler.formatter.datefmt)
+            return logging_config
+    return dict(level=root_logger.level)
+
+
+def get_registered_outputs(results):
+    """
+    Get the results of successful tasks which register variables
+    :param results: list of cotea TaskResult
+    :return: dict of variable name: result of task
+    """
+    outputs = {}
+    for task_result in results:
+        register = task_result.task_fields.get('register')
+        if register and not task_result.is_failed and not task_result.is_skipped:
+            outputs[register] = task_result.result
+    return outputs
+
+
+class StreamedTaskResult(object):
+    """
+    Result of task on one host received from the worker, it has the attributes of cotea TaskResult which are used
+    by the translator
+    """
+    __slots__ = ('task_name', 'result', 'is_failed', 'is_unreachable', 'is_skipped', 'is_changed')
+
+    def __init__(self, task_name, result, is_failed=False, is_unreachable=False, is_skipped=False,
+                 is_changed=False):
+        self.task_name = task_name
+        self.result = result
+        self.is_failed = is_failed
+        self.is_unreachable = is_unreachable
+        self.is_skipped = is_skipped
+        self.is_changed = is_changed
+
+
+def get_task_message(task_name, task_results, started, finished, with_results=False):
+    """
+    Serialize the finished task to be sent from the worker to the parent
+    :param task_name: name of task
+    :param task_results: list of cotea TaskResult of the task
+    :param started: time of start
+    :param finished: time of finish
+    :param with_results: if the results of task on every host are sent, only registered results are sent otherwise
+    :return: bytes of JSON object with task name, time, status, registered outputs and results
+    """
+    message = dict(task=task_name, started=started, finished=finished, status=get_task_status(task_results))
+    outputs = get_registered_outputs(task_results)
+    if len(outputs) > 0:
+        message['outputs'] = outputs
+    if with_results:
+        message['results'] = [dict(task_name=res.task_name, result=res.result, is_failed=res.is_failed,
+                                   is_unreachable=res.is_unreachable, is_skipped=res.is_skipped,
+                                   is_changed=res.is_changed) for res in task_results]
+    return json.dumps(message, default=str, separators=(',', ':')).encode()
+
+
+def run_in_worker(ansible_playbook, name, op, connection, cluster_name, environment, cwd, logging_config):
+    """
+    Run the playbook in the worker process, every finished task is sent to the parent as soon as it finishes,
+    the last message has the error of playbook
+    """
+    os.environ.clear()
+    os.environ.update(environment)
+    os.chdir(cwd)
+    logging.basicConfig(**logging_config)
+    errors = []
+    # NOTE: the finish message of artifacts is the list of results of all tasks
+    with_results = isinstance(get_finish_message([], name, op), list)
+
+    def task_finished(task_name, task_results, started, finished):
+        connection.send_bytes(get_task_message(task_name, task_results, started, finished,
+                                               with_results=with_results))
+
+    run_ansible(ansible_playbook, cluster_name, errors=errors, task_finished=task_finished)
+    connection.send_bytes(json.dumps(dict(error=errors[0] if len(errors) > 0 else None), default=str).encode())
+    connection.close()
+
+
+def get_journal_directory():
+    return os.path.join(utils.get_tmp_clouni_dir(), JOURNAL_DIRECTORY)
+
+
+def get_journal_path(cluster_name):
+    return os.path.join(get_journal_directory(), JOURNAL_FILE_NAME % cluster_name)
+
+
+def reset_journal(cluster_name):
+    """
+    Remove the entries of journal of the cluster, the journal is not kept if its directory is not private
+    :param cluster_name: name of cluster
+    :return: None
+    """
+    if not utils.make_private_dir(get_journal_directory()):
+        return
+    open(get_journal_path(cluster_name), 'w').close()
+
+
+def read_journal(cluster_name):
+    """
+    Read the journal of operations of the cluster which were finished successfully
+    :param cluster_name: name of cluster
+    :return: dict of node.operation: entry with node, operation, finished time and registered outputs, empty if the
+    directory of journal is not private
+    """
+    entries = {}
+    journal_path = get_journal_path(cluster_name)
+    # NOTE: the entries skip the operations and set their outputs, so the journal which could be written by other
+    # users is not trusted
+    if not utils.make_private_dir(get_journal_directory()) or not os.path.isfile(journal_path):
+        return entries
+    with open(journal_path, 'r') as journal_file:
+        for line in journal_file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # NOTE: the last entry is broken if the translator was killed while writing it
+                logging.warning("Broken entry of journal \'%s\' is skipped: %s" % (journal_path, line))
+                continue
+            entries[entry['node'] + SEPARATOR + entry['operation']] = entry
+    return entries
+
+
+def rewrite_journal(cluster_name, entries):
+    """
+    Replace the entries of journal of the cluster
+    :param cluster_name: name of cluster
+    :param entries: list of entries returned by read_journal
+    :return: None
+    """
+    if not utils.make_private_dir(get_journal_directory()):
+        return
+    with open(get_journal_path(cluster_name), 'w') as journal_file:
+        for entry in entries:
+            journal_file.write(json.dumps(entry, default=str) + '\n')
+        journal_file.flush()
+        os.fsync(journal_file.fileno())
+
+
+def write_journal_entry(cluster_name, name, op, outputs):
+    if not utils.make_private_dir(get_journal_directory()):
+        return
+    entry = dict(node=name, operation=op, finished=time.time(), outputs=outputs)
+    with open(get_journal_path(cluster_name), 'a') as journal_file:
+        journal_file.write(json.dumps(entry, default=str) + '\n')
+        journal_file.flush()
+        os.fsync(journal_file.fileno())
+
+
+class AnsibleJob(object):
+    """
+    Playbook waiting for the worker or running in it
+    """
+    __slots__ = ('ansible_playbook', 'name', 'op', 'q', 'cluster_name', 'provider', 'host', 'limits',
+                 'start_method', 'priority', 'journal', 'operations', 'finished_operations', 'submitted', 'started',
+                 'cancelled')
+
+    def __init__(self, ansible_playbook, name, op, q, cluster_name, provider, limits,
+                 start_method=DEFAULT_START_METHOD, priority=0, journal=False, operations=None):
+        self.ansible_playbook = ansible_playbook
+        self.name = name
+        self.op = op
+        self.q = q
+        self.cluster_name = cluster_name
+        self.provider = provider
+        self.host = None
+        if len(ansible_playbook) > 0:
+            self.host = ansible_playbook[0].get('hosts')
+        self.limits = limits
+        self.start_method = start_method
+        self.priority = priority
+        self.journal = journal
+        # NOTE: the coalesced playbook has no name and operation, it runs the list of node.operation
+        self.operations = operations
+        self.finished_operations = []
+        self.submitted = time.time()
+        self.started = None
+        self.cancelled = False
+
+    @property
+    def title(self):
+        if self.operations is not None:
+            return 'coalesced playbook of ' + ', '.join(self.operations)
+        if self.name is None:
+            return 'playbook'
+        return self.name + SEPARATOR + self.op
+
+
+class AnsibleWorkerPool(object):
+    """
+    Processes running the playbooks. The number of processes is limited globally, for the provider and for the
+    target host of playbook, limit 0 means no limit. The playbooks which can not be run wait in order of priority,
+    the playbooks with the same priority wait in order of submission.
+    With forkserver start method every playbook is run by the fresh process forked from the process which has
+    Ansible and cotea imported, so the state of cotea is not shared and the modules are not imported again
+    """
+
+    def __init__(self):
+        self.contexts = {}
+        self.lock = threading.Lock()
+        self.waiting = []
+        self.running = 0
+        self.running_by_provider = {}
+        self.running_by_host = {}
+        # (cluster name, node.operation): time of running or error of the operation
+        self.run_times = {}
+        self.errors = {}
+        # cluster name: error of the playbook without operations, i.e. the fact lookups
+        self.playbook_errors = {}
+        self.timeline = []
+        # running playbooks: worker process
+        self.workers = {}
+
+    def get_context(self, start_method, preload_modules=None):
+        context = self.contexts.get(start_method)
+        if context is None:
+            context = get_context(start_method)
+            if start_method == 'forkserver':
+                context.set_forkserver_preload(PRELOADED_MODULES + list(preload_modules or []))
+            self.contexts[start_method] = context
+        return context
+
+    def submit(self, job):
+        with self.lock:
+            self.waiting.append(job)
+            started_jobs = self.start_waiting()
+        self.start_jobs(started_jobs)
+
+    def can_start(self, job):
+        if 0 < job.limits.get(MAX_WORKERS, 0) <= self.running:
+            return False
+        if 0 < job.limits.get(MAX_WORKERS_PER_PROVIDER, 0) <= self.running_by_provider.get(job.provider, 0):
+            return False
+        if 0 < job.limits.get(MAX_WORKERS_PER_HOST, 0) <= self.running_by_host.get(job.host, 0):
+            return False
+        return True
+
+    def get_waiting_by_priority(self):
+        return sorted(self.waiting, key=lambda job: -job.priority)
+
+    def start_waiting(self):
+        """
+        Reserve the workers for the waiting playbooks which can be started, must be called with the lock
+        :return: list of AnsibleJob to be started by start_jobs after the lock is released
+        """
+        started_jobs = []
+        for job in self.get_waiting_by_priority():
+            if not self.can_start(job):
+                continue
+            self.waiting.remove(job)
+            self.running += 1
+            self.running_by_provider[job.provider] = self.running_by_provider.get(job.provider, 0) + 1
+            self.running_by_host[job.host] = self.running_by_host.get(job.host, 0) + 1
+            job.started = time.time()
+            # NOTE: the worker of reserved playbook is set by start_job
+            self.workers[job] = None
+            started_jobs.append(job)
+        return started_jobs
+
+    def start_jobs(self, jobs):
+        # NOTE: must be called without the lock, starting the process takes time and the finished playbooks wait
+        for job in jobs:
+            self.start_job(job)
+
+    def start_job(self, job):
+        context = self.get_context(job.start_method)
+        reader, writer = context.Pipe(duplex=False)
+        process = context.Process(target=run_in_worker, args=(job.ansible_playbook, job.name, job.op, writer,
+                                                              job.cluster_name, dict(os.environ), os.getcwd(),
+                                                              get_logging_config()))
+        process.start()
+        writer.close()
+        with self.lock:
+            self.workers[job] = process
+            # NOTE: the playbook could be cancelled while its process was starting
+            terminate = job.cancelled
+        if terminate:
+            process.terminate()
+        threading.Thread(target=self.wait_finished, args=(job, process, reader), daemon=True).start()
+
+    def wait_finished(self, job, process, reader):
+        finished_job = dict(outputs={}, error=None, tasks=[])
+        results = []
+        while True:
+            try:
+                message = json.loads(reader.recv_bytes())
+            except EOFError:
+                finished_job['error'] = "worker exit code %s" % process.exitcode
+                break
+            if 'task' not in message:
+                finished_job['error'] = message['error']
+                break
+            self.finish_task(job, message, finished_job)
+            for task_result in message.get('results', []):
+                results.append(StreamedTaskResult(**task_result))
+        reader.close()
+        process.join()
+        with self.lock:
+            self.workers.pop(job, None)
+        if job.cancelled and finished_job['error'] is not None:
+            finished_job['error'] = 'terminated after the failure of other operation'
+        finished_job['message'] = get_finish_message(results, job.name, job.op)
+        self.finish_job(job, finished_job, process.pid)
+
+    def finish_task(self, job, message, finished_job):
+        """
+        Record the finished task of the running playbook, the operation of coalesced playbook is finished by its
+        last task
+        :param job: AnsibleJob
+        :param message: dict of task name, start and finish time, status and registered outputs
+        :param finished_job: dict to which the outputs and the timeline of tasks of playbook are added
+        :return: None
+        """
+        finished_job['outputs'].update(message.get('outputs', {}))
+        finished_job['tasks'].append(dict(name=message['task'], started=message['started'],
+                                          finished=message['finished'], status=message['status']))
+        if job.operations is not None and message['task'].startswith(OPERATION_FINISHED_TASK_PREFIX) and \
+                message['status'] != 'failed':
+            self.finish_operation(job, message['task'][len(OPERATION_FINISHED_TASK_PREFIX):], message['finished'])
+
+    def finish_operation(self, job, title, finished):
+        """
+        Record the finished operation of coalesced playbook and put its finish message to the queue
+        :param job: AnsibleJob with operations
+        :param title: node.operation
+        :param finished: time of finish
+        :return: None
+        """
+        logging.info("Ansible %s finished in coalesced playbook, ran %.2f s" % (title, finished - job.started))
+        with self.lock:
+            job.finished_operations.append(title)
+            self.run_times[(job.cluster_name, title)] = finished - job.started
+            if job.journal:
+                name, op = title.rsplit(SEPARATOR, 1)
+                write_journal_entry(job.cluster_name, name, op, {})
+        job.q.put(title)
+
+    def put_messages(self, job, message, error):
+        """
+        Record the error of operations of the playbook and put their finish messages to the queue, the error is
+        recorded before the message is put
+        :param job: AnsibleJob
+        :param message: finish message of playbook
+        :param error: error message or None if the playbook has succeeded
+        :return: None
+        """
+        if job.operations is not None:
+            # the operations which were not finished because of the error are reported at the end of playbook
+            titles = [title for title in job.operations if title not in job.finished_operations]
+        elif job.name is not None:
+            titles = [job.title]
+        else:
+            titles = []
+        if error is not None:
+            with self.lock:
+                for title in titles:
+                    self.errors[(job.cluster_name, title)] = error
+                if job.operations is None and job.name is None:
+                    self.playbook_errors[job.cluster_name] = error
+        if job.operations is not None:
+            for title in titles:
+                job.q.put(title)
         else:
-            q.put(name + SEPARATOR + op)
-    else:
-        q.put('Done')
+            job.q.put(message)
+
+    def cancel(self, cluster_name, terminate=False):
+        """
+        Cancel the playbooks of the cluster which wait for the worker, their operations are finished with the error
+        :param cluster_name: name of cluster
+        :param terminate: if the running playbooks of the cluster are terminated, otherwise they are finished
+        :return: None
+        """
+        with self.lock:
+            cancelled = [job for job in self.waiting if job.cluster_name == cluster_name]
+            self.waiting = [job for job in self.waiting if job.cluster_name != cluster_name]
+            running = []
+            if terminate:
+                running = [job for job in self.workers if job.cluster_name == cluster_name]
+        for job in cancelled:
+            logging.info("Ansible %s is cancelled" % job.title)
+            job.cancelled = True
+            self.put_messages(job, get_finish_message([], job.name, job.op), 'cancelled after the failure of '
+                                                                              'other operation')
+        for job in running:
+            logging.info("Ansible %s is terminated" % job.title)
+            job.cancelled = True
+            self.terminate_job(job)
+
+    def terminate_job(self, job):
+        with self.lock:
+            process = self.workers.get(job)
+        if process is not None:
+            process.terminate()
+
+    def finish_job(self, job, finished_job, pid):
+        """
+        Record the finished playbook, put its finish message to the queue and start the waiting playbooks
+        :param job: AnsibleJob
+        :param finished_job: dict of finish message, registered outputs, error and timeline of tasks
+        :param pid: id of worker process
+        :return: None
+        """
+        finished = time.time()
+        if finished_job['error'] is not None:
+            logging.error("Ansible %s has failed: %s" % (job.title, finished_job['error']))
+        logging.info("Ansible %s waited for worker %.2f s, ran %.2f s" %
+                     (job.title, job.started - job.submitted, finished - job.started))
+        with self.lock:
+            self.timeline.append(dict(
+                cluster_name=job.cluster_name,
+                name=job.name,
+                op=job.op,
+                title=job.title,
+                host=job.host,
+                pid=pid,
+                submitted=job.submitted,
+                started=job.started,
+                finished=finished,
+                status='failed' if finished_job['error'] is not None else 'ok',
+                tasks=finished_job['tasks']
+            ))
+        if job.name is not None:
+            with self.lock:
+                self.run_times[(job.cluster_name, job.title)] = finished - job.started
+                if job.journal and finished_job['error'] is None:
+                    write_journal_entry(job.cluster_name, job.name, job.op, finished_job['outputs'])
+        self.put_messages(job, finished_job['message'], finished_job['error'])
+        with self.lock:
+            self.running -= 1
+            self.running_by_provider[job.provider] -= 1
+            self.running_by_host[job.host] -= 1
+            started_jobs = self.start_waiting()
+        self.start_jobs(started_jobs)
 
 
-def parallel_run_ansible(ansible_playbook, name, op, q, cluster_name):
-    Process(target=run_and_finish, args=(ansible_playbook, name, op, q, cluster_name)).start()
\ No newline at end of file
+worker_pool = AnsibleWorkerPool()
+
+
+def parallel_run_ansible(ansible_playbook, name, op, q, cluster_name, provider=None, limits=None,
+                         start_method=DEFAULT_START_METHOD, preload_modules=None, priority=0, journal=False,
+                         pool=None, operations=None):
+    """
+    Run the playbook in the new process when the limits of workers allow
+    :param ansible_playbook: list of Ansible plays
+    :param name: name of node or None
+    :param op: name of operation or None
+    :param q: queue to put the result to
+    :param cluster_name: name of cluster
+    :param provider: name of provider
+    :param limits: dict of max_workers, max_workers_per_provider and max_workers_per_host
+    :param start_method: start method of worker processes, one of START_METHODS
+    :param preload_modules: modules imported by forkserver in addition to Ansible and cotea
+    :param priority: the playbooks with greater priority are started first when the limits of workers are reached
+    :param journal: if the operation is written to the journal of cluster when the playbook succeeds
+    :param pool: AnsibleWorkerPool running the playbook, the pool of Ansible processes by default
+    :param operations: list of node.operation of coalesced playbook, the message of every operation is put
+    to the queue when the operation finishes, name and op must be None
+    :return: None
+    """
+    if limits is None:
+        limits = {}
+    if pool is None:
+        pool = worker_pool
+    pool.get_context(start_method, preload_modules)
+    pool.submit(AnsibleJob(ansible_playbook, name, op, q, cluster_name, provider, limits,
+                           start_method=start_method, priority=priority, journal=journal,
+                           operations=operations))
+
+
+def pop_run_time(cluster_name, name, op, pool=None):
+    """
+    Get the time of running the finished playbook of the operation in the worker
+    :param cluster_name: name of cluster
+    :param name: name of node or relationship
+    :param op: name of operation
+    :param pool: AnsibleWorkerPool which has run the playbook, the pool of Ansible processes by default
+    :return: time in seconds or None if the playbook was not run in the worker
+    """
+    if pool is None:
+        pool = worker_pool
+    with pool.lock:
+        return pool.run_times.pop((cluster_name, name + SEPARATOR + op), None)
+
+
+def pop_error(cluster_name, name, op, pool=None):
+    """
+    Get the error of the finished operation
+    :param cluster_name: name of cluster
+    :param name: name of node or relationship
+    :param op: name of operation
+    :param pool: AnsibleWorkerPool which has run the playbook, the pool of Ansible processes by default
+    :return: error message or None if the operation has succeeded
+    """
+    if pool is None:
+        pool = worker_pool
+    with pool.lock:
+        return pool.errors.pop((cluster_name, name + SEPARATOR + op), None)
+
+
+def pop_playbook_error(cluster_name, pool=None):
+    """
+    Get the error of the finished playbook of the cluster which has no operations
+    :param cluster_name: name of cluster
+    :param pool: AnsibleWorkerPool which has run the playbook, the pool of Ansible processes by default
+    :return: error message or None if the playbook has succeeded
+    """
+    if pool is None:
+        pool = worker_pool
+    with pool.lock:
+        return pool.playbook_errors.pop(cluster_name, None)
+
+
+def pop_timeline(cluster_name, pool=None):
+    """
+    Get the timeline of playbooks of the cluster finished by the workers
+    :param cluster_name: name of cluster
+    :param pool: AnsibleWorkerPool which has run the playbooks, the pool of Ansible processes by default
+    :return: list of dicts with name and operation, enqueue, start and finish time, worker PID, status and tasks
+    """
+    if pool is None:
+        pool = worker_pool
+    with pool.lock:
+        timeline = [record for record in pool.timeline if record['cluster_name'] == cluster_name]
+        pool.timeline = [record for record in pool.timeline if record['cluster_name'] != cluster_name]
+    return timeline
@@ -0,0 +1,273 @@
+import argparse
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from random import Random
+
+import yaml
+
+from toscatranslator.configuration_tools.ansible.runner import AnsibleWorkerPool, get_finish_message
+
+SIMULATED_PARAMS = (SEED, TIME_SCALE, DEFAULT_MODULE, STARTUP, FAIL) = \
+    ('seed', 'time_scale', 'default', 'startup', 'fail_operations')
+DISTRIBUTIONS = (CONSTANT, UNIFORM, NORMAL, LOGNORMAL, EXPONENTIAL) = \
+    ('constant', 'uniform', 'normal', 'lognormal', 'exponential')
+DISTRIBUTION_ARGS_NUMBER = {
+    CONSTANT: 1,
+    UNIFORM: 2,
+    NORMAL: 2,
+    LOGNORMAL: 2,
+    EXPONENTIAL: 1
+}
+DEFAULT_LATENCY = (CONSTANT, (0.1,))
+DEFAULT_STARTUP_LATENCY = (CONSTANT, (0.0,))
+TASK_KEYWORDS = {'name', 'register', 'when', 'loop', 'loop_control', 'with_items', 'with_dict', 'ignore_errors',
+                 'retries', 'delay', 'vars', 'tags', 'become', 'become_user', 'delegate_to', 'changed_when',
+                 'failed_when', 'no_log', 'notify', 'environment', 'args', 'run_once', 'async', 'poll',
+                 'rescue', 'always', 'until', 'with_list', 'with_sequence', 'with_subelements', 'with_nested',
+                 'with_fileglob', 'with_together', 'with_random_choice', 'with_first_found', 'with_indexed_items',
+                 'with_flattened', 'with_lines', 'with_inventory_hostnames', 'with_file'}
+ASYNC_STATUS_MODULE = 'async_status'
+
+
+def parse_latencies(simulated_config):
+    """
+    Parse the latencies of modules from the configuration, every parameter except seed, time_scale and
+    fail_operations is the name of module with value '<distribution>,<arg>[,<arg>]', the arguments are in seconds:
+    constant,<value>; uniform,<min>,<max>; normal,<mean>,<stddev>; lognormal,<median>,<sigma>; exponential,<mean>.
+    The latency of startup is the time of starting Ansible for every playbook, default is the latency of modules
+    which are not set
+    :param simulated_config: dict of simulated executor configuration
+    :return: dict of module: tuple of distribution and tuple of arguments
+    """
+    latencies = {DEFAULT_MODULE: DEFAULT_LATENCY, STARTUP: DEFAULT_STARTUP_LATENCY}
+    for module, value in simulated_config.items():
+        if module in (SEED, TIME_SCALE, FAIL):
+            continue
+        if not isinstance(value, list):
+            value = [value]
+        distribution = value[0].strip()
+        if distribution not in DISTRIBUTIONS:
+            logging.error("Latency of module \'%s\' of simulated executor has unsupported distribution \'%s\', "
+                          "supported distributions are %s" % (module, distribution, ', '.join(DISTRIBUTIONS)))
+            sys.exit(1)
+        try:
+            args = tuple(float(arg) for arg in value[1:])
+        except ValueError:
+            args = ()
+        if len(args) != DISTRIBUTION_ARGS_NUMBER[distribution]:
+            logging.error("Latency of module \'%s\' of simulated executor requires %s numeric arguments of "
+                          "distribution \'%s\'" % (module, DISTRIBUTION_ARGS_NUMBER[distribution], distribution))
+            sys.exit(1)
+        latencies[module] = (distribution, args)
+    return latencies
+
+
+def get_task_module(task):
+    for key in task:
+        if key not in TASK_KEYWORDS:
+            return key
+    return None
+
+
+def get_playbook_tasks(ansible_playbook):
+    """
+    Get the tasks executed by the playbook, the tasks of blocks are executed, the rescue tasks are not
+    :param ansible_playbook: list of Ansible plays
+    :return: list of tuples of module name and task
+    """
+    tasks = []
+
+    def add_tasks(play_tasks):
+        for task in play_tasks:
+            if 'block' in task:
+                add_tasks(task['block'])
+                continue
+            module = get_task_module(task)
+            if module is not None:
+                tasks.append((module, task))
+
+    for play in ansible_playbook:
+        add_tasks(play.get('tasks', []))
+    return tasks
+
+
+def get_playbook_modules(ansible_playbook):
+    return [module for module, _ in get_playbook_tasks(ansible_playbook)]
+
+
+class SimulatedWorkerPool(AnsibleWorkerPool):
+    """
+    The pool which does not run Ansible: every task of playbook sleeps for the latency of its module, the limits of
+    workers, the priorities and the finish messages are the same as for the pool of Ansible processes.
+    The async task does not sleep, async_status task sleeps until the latency of the async task is over.
+    The operations to be failed fail at the end of their playbooks
+    """
+
+    def __init__(self, latencies, time_scale=1.0, seed=None, fail_operations=None):
+        super(SimulatedWorkerPool, self).__init__()
+        self.latencies = latencies
+        self.time_scale = time_scale
+        self.fail_operations = set(fail_operations or [])
+        self.random = Random(seed)
+        self.workers_number = 0
+        # reserved playbook: tuple of startup latency, tasks with latencies and worker id
+        self.job_latencies = {}
+
+    def get_context(self, start_method, preload_modules=None):
+        return None
+
+    def get_latency(self, module):
+        distribution, args = self.latencies.get(module, self.latencies[DEFAULT_MODULE])
+        if distribution == CONSTANT:
+            latency = args[0]
+        elif distribution == UNIFORM:
+            latency = self.random.uniform(*args)
+        elif distribution == NORMAL:
+            latency = self.random.gauss(*args)
+        elif distribution == LOGNORMAL:
+            latency = self.random.lognormvariate(math.log(args[0]), args[1])
+        else:
+            latency = self.random.expovariate(1 / args[0])
+        return max(latency, 0) * self.time_scale
+
+    def start_waiting(self):
+        # NOTE: the latencies are drawn with the lock so they do not depend on threads
+        started_jobs = super(SimulatedWorkerPool, self).start_waiting()
+        for job in started_jobs:
+            self.workers_number += 1
+            startup_latency = self.get_latency(STARTUP)
+            tasks = [(module, task, self.get_latency(module))
+                     for module, task in get_playbook_tasks(job.ansible_playbook)]
+            self.job_latencies[job] = (startup_latency, tasks, self.workers_number)
+        return started_jobs
+
+    def start_job(self, job):
+        with self.lock:
+            startup_latency, tasks, worker_id = self.job_latencies.pop(job)
+        worker = threading.Thread(target=self.run_job, args=(job, startup_latency, tasks, worker_id), daemon=True)
+        with self.lock:
+            self.workers[job] = worker
+        worker.start()
+
+    def terminate_job(self, job):
+        # NOTE: the job is cancelled, it is finished before the next task
+        pass
+
+    def run_job(self, job, startup_latency, tasks, worker_id):
+        time.sleep(startup_latency)
+        finished_job = dict(message=get_finish_message([], job.name, job.op), outputs={}, error=None, tasks=[])
+        async_finished = {}
+        for module, task, latency in tasks:
+            if job.cancelled:
+                finished_job['error'] = 'terminated after the failure of other operation'
+                break
+            task_started = time.time()
+            if task.get('poll') == 0 and 'async' in task:
+                async_finished[task.get('register')] = task_started + latency
+            elif module == ASYNC_STATUS_MODULE:
+                time.sleep(max(async_finished.pop(task.get('register'), task_started) - task_started, 0))
+            else:
+                time.sleep(latency)
+            self.finish_task(job, dict(task=task.get('name') or module, started=task_started, finished=time.time(),
+                                       status='ok'), finished_job)
+        if job.title in self.fail_operations:
+            finished_job['error'] = 'simulated failure'
+        with self.lock:
+            self.workers.pop(job, None)
+        self.finish_job(job, finished_job, worker_id)
+
+
+def get_simulated_worker_pool(simulated_config):
+    """
+    Create the pool of simulated executor from its configuration
+    :param simulated_config: dict of simulated executor configuration
+    :return: SimulatedWorkerPool
+    """
+    seed = simulated_config.get(SEED) or None
+    time_scale = simulated_config.get(TIME_SCALE) or 1.0
+    fail_operations = simulated_config.get(FAIL) or []
+    if not isinstance(fail_operations, list):
+        fail_operations = [fail_operations]
+    try:
+        time_scale = float(time_scale)
+        if seed is not None:
+            seed = int(seed)
+    except ValueError:
+        logging.error("Configuration parameters \'%s\' and \'%s\' of simulated executor must be numbers"
+                      % (SEED, TIME_SCALE))
+        sys.exit(1)
+    return SimulatedWorkerPool(parse_latencies(simulated_config), time_scale=time_scale, seed=seed,
+                               fail_operations=[title.strip() for title in fail_operations])
+
+
+def get_synthetic_template(servers_number):
+    """
+    Generate TOSCA template of independent servers, every server is translated to about 5 operations
+    :param servers_number: number of servers
+    :return: dict of TOSCA template
+    """
+    node_templates = {}
+    for i in range(servers_number):
+        node_templates['server_%s' % i] = {
+            'type': 'tosca.nodes.Compute',
+            'properties': {
+                'public_address': '10.100.%s.%s' % (i // 250, i % 250 + 1),
+                'networks': {'default': {'network_name': 'sandbox_net'}}
+            },
+            'capabilities': {
+                'host': {'properties': {'num_cpus': 1, 'disk_size': '10 GiB', 'mem_size': '1 GiB'}},
+                'endpoint': {'properties': {'protocol': 'tcp', 'port': 22, 'initiator': 'target',
+                                            'ip_address': '0.0.0.0'}},
+                'os': {'properties': {'architecture': 'x86_64', 'type': 'cirros', 'version': '0.4.0'}}
+            }
+        }
+    return {
+        'tosca_definitions_version': 'tosca_simple_yaml_1_0',
+        'topology_template': {'node_templates': node_templates}
+    }
+
+
+def main(args=None):
+    """
+    Benchmark the scheduler of operations: translate the synthetic template and run it with the simulated executor,
+    the limits of workers and the priority of operations are taken from the configuration of Ansible tool
+    """
+    from toscatranslator.common.translator_to_configuration_dsl import translate
+    from toscatranslator.configuration_tools.ansible.timeline import TRACE_FILE_SUFFIX, CSV_FILE_SUFFIX
+
+    parser = argparse.ArgumentParser(prog="clouni-simulate")
+    parser.add_argument('--servers', type=int, default=200,
+                        help='Number of servers in the synthetic template, default 200')
+    parser.add_argument('--provider', default='openstack', help='Cloud provider name')
+    parser.add_argument('--cluster-name', default='simulated', help='Cluster name')
+    parser.add_argument('--timeline', metavar='<prefix>', default=None,
+                        help='Path prefix of Chrome trace and CSV files with the timeline of operations')
+    args = parser.parse_args(args if args is not None else sys.argv[1:])
+
+    template = yaml.dump(get_synthetic_template(args.servers))
+    started = time.time()
+    timeline_files = []
+    if args.timeline is not None:
+        timeline_files = [args.timeline + TRACE_FILE_SUFFIX, args.timeline + CSV_FILE_SUFFIX]
+    try:
+        translate(template, False, args.provider, 'ansible', args.cluster_name, a_file=False, defer_facts=True,
+                  executor='simulated', timeline=args.timeline)
+        print("Simulated deployment of %s servers took %.2f s" % (args.servers, time.time() - started))
+    except SystemExit:
+        # NOTE: the deployment with failed operations exits after the timeline is written, the other errors exit
+        # before, the exit code is kept in both cases
+        print("Simulated deployment of %s servers failed after %.2f s" % (args.servers, time.time() - started))
+        if len(timeline_files) > 0 and all(os.path.isfile(f) and os.path.getmtime(f) >= started
+                                           for f in timeline_files):
+            print("Timeline: %s" % ', '.join(timeline_files))
+        raise
+    if args.timeline is not None:
+        print("Timeline: %s" % ', '.join(timeline_files))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+import csv
+import json
+import os
+
+TIMELINE_FILES = (TRACE_FILE_SUFFIX, CSV_FILE_SUFFIX) = ('_timeline.json', '_timeline.csv')
+CSV_COLUMNS = ['kind', 'node', 'operation', 'task', 'host', 'pid', 'enqueue', 'start', 'finish', 'wait', 'duration',
+               'status']
+MICROSECONDS = 1000000
+
+
+def get_timeline_start(timeline):
+    return min([record['submitted'] for record in timeline], default=0)
+
+
+def get_chrome_trace(timeline):
+    """
+    Get the events of Chrome trace format: every worker is a process, the waiting for worker is shown in the
+    process of scheduler, the tasks are nested in the plays
+    :param timeline: list of records of finished playbooks
+    :return: dict which can be opened in chrome://tracing or Perfetto after dumping to JSON
+    """
+    start = get_timeline_start(timeline)
+    scheduler_pid = os.getpid()
+
+    def timestamp(t):
+        return int((t - start) * MICROSECONDS)
+
+    events = [dict(name='process_name', ph='M', pid=scheduler_pid, tid=0, args=dict(name='scheduler'))]
+    for record in timeline:
+        events.append(dict(name='process_name', ph='M', pid=record['pid'], tid=0,
+                           args=dict(name='worker ' + str(record['pid']))))
+        events.append(dict(name=record['title'], cat='wait', ph='X', pid=scheduler_pid, tid=0,
+                           ts=timestamp(record['submitted']),
+                           dur=timestamp(record['started']) - timestamp(record['submitted'])))
+        events.append(dict(name=record['title'], cat='play', ph='X', pid=record['pid'], tid=0,
+                           ts=timestamp(record['started']),
+                           dur=timestamp(record['finished']) - timestamp(record['started']),
+                           args=dict(host=record['host'], status=record['status'])))
+        for task in record['tasks']:
+            events.append(dict(name=task['name'], cat='task', ph='X', pid=record['pid'], tid=0,
+                               ts=timestamp(task['started']),
+                               dur=timestamp(task['finished']) - timestamp(task['started']),
+                               args=dict(play=record['title'], status=task['status'])))
+    return dict(traceEvents=events, displayTimeUnit='ms')
+
+
+def get_csv_rows(timeline):
+    """
+    Get the flat rows of plays and tasks, time is in seconds from the first enqueued playbook
+    :param timeline: list of records of finished playbooks
+    :return: list of dicts with CSV_COLUMNS keys
+    """
+    start = get_timeline_start(timeline)
+    rows = []
+    for record in sorted(timeline, key=lambda r: r['started']):
+        rows.append(dict(kind='play', node=record['name'], operation=record['op'], task=None, host=record['host'],
+                         pid=record['pid'], enqueue=round(record['submitted'] - start, 3),
+                         start=round(record['started'] - start, 3), finish=round(record['finished'] - start, 3),
+                         wait=round(record['started'] - record['submitted'], 3),
+                         duration=round(record['finished'] - record['started'], 3), status=record['status']))
+        for task in record['tasks']:
+            rows.append(dict(kind='task', node=record['name'], operation=record['op'], task=task['name'],
+                             host=record['host'], pid=record['pid'], enqueue=None,
+                             start=round(task['started'] - start, 3), finish=round(task['finished'] - start, 3),
+                             wait=None, duration=round(task['finished'] - task['started'], 3),
+                             status=task['status']))
+    return rows
+
+
+def export_timeline(timeline, path_prefix):
+    """
+    Write the timeline as Chrome trace JSON and as CSV
+    :param timeline: list of records of finished playbooks
+    :param path_prefix: path to which the suffixes of timeline files are added
+    :return: list of written files
+    """
+    trace_path = path_prefix + TRACE_FILE_SUFFIX
+    with open(trace_path, 'w') as trace_file:
+        json.dump(get_chrome_trace(timeline), trace_file)
+    csv_path = path_prefix + CSV_FILE_SUFFIX
+    with open(csv_path, 'w', newline='') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        writer.writerows(get_csv_rows(timeline))
+    return [trace_path, csv_path]
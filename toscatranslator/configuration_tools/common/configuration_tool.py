@@ -25,7 +25,8 @@ class ConfigurationTool(object):
         self.tool_config = ConfigurationToolConfiguration(self.TOOL_NAME)
 
     def to_dsl(self, provider, nodes_relationships_queue, cluster_name, is_delete, artifacts=None,
-               target_directory=None, inputs=None, outputs=None, extra=None):
+               target_directory=None, inputs=None, outputs=None, extra=None, fact_resolver=None, resume=False,
+               timeline=None, executor=None, changed_templates=None):
         """
         Generate scenarios for configuration tool to execute
         :param provider: provider type key name
@@ -35,10 +36,25 @@ class ConfigurationTool(object):
         :param artifacts: list of artifacts that are mentioned in template
         :param target_directory: directory where copy artifacts
         :param extra: extra parameters for configuration tool scenarios
+        :param fact_resolver: FactResolver with the fact lookups deferred to the deployment
+        :param resume: if the operations finished by the previous deployment of cluster are skipped
+        :param timeline: path prefix of files with the timeline of executed operations
+        :param executor: backend which executes the operations, the configured backend is used by default
+        :param changed_templates: names of provider templates changed since the previous deployment of cluster, if
+        it is set only their operations and the operations depending on them are run
         :return: string with dsl scenario which is used to deploy
         """
         raise NotImplementedError()
 
+    def get_operations_durations(self, operations_graph, is_delete):
+        """
+        Get the expected durations of operations for the analysis of graph of operations
+        :param operations_graph: dict of operation: set of operations on which it depends
+        :param is_delete: if the operations delete cluster
+        :return: dict of operation: duration in seconds, the operations without known duration are missing
+        """
+        return {}
+
     def create_artifact(self, filename, data):
         """
 
@@ -1,4 +1,4 @@
-import yaml
+import yaml, logging, sys
 
 from toscatranslator.configuration_tools.common.configuration_tool import ConfigurationTool
 from toscatranslator.common.tosca_reserved_keys import KUBERNETES, PROPERTIES
@@ -17,7 +17,14 @@ class KubernetesConfigurationTool(ConfigurationTool):
         self.provider = provider
 
     def to_dsl(self, nodes_relationships_queue, reversed_nodes_relationships_queue, cluster_name, is_delete, artifacts=None,
-               target_directory=None, inputs=None, outputs=None, extra=None, debug=False):
+               target_directory=None, inputs=None, outputs=None, extra=None, debug=False, fact_resolver=None,
+               resume=False, timeline=None, executor=None, changed_templates=None):
+        if fact_resolver is not None and fact_resolver.has_deferred_lookups():
+            logging.error("Deferred fact lookups are not supported by configuration tool %s" % self.TOOL_NAME)
+            sys.exit(1)
+        if resume:
+            logging.error("Resuming of deployment is not supported by configuration tool %s" % self.TOOL_NAME)
+            sys.exit(1)
         if not is_delete:
             return self.to_dsl_for_create(self.provider, nodes_relationships_queue, artifacts, target_directory,
                                           cluster_name, extra)
@@ -0,0 +1,214 @@
+from collections import OrderedDict
+
+from toscaparser.utils.yamlparser import load_yaml
+
+from toscatranslator.common import utils
+from toscatranslator.common.tosca_reserved_keys import *
+
+import os, copy, hashlib, json, logging, sys, tempfile, threading
+
+SNAPSHOT_FORMAT_VERSION = '2'
+SNAPSHOT_DIRECTORY = 'definitions'
+SNAPSHOT_EXTENSION = '.json'
+DEFAULT_SNAPSHOTS_SIZE = 8
+TYPE_SECTIONS = tuple(k for k in SERVICE_TEMPLATE_KEYS if k != IMPORTS)
+
+
+def get_full_definition(definitions, def_type, ready_set, software_types):
+    """
+    Update the definition of the type with definitions of its parents, the result is saved to definitions
+    :param definitions: dict of type definitions
+    :param def_type: name of type
+    :param ready_set: set of types which definitions are already full
+    :param software_types: set of types derived from SoftwareComponent, is updated
+    :return: full definition
+    """
+    definition = definitions[def_type]
+    if def_type in ready_set:
+        return definition
+
+    (_, _, def_type_short) = utils.tosca_type_parse(def_type)
+    is_software_type = def_type_short == 'SoftwareComponent'
+    parent_def_name = definition.get(DERIVED_FROM, None)
+    if parent_def_name is not None:
+        if def_type == parent_def_name:
+            logging.critical("Invalid type \'%s\' is derived from itself" % def_type)
+            sys.exit(1)
+        parent_definition = get_full_definition(definitions, parent_def_name, ready_set, software_types)
+        is_software_type = is_software_type or parent_def_name in software_types
+        definition = utils.deep_update_dict(copy.deepcopy(parent_definition), definition)
+    if is_software_type:
+        software_types.add(def_type)
+    definitions[def_type] = definition
+    ready_set.add(def_type)
+    return definition
+
+
+class DefinitionsSnapshot(object):
+    """
+    Type definitions from TOSCA definition files, parsed and merged with parents once for the set of files
+    """
+
+    def __init__(self, definition_files):
+        self.definition_files = list(definition_files)
+        self.type_sections = {}
+        self.file_definitions = {}
+        self.raw_definitions = {}
+        for definition_file in self.definition_files:
+            file_tpl = load_yaml(definition_file) or {}
+            file_definitions = {}
+            for section in TYPE_SECTIONS:
+                section_definitions = file_tpl.get(section)
+                if section_definitions:
+                    self.type_sections.setdefault(section, {}).update(section_definitions)
+                    file_definitions.update(section_definitions)
+            self.file_definitions[definition_file] = file_definitions
+            self.raw_definitions.update(file_definitions)
+
+        self.definitions = copy.deepcopy(self.raw_definitions)
+        self.software_types = set()
+        ready_definitions = set()
+        for def_type in self.definitions.keys():
+            get_full_definition(self.definitions, def_type, ready_definitions, self.software_types)
+
+    def to_dict(self):
+        return {
+            'definition_files': self.definition_files,
+            'type_sections': self.type_sections,
+            'file_definitions': self.file_definitions,
+            'raw_definitions': self.raw_definitions,
+            'definitions': self.definitions,
+            'software_types': sorted(self.software_types)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        snapshot = cls.__new__(cls)
+        snapshot.definition_files = data['definition_files']
+        snapshot.type_sections = data['type_sections']
+        snapshot.file_definitions = data['file_definitions']
+        snapshot.raw_definitions = data['raw_definitions']
+        snapshot.definitions = data['definitions']
+        snapshot.software_types = set(data['software_types'])
+        return snapshot
+
+    def is_actual(self, definitions, def_type, actual_types):
+        """
+        Check if the full definition of the type from snapshot can be used for definitions
+        :param definitions: raw definitions of template types
+        :param def_type: name of type
+        :param actual_types: dict of already checked types, is updated
+        :return: boolean
+        """
+        if def_type in actual_types:
+            return actual_types[def_type]
+        actual_types[def_type] = False
+        definition = definitions.get(def_type)
+        if definition is None or self.raw_definitions.get(def_type) != definition:
+            return False
+        parent_def_name = definition.get(DERIVED_FROM, None)
+        r = parent_def_name is None or parent_def_name == def_type or \
+            self.is_actual(definitions, parent_def_name, actual_types)
+        actual_types[def_type] = r
+        return r
+
+
+class DefinitionsSnapshotStorage(object):
+    """
+    Snapshots kept in LRU cache of the process and as JSON files in the private temporary directory of clouni.
+    The key of snapshot is the hash of paths and content of definition files, so the changed files are parsed again
+    """
+
+    def __init__(self, directory=None, max_size=DEFAULT_SNAPSHOTS_SIZE):
+        if directory is None:
+            directory = os.path.join(utils.get_tmp_clouni_dir(), SNAPSHOT_DIRECTORY)
+        self.directory = directory
+        self.max_size = max_size
+        self._snapshots = OrderedDict()
+        self._lock = threading.Lock()
+
+    def snapshot_key(self, definition_files):
+        files_hash = hashlib.sha256(SNAPSHOT_FORMAT_VERSION.encode())
+        content_hash = hashlib.sha256()
+        for definition_file in definition_files:
+            files_hash.update(os.path.abspath(definition_file).encode())
+            with open(definition_file, 'rb') as file_obj:
+                content_hash.update(file_obj.read())
+        return files_hash.hexdigest()[:16], content_hash.hexdigest()
+
+    def snapshot_filename(self, files_key, content_key):
+        return os.path.join(self.directory, '_'.join([files_key, content_key]) + SNAPSHOT_EXTENSION)
+
+    def load(self, filename):
+        if not utils.make_private_dir(self.directory):
+            return None
+        try:
+            with open(filename, 'r') as file_obj:
+                return DefinitionsSnapshot.from_dict(json.load(file_obj))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning("Definitions snapshot \'%s\' can not be loaded and will be rebuilt: %s" % (filename, e))
+            return None
+
+    def save(self, files_key, filename, snapshot):
+        data = snapshot.to_dict()
+        try:
+            serialized_data = json.dumps(data)
+        except (TypeError, ValueError) as e:
+            logging.info("Definitions snapshot can not be saved as JSON and is kept in memory only: %s" % e)
+            return
+        # NOTE: YAML values like dates or not string keys are changed by JSON, such snapshots are not saved
+        if json.loads(serialized_data) != data:
+            logging.info("Definitions snapshot can not be saved as JSON and is kept in memory only")
+            return
+        if not utils.make_private_dir(self.directory):
+            return
+        try:
+            file_descriptor, tmp_filename = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(file_descriptor, 'w') as file_obj:
+                file_obj.write(serialized_data)
+            os.replace(tmp_filename, filename)
+            # NOTE: snapshots of previous versions of the same files are not used anymore
+            for old_filename in os.listdir(self.directory):
+                old_filename = os.path.join(self.directory, old_filename)
+                if os.path.basename(old_filename).startswith(files_key + '_') and old_filename != filename:
+                    os.remove(old_filename)
+        except OSError as e:
+            logging.warning("Definitions snapshot \'%s\' can not be saved: %s" % (filename, e))
+
+    def get(self, definition_files):
+        """
+        Get the snapshot of the definition files
+        :param definition_files: list of TOSCA definition files
+        :return: DefinitionsSnapshot, the same object is returned for the same files, it must not be changed
+        """
+        files_key, content_key = self.snapshot_key(definition_files)
+        filename = self.snapshot_filename(files_key, content_key)
+        with self._lock:
+            snapshot = self._snapshots.get(filename)
+            if snapshot is not None:
+                self._snapshots.move_to_end(filename)
+        if snapshot is None:
+            snapshot = self.load(filename)
+            if snapshot is None:
+                logging.info("Building definitions snapshot of the files: %s" % ', '.join(definition_files))
+                snapshot = DefinitionsSnapshot(definition_files)
+                self.save(files_key, filename, snapshot)
+            with self._lock:
+                snapshot = self._snapshots.setdefault(filename, snapshot)
+                self._snapshots.move_to_end(filename)
+                while len(self._snapshots) > self.max_size:
+                    self._snapshots.popitem(last=False)
+        return snapshot
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+
+
+DEFINITIONS_SNAPSHOTS = DefinitionsSnapshotStorage()
+
+
+def get_definitions_snapshot(definition_files):
+    return DEFINITIONS_SNAPSHOTS.get(definition_files)
@@ -0,0 +1,180 @@
+from toscatranslator.common import utils
+from toscatranslator.common.tosca_reserved_keys import ANSIBLE
+from toscatranslator.providers.common.provider_configuration import ProviderConfiguration
+
+import os, hashlib, json, logging, sys, tempfile, time
+
+FACT_CACHE = 'fact_cache'
+FACT_CACHE_DIRECTORY = 'facts'
+FACT_CACHE_EXTENSION = '.json'
+FACT_CACHE_PARAMS = (IDENTITY_VARIABLES, IDENTITY_FILES, DEFAULT_TTL, TTL, MAX_ENTRIES) = \
+    ('identity_variables', 'identity_files', 'default_ttl', 'ttl', 'max_entries')
+DEFAULT_MAX_ENTRIES = 256
+# NOTE: keys of the module result which are not saved, invocation contains the arguments of the module
+SKIPPED_RESULT_KEYS = ('invocation', )
+
+
+def get_list_param(value):
+    if not value:
+        return []
+    if not isinstance(value, list):
+        value = [value]
+    return [v.strip() for v in value]
+
+
+def get_file_digest(filename):
+    """
+    Get the hash of the file content
+    :param filename: path to file, environment variables and ~ are expanded
+    :return: hex digest or None if the file does not exist
+    """
+    filename = os.path.expanduser(os.path.expandvars(filename))
+    try:
+        with open(filename, 'rb') as file_obj:
+            return hashlib.sha256(file_obj.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def get_int_param(param, value, default):
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logging.error("Provider configuration parameter \'%s.%s: %s\' has unsupported value \'%s\'"
+                      % (ANSIBLE, FACT_CACHE, param, value))
+        sys.exit(1)
+
+
+class FactCache(object):
+    """
+    Results of facts sources of the provider saved to the private temporary directory of clouni. The results are
+    separated by the cloud identity: the values of environment variables with credentials and the content of files
+    with clouds and endpoints from the provider configuration, only the hash of them is kept. If none of the variables
+    and files is set, the cloud is unknown and the results are not saved
+    """
+
+    def __init__(self, provider, directory=None):
+        self.provider = provider
+        provider_config = ProviderConfiguration(provider)
+        cache_config = provider_config.get_subsection(ANSIBLE, FACT_CACHE) or {}
+
+        self.default_ttl = get_int_param(DEFAULT_TTL, cache_config.get(DEFAULT_TTL), 0)
+        ttl_config = cache_config.get(TTL) or {}
+        if not isinstance(ttl_config, dict):
+            logging.error("Provider configuration parameter \'%s.%s: %s\' has unsupported value \'%s\'"
+                          % (ANSIBLE, FACT_CACHE, TTL, ttl_config))
+            sys.exit(1)
+        self.ttl = {}
+        for source, ttl in ttl_config.items():
+            self.ttl[source] = get_int_param(TTL, ttl, self.default_ttl)
+        self.max_entries = get_int_param(MAX_ENTRIES, cache_config.get(MAX_ENTRIES),
+                                         DEFAULT_MAX_ENTRIES)
+
+        identity_variables = dict((v, os.getenv(v)) for v in get_list_param(cache_config.get(IDENTITY_VARIABLES)))
+        identity_files = dict((f, get_file_digest(f)) for f in get_list_param(cache_config.get(IDENTITY_FILES)))
+        self.identity = None
+        if any(v is not None for v in identity_variables.values()) or \
+                any(d is not None for d in identity_files.values()):
+            self.identity = hashlib.sha256(json.dumps([provider, identity_variables, identity_files],
+                                                      sort_keys=True).encode()).hexdigest()
+        else:
+            logging.info("Fact cache of provider %s is not used, the cloud can not be identified by the environment "
+                         "variables and files: %s" % (provider, ', '.join(list(identity_variables) +
+                                                                         list(identity_files))))
+
+        if directory is None:
+            directory = os.path.join(utils.get_tmp_clouni_dir(), FACT_CACHE_DIRECTORY, provider)
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def get_ttl(self, source):
+        if self.identity is None:
+            return 0
+        return self.ttl.get(source, self.default_ttl)
+
+    def get_filename(self, source, parameters):
+        key = hashlib.sha256(json.dumps([self.identity, source, parameters], sort_keys=True, default=str).encode())
+        return os.path.join(self.directory, key.hexdigest() + FACT_CACHE_EXTENSION)
+
+    def get(self, source, parameters):
+        """
+        Get the saved result of the facts source
+        :param source: name of facts module
+        :param parameters: parameters of facts module
+        :return: result or None if it is not saved or expired
+        """
+        ttl = self.get_ttl(source)
+        if ttl <= 0 or not utils.make_private_dir(self.directory):
+            return None
+        filename = self.get_filename(source, parameters)
+        try:
+            with open(filename, 'r') as file_obj:
+                entry = json.load(file_obj)
+        except FileNotFoundError:
+            entry = None
+        except (OSError, ValueError) as e:
+            logging.warning("Fact cache entry \'%s\' can not be loaded: %s" % (filename, e))
+            entry = None
+        if entry is None or time.time() - entry.get('created', 0) >= ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        logging.debug("Result of facts source %s was taken from the fact cache" % source)
+        return entry.get('value')
+
+    def put(self, source, parameters, value):
+        """
+        Save the result of the facts source if its TTL is set
+        :param source: name of facts module
+        :param parameters: parameters of facts module
+        :param value: result of facts module
+        :return: None
+        """
+        if self.get_ttl(source) <= 0 or not utils.make_private_dir(self.directory):
+            return
+        value = dict((k, v) for k, v in value.items()
+                     if k not in SKIPPED_RESULT_KEYS and not k.startswith('_ansible'))
+        filename = self.get_filename(source, parameters)
+        try:
+            file_descriptor, tmp_filename = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(file_descriptor, 'w') as file_obj:
+                json.dump({'created': time.time(), 'source': source, 'value': value}, file_obj, default=str)
+            os.replace(tmp_filename, filename)
+        except OSError as e:
+            logging.warning("Fact cache entry \'%s\' can not be saved: %s" % (filename, e))
+            return
+        self.remove_oldest_entries()
+
+    def remove_oldest_entries(self):
+        try:
+            filenames = [os.path.join(self.directory, f) for f in os.listdir(self.directory)
+                         if f.endswith(FACT_CACHE_EXTENSION)]
+            if len(filenames) <= self.max_entries:
+                return
+            filenames.sort(key=os.path.getmtime)
+            for filename in filenames[:len(filenames) - self.max_entries]:
+                os.remove(filename)
+        except OSError as e:
+            logging.warning("Fact cache \'%s\' can not be cleaned: %s" % (self.directory, e))
+
+    def invalidate(self):
+        """
+        Remove all saved results of the provider
+        :return: None
+        """
+        if not os.path.isdir(self.directory):
+            return
+        for filename in os.listdir(self.directory):
+            if filename.endswith(FACT_CACHE_EXTENSION):
+                os.remove(os.path.join(self.directory, filename))
+        logging.info("Fact cache of provider %s was invalidated" % self.provider)
+
+    def log_statistics(self):
+        total = self.hits + self.misses
+        if total == 0:
+            return
+        logging.info("Fact cache of provider %s: %s hits, %s misses, hit rate %.0f%%"
+                     % (self.provider, self.hits, self.misses, 100.0 * self.hits / total))
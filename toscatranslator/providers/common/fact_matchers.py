@@ -0,0 +1,215 @@
+from bisect import bisect_right
+
+import ipaddress, json
+
+EQUALS = 'equals'
+CONTAINS = 'contains'
+IP_CONTAINS = 'ip_contains'
+
+
+class FactMatchError(Exception):
+    """
+    The condition can not be checked, the same condition fails in the artifact of Ansible
+    """
+    pass
+
+
+def get_hashable(value):
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return json.dumps(value, sort_keys=True, default=str)
+
+
+def get_fact_value(fact, key, default=None):
+    """
+    Get the parameter of fact, the missing parameter is default if it is set
+    """
+    if not isinstance(fact, dict) or key not in fact and default is None:
+        raise FactMatchError("Fact has no parameter \'%s\'" % key)
+    return fact.get(key, default)
+
+
+def as_list(value):
+    """
+    Make list from argument, only values are taken if the argument is dict
+    """
+    if isinstance(value, dict):
+        return list(value.values())
+    if not isinstance(value, list):
+        return [value]
+    return value
+
+
+def as_ip_list(value):
+    if not isinstance(value, list):
+        return [value]
+    return value
+
+
+def ip_to_int(value):
+    """
+    Integer value of the IP address like the filter ipaddr('int'), invalid address is False
+    """
+    if value is None or isinstance(value, bool):
+        return 0
+    try:
+        return int(ipaddress.ip_address(value))
+    except ValueError:
+        pass
+    try:
+        return int(ipaddress.ip_interface(value).ip)
+    except ValueError:
+        return 0
+
+
+class EqualsIndex(object):
+    """
+    Condition equals: every argument key is equal to the argument value. Facts are indexed by the values
+    of the keys which are used in arguments
+    """
+
+    def __init__(self, facts):
+        self.facts = facts
+        self._indexes = {}
+
+    def get_index(self, keys):
+        index = self._indexes.get(keys)
+        if index is None:
+            index = {}
+            for i in range(len(self.facts)):
+                value = tuple(get_hashable(get_fact_value(self.facts[i], k)) for k in keys)
+                index.setdefault(value, []).append(i)
+            self._indexes[keys] = index
+        return index
+
+    def match(self, args):
+        if isinstance(args, list):
+            if len(args) < 2:
+                raise FactMatchError("Condition %s requires the key and the value" % EQUALS)
+            args = {args[0]: args[1]}
+        if not isinstance(args, dict):
+            raise FactMatchError("Condition %s has unsupported arguments %s" % (EQUALS, args))
+        keys = tuple(sorted(args.keys(), key=str))
+        value = tuple(get_hashable(args[k]) for k in keys)
+        return self.get_index(keys).get(value, [])
+
+
+class ContainsIndex(object):
+    """
+    Condition contains: every value of the second argument is a substring of joined values of the parameters
+    of the first argument. Joined lowercase values are computed once for the parameters
+    """
+
+    def __init__(self, facts):
+        self.facts = facts
+        self._joined_values = {}
+
+    def get_joined_values(self, keys):
+        joined_values = self._joined_values.get(keys)
+        if joined_values is None:
+            joined_values = []
+            for fact in self.facts:
+                if len(keys) == 0:
+                    raise FactMatchError("Condition %s requires the parameters to search in" % CONTAINS)
+                joined_values.append(''.join(str(get_fact_value(fact, k)).lower() for k in keys))
+            self._joined_values[keys] = joined_values
+        return joined_values
+
+    def match(self, args):
+        if not isinstance(args, list) or len(args) < 2:
+            raise FactMatchError("Condition %s requires two arguments" % CONTAINS)
+        keys = tuple(as_list(args[0]))
+        values = [str(v).lower() for v in as_list(args[1])]
+        joined_values = self.get_joined_values(keys)
+        r = []
+        for i in range(len(joined_values)):
+            if all(v in joined_values[i] for v in values):
+                r.append(i)
+        return r
+
+
+class IpRangeIndex(object):
+    """
+    Condition ip_contains: every address is in every range of IP addresses of the fact, the fact without ranges
+    matches any address. The ranges of one fact are intersected into one interval, intervals are sorted by the start
+    to find the candidates with bisect
+    """
+
+    def __init__(self, facts):
+        self.facts = facts
+        self._intervals = {}
+
+    def get_intervals(self, param_start, param_end):
+        key = (param_start, param_end)
+        intervals = self._intervals.get(key)
+        if intervals is None:
+            unbounded = []
+            bounded = []
+            for i in range(len(self.facts)):
+                starts = as_ip_list(get_fact_value(self.facts[i], param_start, default=[]))
+                ends = as_ip_list(get_fact_value(self.facts[i], param_end, default=[]))
+                pairs = list(zip(starts, ends))
+                if len(pairs) == 0:
+                    unbounded.append(i)
+                    continue
+                bounded.append((max(ip_to_int(s) for s, _ in pairs), min(ip_to_int(e) for _, e in pairs), i))
+            bounded.sort()
+            intervals = (unbounded, bounded, [b[0] for b in bounded])
+            self._intervals[key] = intervals
+        return intervals
+
+    def match(self, args):
+        if not isinstance(args, list) or len(args) < 3:
+            raise FactMatchError("Condition %s requires three arguments" % IP_CONTAINS)
+        param_start, param_end, addresses = args[0], args[1], args[2]
+        if not isinstance(addresses, list):
+            addresses = [addresses]
+        addresses = [ip_to_int(a) for a in addresses]
+        unbounded, bounded, starts = self.get_intervals(param_start, param_end)
+        r = set(unbounded)
+        if len(addresses) == 0:
+            r.update(b[2] for b in bounded)
+            return sorted(r)
+        candidates = None
+        for address in addresses:
+            matched = set(b[2] for b in bounded[:bisect_right(starts, address)] if b[1] >= address)
+            candidates = matched if candidates is None else candidates & matched
+        r.update(candidates)
+        return sorted(r)
+
+
+MATCHERS = {
+    EQUALS: EqualsIndex,
+    CONTAINS: ContainsIndex,
+    IP_CONTAINS: IpRangeIndex
+}
+
+
+class FactMatcher(object):
+    """
+    Indexes of facts built once for the same facts and condition
+    """
+
+    def __init__(self):
+        self._indexes = {}
+
+    def match(self, condition, facts, args, facts_key=None):
+        """
+        Find the facts matching the condition
+        :param condition: name of condition, one of MATCHERS
+        :param facts: list of objects
+        :param args: arguments of condition
+        :param facts_key: key of the source of facts, the facts with the same key must be the same, the index is kept
+        for the same list of facts if it is not set
+        :return: list of matched objects in the order of facts
+        """
+        if not isinstance(facts, list):
+            raise FactMatchError("Facts must be the list, got %s" % type(facts).__name__)
+        key = (condition, facts_key if facts_key is not None else id(facts))
+        index = self._indexes.get(key)
+        if index is None or facts_key is None and index.facts is not facts or len(index.facts) != len(facts):
+            index = MATCHERS[condition](facts)
+            self._indexes[key] = index
+        return [facts[i] for i in index.match(args)]
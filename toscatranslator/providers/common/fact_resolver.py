@@ -0,0 +1,538 @@
+from multiprocessing import Queue
+
+from distutils.dir_util import copy_tree
+
+from toscatranslator.common import utils
+from toscatranslator.common.tosca_reserved_keys import *
+from toscatranslator.configuration_tools.combined.combine_configuration_tools import get_configuration_tool_class
+from toscatranslator.providers.common.fact_cache import FactCache, FACT_CACHE_DIRECTORY
+from toscatranslator.providers.common.fact_matchers import FactMatcher, FactMatchError, MATCHERS
+
+import os, copy, json, logging, sys
+
+SEPARATOR = '.'
+SET_FACT_SOURCE = "set_fact"
+IMPORT_TASKS_MODULE = "include"
+NOT_FOUND = 'not_found'
+FACT_PLACEHOLDER = '__clouni_fact_%s__'
+LOOKUP_TASK_NAME = 'clouni_fact_lookup_%s'
+SHARED_FACTS_VARIABLE = 'clouni_facts_%s'
+DEFERRED_FACT_VARIABLE = 'clouni_fact_%s'
+RECORDED_FACT_PLACEHOLDER = '__clouni_recorded_fact_%s__'
+# NOTE: sources which are executed as is in every lookup, the other first tasks of lookups are gathering facts
+NOT_SHARED_SOURCES = (SET_FACT_SOURCE, 'debug', IMPORT_TASKS_MODULE)
+MAX_RESOLUTION_PASSES = 10
+CONDITION_ARTIFACT = 'artifacts/%s.yaml'
+INPUT_FACTS = 'input_facts'
+INPUT_ARGS = 'input_args'
+
+
+def run_tasks(configuration_class, tasks, cluster_name):
+    """
+    Run the tasks as the playbook on localhost and wait for the results
+    :param configuration_class: instance of configuration tool
+    :param tasks: list of Ansible tasks
+    :param cluster_name: name of cluster
+    :return: list of task results
+    """
+    q = Queue()
+    playbook = {
+        'hosts': 'localhost',
+        'tasks': tasks
+    }
+
+    os.makedirs(os.path.join(utils.get_tmp_clouni_dir(), cluster_name, configuration_class.initial_artifacts_directory), exist_ok=True)
+    copy_tree(utils.get_project_root_path() + '/toscatranslator/configuration_tools/ansible/artifacts',
+              os.path.join(utils.get_tmp_clouni_dir(), cluster_name, configuration_class.initial_artifacts_directory))
+    configuration_class.parallel_run([playbook], 'artifacts', 'artifacts', q, cluster_name)
+
+    # there is such a problem that if runner cotea was launched in the current process, then all subsequent launches
+    # of other playbooks from this process are impossible because the initial playbook will be launched, and
+    # even if this process is forked, the effect remains so that something inside cotea
+    # is preserved in the context of the process
+    return q.get()
+
+
+def is_failed_result(result):
+    if result.is_failed or result.is_unreachable:
+        logging.error("Task %s has failed because of exception: \n%s" %
+                      (result.task_name, result.result.get('exception', '(Unknown reason)')))
+        return True
+    return False
+
+
+def is_matched_result(result):
+    return 'results' in result.result and len(result.result['results']) > 0 and 'ansible_facts' in \
+        result.result['results'][0] and 'matched_object' in result.result['results'][0]['ansible_facts']
+
+
+def get_matched_value(result, target_parameter):
+    return result.result['results'][0]['ansible_facts']['matched_object'][target_parameter.split(SEPARATOR)[-1]]
+
+
+class FactLookup(object):
+    """
+    Tasks which find the object among the facts and the parameter of the object to be returned
+    """
+    __slots__ = ('number', 'key', 'tasks', 'provider', 'target_parameter', 'condition', 'placeholder', 'is_deferred')
+
+    def __init__(self, number, key, tasks, provider, target_parameter, condition=None, is_deferred=False):
+        self.number = number
+        self.key = key
+        self.tasks = tasks
+        self.provider = provider
+        self.target_parameter = target_parameter
+        self.condition = condition
+        self.placeholder = FACT_PLACEHOLDER % number
+        self.is_deferred = is_deferred
+
+    @property
+    def variable(self):
+        return DEFERRED_FACT_VARIABLE % self.number
+
+    @property
+    def is_matched_in_python(self):
+        return not self.is_deferred and self.condition in MATCHERS and self.condition_task_index is not None
+
+    @property
+    def condition_task_index(self):
+        for i in range(len(self.tasks)):
+            if self.tasks[i].get(SOURCE) == IMPORT_TASKS_MODULE and \
+                    self.tasks[i].get(PARAMETERS) == CONDITION_ARTIFACT % self.condition:
+                return i
+        return None
+
+    @property
+    def facts_key(self):
+        """
+        Key of the facts checked by the condition in python: the tasks gathering the facts without the arguments of
+        condition, the lookups with the same key check the same facts
+        """
+        artifacts = [a for a in self.get_artifacts() if not (a.get(SOURCE) == SET_FACT_SOURCE and
+                                                             list(a.get(PARAMETERS) or {}) == [INPUT_ARGS])]
+        return json.dumps([self.provider, artifacts], sort_keys=True, default=str)
+
+    def get_artifacts(self):
+        """
+        Get the artifacts of the lookup, the artifacts of condition are dropped if it is checked in python
+        :return: list of artifacts
+        """
+        if self.is_matched_in_python:
+            return copy.deepcopy(self.tasks[:self.condition_task_index])
+        return copy.deepcopy(self.tasks)
+
+
+def replace_placeholders(data, placeholders):
+    """
+    Replace the placeholders in all strings of data
+    :param data: dict, list, set or value
+    :param placeholders: dict of values by placeholders
+    :return: data with values
+    """
+    if len(placeholders) == 0:
+        return data
+    if isinstance(data, str):
+        for placeholder, value in placeholders.items():
+            if data == placeholder:
+                return value
+            if placeholder in data:
+                data = data.replace(placeholder, str(value))
+        return data
+    if isinstance(data, dict):
+        return dict((replace_placeholders(k, placeholders), replace_placeholders(v, placeholders))
+                    for k, v in data.items())
+    if isinstance(data, (list, set, tuple)):
+        return type(data)(replace_placeholders(i, placeholders) for i in data)
+    return data
+
+
+class FactRecorder(object):
+    """
+    Fact lookups of one template translated in the worker process. The values known by the resolver of the parent
+    process are returned, the other lookups are recorded to be passed to the resolver in the order of templates.
+    If record_known_values is set, all the lookups are recorded, so the result of translation can be replayed later
+    """
+
+    def __init__(self, fact_resolver, record_known_values=False):
+        self.is_delete = fact_resolver.is_delete
+        self.values = {} if record_known_values else fact_resolver.values
+        self.recorded = []
+        self._placeholders = {}
+
+    def lookup(self, tasks, provider, target_parameter, condition=None):
+        if self.is_delete:
+            return None
+        key = json.dumps([provider, target_parameter, tasks], sort_keys=True, default=str)
+        if key in self.values:
+            return self.values[key]
+        placeholder = self._placeholders.get(key)
+        if placeholder is None:
+            placeholder = RECORDED_FACT_PLACEHOLDER % len(self.recorded)
+            self._placeholders[key] = placeholder
+            self.recorded.append((placeholder, copy.deepcopy(tasks), provider, target_parameter, condition))
+        return placeholder
+
+    @staticmethod
+    def replay(recorded, fact_resolver):
+        """
+        Pass the recorded lookups to the resolver
+        :param recorded: list of lookups recorded by FactRecorder
+        :param fact_resolver: FactResolver
+        :return: dict of values returned by the resolver by the recorded placeholders
+        """
+        placeholders = {}
+        for placeholder, tasks, provider, target_parameter, condition in recorded:
+            tasks = replace_placeholders(tasks, placeholders)
+            placeholders[placeholder] = fact_resolver.lookup(tasks, provider, target_parameter, condition=condition)
+        return placeholders
+
+
+class FactResolver(object):
+    """
+    Fact lookups of the translation gathered from every node and executed together as one playbook per provider.
+    The facts sources are called once for all the lookups with the same source and parameters.
+    If the facts are deferred, nothing is executed at translation, the lookups return the variables which are set by
+    the tasks added to the deploying playbook
+    """
+
+    def __init__(self, is_delete, cluster_name, refresh_facts=False, defer_facts=False):
+        self.is_delete = is_delete
+        self.cluster_name = cluster_name
+        self.refresh_facts = refresh_facts
+        self.defer_facts = defer_facts
+        self.deferred_artifacts = []
+        self.fact_caches = {}
+        self.lookups = {}
+        self.placeholders = {}
+        self.values = {}
+        self.pending = []
+        self.passes = 0
+        self.fact_matcher = FactMatcher()
+
+    def lookup(self, tasks, provider, target_parameter, condition=None):
+        """
+        Get the value found with the fact lookup, the lookup which was not executed yet is saved to be executed
+        on the next resolve
+        :param tasks: list of artifacts which set matched_object
+        :param provider: name of provider
+        :param target_parameter: parameter of matched object to be returned
+        :param condition: name of condition artifact included by tasks, known conditions are checked in python
+        :return: value, placeholder if the lookup is not executed, reference to the variable if the lookup is deferred
+        or None if the templates are for deletion
+        """
+        if self.is_delete:
+            return None
+        key = json.dumps([provider, target_parameter, tasks], sort_keys=True, default=str)
+        fact_lookup = self.lookups.get(key)
+        if fact_lookup is None:
+            fact_lookup = FactLookup(len(self.lookups), key, copy.deepcopy(tasks), provider, target_parameter,
+                                     condition=condition, is_deferred=self.defer_facts)
+            self.lookups[key] = fact_lookup
+            self.placeholders[fact_lookup.placeholder] = fact_lookup
+            if fact_lookup.is_deferred:
+                self.values[key] = "\\{\\{ " + fact_lookup.variable + " \\}\\}"
+            else:
+                self.pending.append(fact_lookup)
+        return self.values.get(key, fact_lookup.placeholder)
+
+    def get_value(self, value):
+        """
+        Replace the placeholder returned by lookup with the value found
+        :param value: value returned by lookup
+        :return: value
+        """
+        if isinstance(value, str) and value in self.placeholders:
+            return self.values.get(self.placeholders[value].key, value)
+        return value
+
+    def resolve(self):
+        """
+        Execute all the pending lookups
+        :return: True if any lookup was executed
+        """
+        if len(self.pending) == 0:
+            return False
+        self.passes += 1
+        if self.passes > MAX_RESOLUTION_PASSES:
+            logging.error("Fact lookups are not resolved after %s executions, the last lookups: %s"
+                          % (MAX_RESOLUTION_PASSES, json.dumps([l.tasks for l in self.pending], default=str)))
+            sys.exit(1)
+
+        providers = []
+        for fact_lookup in self.pending:
+            if fact_lookup.provider not in providers:
+                providers.append(fact_lookup.provider)
+        for provider in providers:
+            lookups = [l for l in self.pending if l.provider == provider]
+            logging.info("Executing %s fact lookups for provider %s in one playbook" % (len(lookups), provider))
+            self.values.update(self.run_lookups(provider, lookups))
+        self.pending = []
+        return True
+
+    def defer_artifacts(self, artifacts, provider):
+        """
+        Save the artifacts which must be executed at translation to execute them with the deferred lookups
+        :param artifacts: list of artifacts
+        :param provider: name of provider
+        :return: None
+        """
+        if self.is_delete:
+            return
+        for artifact in artifacts:
+            self.deferred_artifacts.append((provider, copy.deepcopy(artifact)))
+
+    def has_deferred_lookups(self):
+        return len(self.deferred_artifacts) > 0 or any(l.is_deferred for l in self.lookups.values())
+
+    def get_deferred_conditions(self):
+        """
+        Get the conditions which are included by the tasks of deferred lookups
+        :return: set of names of conditions
+        """
+        return set(l.condition for l in self.lookups.values() if l.is_deferred and l.condition is not None)
+
+    def get_deferred_tasks(self, provider, vars_file):
+        """
+        Make the tasks executing the deferred artifacts and lookups when the deploying playbook runs. The value of every
+        lookup is written to the variables file which is included by the next plays, not found value is NOT_FOUND
+        :param provider: name of provider
+        :param vars_file: path to the file with variables
+        :return: list of Ansible tasks
+        """
+        artifacts = [a for p, a in self.deferred_artifacts if p == provider]
+        lookups = [l for l in self.lookups.values() if l.is_deferred and l.provider == provider]
+        tasks = self.get_artifacts_tasks(provider, artifacts)
+        if len(lookups) == 0:
+            return tasks
+        lookups_tasks, _ = self.get_lookups_tasks(provider, lookups)
+        # NOTE: the shared facts sources are the first tasks, every lookup is the named task and the block after it
+        lookup_names = dict((LOOKUP_TASK_NAME % l.number, l) for l in lookups)
+        fact_lookup = None
+        for task in lookups_tasks:
+            if task.get('name') in lookup_names:
+                # NOTE: the named task is replaced to not take matched object of the previous lookup
+                fact_lookup = lookup_names[task['name']]
+                tasks.append({
+                    SET_FACT_SOURCE: {
+                        'matched_object': {}
+                    }
+                })
+                continue
+            tasks.append(task)
+            if fact_lookup is None:
+                continue
+            target_parameter = fact_lookup.target_parameter.split(SEPARATOR)[-1]
+            task['block'].append({
+                SET_FACT_SOURCE: {
+                    fact_lookup.variable: "{{ matched_object[\"" + target_parameter + "\"] | default(\"" + NOT_FOUND +
+                                          "\") }}"
+                }
+            })
+            task['rescue'].append({
+                SET_FACT_SOURCE: {
+                    fact_lookup.variable: NOT_FOUND
+                }
+            })
+            tasks.append({
+                'lineinfile': {
+                    'path': vars_file,
+                    'line': fact_lookup.variable + ": {{ " + fact_lookup.variable + " | to_json }}"
+                }
+            })
+            fact_lookup = None
+        return tasks
+
+    def get_fact_cache(self, provider):
+        fact_cache = self.fact_caches.get(provider)
+        if fact_cache is None:
+            fact_cache = FactCache(provider)
+            if self.refresh_facts:
+                fact_cache.invalidate()
+            self.fact_caches[provider] = fact_cache
+        return fact_cache
+
+    def run_lookups(self, provider, lookups):
+        configuration_class = get_configuration_tool_class(ANSIBLE)(provider)
+        fact_cache = self.get_fact_cache(provider)
+        tasks, facts_sources = self.get_lookups_tasks(provider, lookups, fact_cache)
+        results = run_tasks(configuration_class, tasks, self.cluster_name)
+        for result in results:
+            facts_source = facts_sources.get(result.task_name)
+            if facts_source is not None and not result.is_failed and not result.is_unreachable:
+                fact_cache.put(facts_source[SOURCE], facts_source[PARAMETERS], result.result)
+        fact_cache.log_statistics()
+        return self.get_lookups_values(results, lookups)
+
+    def get_cached_facts_task(self, shared_variable, value):
+        """
+        Make the task which sets the saved result of facts source, the result is read from file to not be templated
+        :param shared_variable: name of variable with the result
+        :param value: result of facts source
+        :return: Ansible task or None if the result can not be kept in the private directory
+        """
+        directory = os.path.join(utils.get_tmp_clouni_dir(), self.cluster_name, FACT_CACHE_DIRECTORY)
+        if not utils.make_private_dir(directory):
+            return None
+        filename = os.path.join(directory, shared_variable + '.json')
+        with open(filename, 'w') as file_obj:
+            json.dump(value, file_obj)
+        return {
+            'name': shared_variable,
+            SET_FACT_SOURCE: {
+                shared_variable: "{{ lookup('file', '" + filename + "') | from_json }}"
+            }
+        }
+
+    def get_lookups_tasks(self, provider, lookups, fact_cache=None):
+        """
+        Make the tasks of the playbook executing the lookups. Every lookup is started with the named task and
+        its failure is rescued to not stop the next lookups
+        :param provider: name of provider
+        :param lookups: list of FactLookup
+        :param fact_cache: FactCache with results of facts sources
+        :return: list of Ansible tasks and dict of facts sources to be saved to the cache by the names of tasks
+        """
+        shared_facts = {}
+        shared_facts_artifacts = []
+        lookups_artifacts = []
+        for fact_lookup in lookups:
+            artifacts = fact_lookup.get_artifacts()
+            first_artifact = artifacts[0] if len(artifacts) > 0 else {}
+            if first_artifact.get(SOURCE) not in NOT_SHARED_SOURCES and not first_artifact.get(EXTRA) \
+                    and first_artifact.get(VALUE) and isinstance(first_artifact.get(PARAMETERS), dict):
+                shared_key = json.dumps([first_artifact[SOURCE], first_artifact[PARAMETERS],
+                                         first_artifact.get(EXECUTOR)], sort_keys=True, default=str)
+                shared_variable = shared_facts.get(shared_key)
+                if shared_variable is None:
+                    shared_variable = SHARED_FACTS_VARIABLE % len(shared_facts)
+                    shared_facts[shared_key] = shared_variable
+                    shared_artifact = copy.deepcopy(first_artifact)
+                    shared_artifact[VALUE] = shared_variable
+                    shared_facts_artifacts.append(shared_artifact)
+                artifacts[0] = {
+                    SOURCE: SET_FACT_SOURCE,
+                    PARAMETERS: {
+                        first_artifact[VALUE]: "\\{\\{ " + shared_variable + " \\}\\}"
+                    },
+                    VALUE: "tmp_value",
+                    EXECUTOR: first_artifact.get(EXECUTOR)
+                }
+            lookups_artifacts.append((fact_lookup, artifacts))
+
+        tasks = []
+        facts_sources = {}
+        for artifact in shared_facts_artifacts:
+            shared_variable = artifact[VALUE]
+            value = None
+            if fact_cache is not None:
+                value = fact_cache.get(artifact[SOURCE], artifact[PARAMETERS])
+            cached_facts_task = None
+            if value is not None:
+                cached_facts_task = self.get_cached_facts_task(shared_variable, value)
+            if cached_facts_task is not None:
+                facts_tasks = [cached_facts_task]
+            else:
+                facts_tasks = self.get_artifacts_tasks(provider, [artifact])
+                for task in facts_tasks:
+                    task['name'] = shared_variable
+                facts_sources[shared_variable] = artifact
+            tasks.append(self.rescued_block(facts_tasks))
+        for fact_lookup, artifacts in lookups_artifacts:
+            lookup_name = LOOKUP_TASK_NAME % fact_lookup.number
+            tasks.append({
+                'name': lookup_name,
+                'debug': {
+                    'msg': lookup_name
+                }
+            })
+            tasks.append(self.rescued_block(self.get_artifacts_tasks(provider, artifacts)))
+        return tasks, facts_sources
+
+    @staticmethod
+    def get_artifacts_tasks(provider, artifacts):
+        tasks = []
+        for artifact in utils.replace_brackets(artifacts, False):
+            artifact['configuration_tool'] = artifact[EXECUTOR]
+            configuration_class = get_configuration_tool_class(artifact['configuration_tool'])(provider)
+            tasks.extend(configuration_class.create_artifact_data(artifact))
+        return tasks
+
+    @staticmethod
+    def rescued_block(tasks):
+        return {
+            'block': tasks,
+            'rescue': [
+                {
+                    'debug': {
+                        'msg': 'Failed task is skipped'
+                    }
+                }
+            ]
+        }
+
+    def get_lookups_values(self, results, lookups):
+        """
+        Get the values found by the lookups, the results of every lookup are started with its named task
+        :param results: list of task results
+        :param lookups: list of FactLookup
+        :return: dict of values by the keys of lookups
+        """
+        # NOTE: the facts of lookups with the same source are the same only while the lookups are executed together
+        self.fact_matcher = FactMatcher()
+        lookups_by_task_name = dict((LOOKUP_TASK_NAME % l.number, l) for l in lookups)
+        values = dict((l.key, NOT_FOUND) for l in lookups)
+        failed_keys = set()
+        input_facts = {}
+        fact_lookup = None
+        for result in results:
+            if result.task_name in lookups_by_task_name:
+                fact_lookup = lookups_by_task_name[result.task_name]
+                continue
+            if is_failed_result(result):
+                if fact_lookup is not None:
+                    failed_keys.add(fact_lookup.key)
+                continue
+            if fact_lookup is None:
+                continue
+            if fact_lookup.is_matched_in_python:
+                for k, v in result.result.get('ansible_facts', {}).items():
+                    if k in (INPUT_FACTS, INPUT_ARGS):
+                        input_facts.setdefault(fact_lookup.key, {})[k] = v
+            elif is_matched_result(result):
+                values[fact_lookup.key] = get_matched_value(result, fact_lookup.target_parameter)
+        for fact_lookup in lookups:
+            if fact_lookup.is_matched_in_python and fact_lookup.key not in failed_keys:
+                values[fact_lookup.key] = self.match(fact_lookup, input_facts.get(fact_lookup.key, {}))
+        for key in failed_keys:
+            values[key] = NOT_FOUND
+        return values
+
+    def match(self, fact_lookup, input_facts):
+        """
+        Check the condition of the lookup with the facts and arguments set by its tasks
+        :param fact_lookup: FactLookup
+        :param input_facts: dict with input_facts and input_args
+        :return: value of matched object or NOT_FOUND
+        """
+        if INPUT_FACTS not in input_facts or INPUT_ARGS not in input_facts:
+            logging.error("Fact lookup %s has not set %s and %s" % (fact_lookup.number, INPUT_FACTS, INPUT_ARGS))
+            return NOT_FOUND
+        try:
+            matched_objects = self.fact_matcher.match(fact_lookup.condition, input_facts[INPUT_FACTS],
+                                                      input_facts[INPUT_ARGS], facts_key=fact_lookup.facts_key)
+        except FactMatchError as e:
+            logging.error("Condition %s of fact lookup %s has failed: %s" % (fact_lookup.condition, fact_lookup.number, e))
+            return NOT_FOUND
+        if len(matched_objects) == 0:
+            logging.error("There are no matchable objects for condition %s with arguments %s"
+                          % (fact_lookup.condition, json.dumps(input_facts[INPUT_ARGS], default=str)))
+            return NOT_FOUND
+        if len(matched_objects) > 1:
+            logging.warning("There are more than one matchable objects: %s" % json.dumps(matched_objects, default=str))
+        # NOTE: the artifact of condition takes the last of matched objects
+        matched_object = matched_objects[-1]
+        target_parameter = fact_lookup.target_parameter.split(SEPARATOR)[-1]
+        if not isinstance(matched_object, dict) or target_parameter not in matched_object:
+            logging.error("Matched object has no parameter \'%s\'" % target_parameter)
+            return NOT_FOUND
+        return matched_object[target_parameter]
@@ -0,0 +1,138 @@
+from functools import lru_cache
+
+from toscatranslator.common import utils
+
+import copy, json, re, string
+
+BUFFER = 'buffer'
+FORMAT_TEMPLATE_CACHE_SIZE = 4096
+SELF_FIELD = re.compile(r'^self\[([^\[\]]*)\](\[[^\[\]]*\])*$')
+JSON_WHITESPACE = ' \t\n\r'
+# NOTE: first symbols of JSON documents, "'" is included because quotes are replaced before parsing
+JSON_START = frozenset('{["\'-0123456789tfnNI')
+
+
+def escape_format_brackets(value):
+    return value.replace("\\\\{", "{{").replace("\\{", "{{").replace("\\\\}", "}}").replace("\\}", "}}")
+
+
+def unescape_format_brackets(value):
+    return value.replace("\\\\{", "{").replace("\\{", "{").replace("\\\\}", "}").replace("\\}", "}")
+
+
+def can_be_json(value):
+    stripped_value = value.lstrip(JSON_WHITESPACE)
+    return len(stripped_value) > 0 and stripped_value[0] in JSON_START
+
+
+class FormatTemplate(object):
+    """
+    Mapping string compiled once: the keys of self it references, if it uses the buffer
+    and if the result of formatting can be JSON
+    """
+    __slots__ = ('value', 'value_format', 'unescaped_value', 'keys', 'uses_buffer', 'is_simple', 'json_start')
+
+    def __init__(self, value):
+        self.value = value
+        self.value_format = escape_format_brackets(value)
+        self.unescaped_value = unescape_format_brackets(value)
+        self.keys = ()
+        self.uses_buffer = False
+        # NOTE: simple templates reference only items of self, like {self[value]} or {self[buffer][name]}
+        self.is_simple = True
+        # NOTE: None means that the first symbol is known only after formatting
+        self.json_start = False
+
+        try:
+            parsed_value = list(string.Formatter().parse(self.value_format))
+        except ValueError:
+            # NOTE: str.format raises the same error, it is kept to the formatting
+            self.is_simple = False
+            return
+
+        keys = []
+        first_symbol_found = False
+        for literal_text, field_name, format_spec, conversion in parsed_value:
+            if not first_symbol_found:
+                stripped_text = literal_text.lstrip(JSON_WHITESPACE)
+                if stripped_text:
+                    self.json_start = stripped_text[0] in JSON_START
+                    first_symbol_found = True
+                elif field_name is not None:
+                    self.json_start = None
+                    first_symbol_found = True
+            if field_name is None:
+                continue
+            field_match = SELF_FIELD.match(field_name)
+            if field_match is None or (format_spec and '{' in format_spec):
+                self.is_simple = False
+                return
+            keys.append(field_match.group(1))
+        self.keys = tuple(keys)
+        self.uses_buffer = BUFFER in self.keys
+
+    def format(self, params, if_replace_brackets=True):
+        """
+        Fill the template with values of self
+        :param params: self
+        :param if_replace_brackets: if brackets of the result must be escaped
+        :return: formatted value and if the buffer was used
+        """
+        if not self.is_simple:
+            return format_string(self.value, params, if_replace_brackets)
+
+        try:
+            temp_val = self.value_format.format(self=params)
+        except KeyError:
+            return self.value, False
+        is_buffer = self.uses_buffer
+
+        if temp_val == self.value_format:
+            temp_val = self.unescaped_value
+        if self.json_start is not False and can_be_json(temp_val):
+            try:
+                dict_val = json.loads(temp_val.replace("\'", "\""))
+                if if_replace_brackets:
+                    dict_val = utils.replace_brackets(dict_val)
+                return dict_val, is_buffer
+            except json.decoder.JSONDecodeError:
+                pass
+        if if_replace_brackets:
+            temp_val = utils.replace_brackets(temp_val)
+        return temp_val, is_buffer
+
+
+def format_string(value, params, if_replace_brackets=True):
+    """
+    Format the string which is not a simple template, every possible self is tried
+    """
+    is_buffer = False
+    params_without_buffer = copy.copy(params)
+    params_without_buffer.pop(BUFFER)
+    value_format = escape_format_brackets(value)
+    try:
+        temp_val = value_format.format(self=params_without_buffer)
+        is_buffer = False
+    except KeyError:
+        try:
+            temp_val = value_format.format(self=params)
+            is_buffer = True
+        except KeyError:
+            return value, is_buffer
+    try:
+        if temp_val == value_format:
+            temp_val = unescape_format_brackets(value)
+        dict_val = temp_val.replace("\'", "\"")
+        dict_val = json.loads(dict_val)
+        if if_replace_brackets:
+            dict_val = utils.replace_brackets(dict_val)
+        return dict_val, is_buffer
+    except json.decoder.JSONDecodeError:
+        if if_replace_brackets:
+            temp_val = utils.replace_brackets(temp_val)
+        return temp_val, is_buffer
+
+
+@lru_cache(maxsize=FORMAT_TEMPLATE_CACHE_SIZE)
+def get_format_template(value):
+    return FormatTemplate(value)
@@ -0,0 +1,160 @@
+from collections import OrderedDict
+
+import os, copy, json, yaml, logging, sys, threading
+
+DEFAULT_MAPPING_CACHE_SIZE = 32
+
+
+def _read_only(*args, **kwargs):
+    raise TypeError("Parsed mapping is shared between translations and must not be changed, make a copy instead")
+
+
+class ReadOnlyDict(dict):
+    """
+    Dict of parsed mapping file which is shared by every node, translation and request in the process.
+    Copies made with copy.copy and copy.deepcopy are ordinary mutable dicts
+    """
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        r = {}
+        for k, v in self.items():
+            r[copy.deepcopy(k, memo)] = copy.deepcopy(v, memo)
+        return r
+
+    def __reduce__(self):
+        return ReadOnlyDict, (dict(self),)
+
+
+class ReadOnlyList(list):
+    """
+    List of parsed mapping file, see ReadOnlyDict
+    """
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = reverse = sort = clear = _read_only
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return [copy.deepcopy(v, memo) for v in self]
+
+    def __reduce__(self):
+        return ReadOnlyList, (list(self),)
+
+
+def freeze(data):
+    """
+    Make read-only copy of parsed data
+    :param data: parsed JSON or YAML data
+    :return: data where all dicts and lists are replaced with ReadOnlyDict and ReadOnlyList
+    """
+    if isinstance(data, dict):
+        return ReadOnlyDict((k, freeze(v)) for k, v in data.items())
+    if isinstance(data, list):
+        return ReadOnlyList(freeze(v) for v in data)
+    return data
+
+
+def parse_mapping_file(filename):
+    with open(filename, 'r') as file_obj:
+        data = file_obj.read()
+    try:
+        return json.loads(data)
+    except ValueError:
+        try:
+            return yaml.safe_load(data)
+        except yaml.scanner.ScannerError as e:
+            logging.error("Mapping file \'%s\' must be of type JSON or YAMl" % filename)
+            logging.error("Error parsing TOSCA template: %s%s" % (e.problem, e.context_mark))
+            sys.exit(1)
+
+
+class MappingCache(object):
+    """
+    LRU cache of parsed mapping files, keyed by path and modification time of the file
+    """
+
+    def __init__(self, max_size=DEFAULT_MAPPING_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def file_key(self, filename):
+        stat = os.stat(filename)
+        return os.path.realpath(filename), stat.st_mtime_ns, stat.st_size
+
+    def mapping_set_key(self, filenames):
+        """
+        Key of the set of mapping files, it changes when any of files changes
+        :param filenames: list of mapping files
+        :return: tuple
+        """
+        return tuple(self.file_key(f) for f in filenames)
+
+    def get(self, key, build):
+        """
+        Get the value from cache or build and store it
+        :param key: hashable key
+        :param build: function without arguments which builds a value
+        :return: cached value
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def get_file(self, filename):
+        key = self.file_key(filename)
+        return self.get(key, lambda: freeze(parse_mapping_file(filename)))
+
+    def get_mapping(self, filenames):
+        """
+        Get the merged mapping of the files, the files which are mentioned later override the previous ones
+        :param filenames: list of mapping files
+        :return: ReadOnlyDict
+        """
+        set_key = ('mapping',) + self.mapping_set_key(filenames)
+
+        def build():
+            r = dict()
+            for filename in filenames:
+                r.update(self.get_file(filename))
+            return ReadOnlyDict(r)
+
+        return self.get(set_key, build)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+MAPPING_CACHE = MappingCache()
+
+
+def get_tosca_elements_map(filenames):
+    return MAPPING_CACHE.get_mapping(filenames)
+
+
+def _represent_read_only_dict(dumper, data):
+    return dumper.represent_dict(data)
+
+
+def _represent_read_only_list(dumper, data):
+    return dumper.represent_list(data)
+
+
+for _dumper in (yaml.Dumper, yaml.SafeDumper):
+    yaml.add_representer(ReadOnlyDict, _represent_read_only_dict, Dumper=_dumper)
+    yaml.add_representer(ReadOnlyList, _represent_read_only_list, Dumper=_dumper)
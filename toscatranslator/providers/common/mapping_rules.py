@@ -0,0 +1,107 @@
+from toscatranslator.common.tosca_reserved_keys import NODE_TEMPLATE_KEYS
+from toscatranslator.providers.common.mapping_cache import MAPPING_CACHE
+
+SEPARATOR = '.'
+WILDCARD = '*'
+
+
+class MappingRule(object):
+    """
+    One entry of the mapping of the type, it is applied to the template of the node with the type
+    """
+    __slots__ = ('node_type', 'key_prefix', 'parameter', 'mapping', 'sections', 'is_wildcard')
+
+    def __init__(self, node_type, key_prefix, parameter, mapping, is_wildcard=False):
+        self.node_type = node_type
+        self.key_prefix = key_prefix
+        self.parameter = parameter
+        self.mapping = mapping
+        self.is_wildcard = is_wildcard
+        self.sections = self._sections(mapping)
+
+    @staticmethod
+    def _sections(mapping):
+        """
+        Sections of node template (properties, capabilities, ...) which the rule may match
+        :return: set of section names or None if the rule must be applied to every template
+        """
+        if not isinstance(mapping, dict) or len(mapping) == 0:
+            return None
+        sections = set()
+        for k in mapping.keys():
+            section = k.split(SEPARATOR, 1)[0]
+            if section not in NODE_TEMPLATE_KEYS:
+                return None
+            sections.add(section)
+        return sections
+
+    def applies_to(self, template):
+        if self.sections is None:
+            return True
+        for section in self.sections:
+            if section in template:
+                return True
+        return False
+
+
+class MappingRuleTable(object):
+    """
+    Mapping rules of every normative type with the rules of parent types merged.
+    The table is built once for the set of mapping files and shared between translations, the rules are built
+    without the lock and published by one setdefault, so concurrent translations get the same lists
+    """
+
+    def __init__(self, tosca_elements_map):
+        self.tosca_elements_map = tosca_elements_map
+        self._type_rules = {}
+        self._chain_rules = {}
+        self._dotted_keys = {}
+        for k in tosca_elements_map.keys():
+            splitted_k = k.split(SEPARATOR)
+            for i in range(1, len(splitted_k)):
+                prefix = SEPARATOR.join(splitted_k[:i])
+                self._dotted_keys.setdefault(prefix, {})[SEPARATOR.join(splitted_k[i:])] = tosca_elements_map[k]
+
+    def _level_rules(self, node_type, level_key, is_wildcard):
+        level_map = self.tosca_elements_map.get(level_key)
+        if level_map is None:
+            # NOTE: keys like 'tosca.nodes.Compute.properties.meta'
+            level_map = self._dotted_keys.get(level_key)
+            if not level_map:
+                return []
+        if isinstance(level_map, list):
+            entries = level_map
+        else:
+            entries = [level_map]
+        return [MappingRule(node_type, '', level_key, entry, is_wildcard=is_wildcard) for entry in entries]
+
+    def type_rules(self, node_type):
+        """
+        Rules of the type without the rules of its parents
+        :param node_type: name of normative type
+        :return: list of MappingRule
+        """
+        rules = self._type_rules.get(node_type)
+        if rules is None:
+            rules = self._level_rules(node_type, node_type, False) + self._level_rules(node_type, WILDCARD, True)
+            rules = self._type_rules.setdefault(node_type, rules)
+        return rules
+
+    def get_rules(self, type_chain):
+        """
+        Rules of the type, the parent rules go first
+        :param type_chain: tuple of types starting from the type of node and ending with the root type
+        :return: list of MappingRule
+        """
+        rules = self._chain_rules.get(type_chain)
+        if rules is None:
+            rules = []
+            for node_type in reversed(type_chain):
+                rules.extend(self.type_rules(node_type))
+            rules = self._chain_rules.setdefault(type_chain, rules)
+        return rules
+
+
+def get_mapping_rule_table(filenames, tosca_elements_map):
+    key = ('rules',) + MAPPING_CACHE.mapping_set_key(filenames)
+    return MAPPING_CACHE.get(key, lambda: MappingRuleTable(tosca_elements_map))
@@ -0,0 +1,242 @@
+import heapq
+import json
+
+from graphlib import TopologicalSorter
+
+from toscatranslator.common import utils
+
+SEPARATOR = ':'
+DEFAULT_OPERATION_DURATION = 1.0
+GRAPH_FILES = (DOT_FILE_SUFFIX, REVERSED_DOT_FILE_SUFFIX, JSON_FILE_SUFFIX) = \
+    ('_graph.dot', '_reversed_graph.dot', '_graph.json')
+
+
+class OperationsGraph(object):
+    """
+    Dependency graph of operations 'node:op' which is built before the operations are mapped to provider templates.
+    The graph has forward and reverse adjacency indexes, so the operations depending on the given one are found
+    without scanning the whole graph
+    """
+
+    def __init__(self):
+        # operation: set of operations it depends on, the order of keys is the order of adding operations
+        self.dependencies = {}
+        # operation: set of operations depending on it
+        self.dependents = {}
+
+    def __contains__(self, operation):
+        return operation in self.dependencies
+
+    def __len__(self):
+        return len(self.dependencies)
+
+    def add_operation(self, operation):
+        if operation not in self.dependencies:
+            self.dependencies[operation] = set()
+
+    def add_dependency(self, operation, dependency):
+        """
+        Operation is executed after the dependency, the dependency is not added to the graph as an operation
+        :param operation: 'node:op'
+        :param dependency: 'node:op'
+        :return: None
+        """
+        self.add_operation(operation)
+        self.dependencies[operation].add(dependency)
+        self.dependents.setdefault(dependency, set()).add(operation)
+
+    def add_dependencies(self, operation, dependencies):
+        self.add_operation(operation)
+        for dependency in dependencies:
+            self.add_dependency(operation, dependency)
+
+    def get_dependencies(self, operation):
+        return self.dependencies.get(operation, set())
+
+    def get_dependents(self, operation):
+        return self.dependents.get(operation, set())
+
+    def insert_after(self, operation, dependency, banned_operations=()):
+        """
+        Operation is executed after the dependency and before all the operations which depend on the dependency,
+        except the banned ones
+        :param operation: 'node:op'
+        :param dependency: 'node:op'
+        :param banned_operations: operations which are not made dependent on the inserted one
+        :return: None
+        """
+        self.add_dependency(operation, dependency)
+        for dependent in list(self.get_dependents(dependency)):
+            if dependent != operation and dependent not in banned_operations:
+                self.add_dependency(dependent, operation)
+
+    def items(self):
+        return self.dependencies.items()
+
+
+def get_operation_title(operation):
+    return operation.name + SEPARATOR + operation.operation
+
+
+def get_complete_graph(graph):
+    """
+    Get the graph in which every operation is a key, the operations without dependencies may be only in the values
+    of the graphs of provider template
+    :param graph: dict of operation: set of operations on which it depends
+    :return: dict of operation: set of operations on which it depends
+    """
+    complete_graph = dict(graph)
+    for dependencies in graph.values():
+        for d in dependencies:
+            if d not in complete_graph:
+                complete_graph[d] = set()
+    return complete_graph
+
+
+def get_dependents(graph):
+    dependents = {}
+    for v, dependencies in graph.items():
+        for d in dependencies:
+            dependents.setdefault(d, []).append(v)
+    return dependents
+
+
+def get_levels(graph):
+    """
+    Get the topological level of every operation: the operations without dependencies are on level 0, other
+    operations are on the level next to the last level of their dependencies
+    :param graph: dict of operation: set of operations on which it depends
+    :return: dict of operation: level
+    """
+    levels = {}
+    for v in TopologicalSorter(graph).static_order():
+        levels[v] = max([levels[d] + 1 for d in graph.get(v, [])], default=0)
+    return levels
+
+
+def get_critical_path(graph, durations):
+    """
+    Get the longest chain of dependent operations
+    :param graph: dict of operation: set of operations on which it depends
+    :param durations: dict of operation: duration
+    :return: list of operations from the first to the last one
+    """
+    lengths = utils.get_longest_paths(graph, durations)
+    if len(lengths) == 0:
+        return []
+    dependents = get_dependents(graph)
+    v = max([v for v in lengths if len(graph.get(v, [])) == 0], key=lambda x: lengths[x])
+    path = [v]
+    while len(dependents.get(v, [])) > 0:
+        v = max(dependents[v], key=lambda x: lengths[x])
+        path.append(v)
+    return path
+
+
+def estimate_wall_time(graph, durations, max_workers=None):
+    """
+    Simulate the scheduler: the ready operations starting the longest chains are run first while the number of
+    running operations is less than max_workers
+    :param graph: dict of operation: set of operations on which it depends
+    :param durations: dict of operation: duration
+    :param max_workers: positive limit of running operations, not limited by default
+    :return: time of finishing the last operation
+    """
+    priorities = utils.get_longest_paths(graph, durations)
+    elements = TopologicalSorter(graph)
+    elements.prepare()
+    ready = []
+    running = []
+    now = 0
+    order = 0
+    while elements.is_active():
+        for v in elements.get_ready():
+            heapq.heappush(ready, (-priorities[v], order, v))
+            order += 1
+        while len(ready) > 0 and (max_workers is None or len(running) < max_workers):
+            _, i, v = heapq.heappop(ready)
+            heapq.heappush(running, (now + durations.get(v, 0), i, v))
+        now, _, v = heapq.heappop(running)
+        elements.done(v)
+    return now
+
+
+def get_graph_analysis(graph, durations=None, max_workers=None):
+    """
+    Get the parallelism of the graph of operations
+    :param graph: dict of operation: set of operations on which it depends
+    :param durations: dict of operation: duration in seconds, other operations have the default duration
+    :param max_workers: limit of running operations for the estimation of wall time, not limited by default
+    :return: dict of number of operations, critical path, widths of topological levels and estimated wall time
+    """
+    graph = get_complete_graph(graph)
+    durations = dict((v, (durations or {}).get(v, DEFAULT_OPERATION_DURATION)) for v in graph)
+    critical_path = get_critical_path(graph, durations)
+    levels = get_levels(graph)
+    level_widths = [0] * (max(levels.values(), default=-1) + 1)
+    for level in levels.values():
+        level_widths[level] += 1
+    return dict(
+        operations=len(graph),
+        critical_path_length=len(critical_path),
+        critical_path_duration=round(sum(durations[v] for v in critical_path), 3),
+        critical_path=[get_operation_title(v) for v in critical_path],
+        max_width=max(level_widths, default=0),
+        level_widths=level_widths,
+        sequential_time=round(sum(durations.values()), 3),
+        max_workers=max_workers,
+        estimated_wall_time=round(estimate_wall_time(graph, durations, max_workers), 3)
+    )
+
+
+def get_graph_dot(graph, name):
+    """
+    Get the graph in DOT format, the edges are directed from the operation to the operations depending on it, the
+    operations of templates with several instances are labeled with the number of instances
+    :param graph: dict of operation: set of operations on which it depends
+    :param name: name of digraph
+    :return: string
+    """
+    graph = get_complete_graph(graph)
+    lines = ['digraph "%s" {' % name]
+    for v in sorted(graph, key=get_operation_title):
+        instances = getattr(v, 'instances', None) or 1
+        if instances == 1:
+            lines.append('  "%s";' % get_operation_title(v))
+        else:
+            # NOTE: the group of instances is one operation
+            lines.append('  "%s" [label="%s x%s"];' % (get_operation_title(v), get_operation_title(v), instances))
+    for v in sorted(graph, key=get_operation_title):
+        for d in sorted(graph[v], key=get_operation_title):
+            lines.append('  "%s" -> "%s";' % (get_operation_title(d), get_operation_title(v)))
+    lines.append('}')
+    return '\n'.join(lines) + '\n'
+
+
+def get_graph_json(graph):
+    graph = get_complete_graph(graph)
+    return dict((get_operation_title(v), sorted(get_operation_title(d) for d in graph[v]))
+                for v in sorted(graph, key=get_operation_title))
+
+
+def export_operations_graph(operations_graph, reversed_operations_graph, path_prefix, analysis=None):
+    """
+    Write the graphs of operations for deployment and deletion in DOT format and together with the analysis in JSON
+    :param operations_graph: dict of operation: set of operations on which it depends
+    :param reversed_operations_graph: dict of operation: set of operations which are deleted before it
+    :param path_prefix: path to which the suffixes of graph files are added
+    :param analysis: dict returned by get_graph_analysis
+    :return: list of written files
+    """
+    dot_path = path_prefix + DOT_FILE_SUFFIX
+    with open(dot_path, 'w') as dot_file:
+        dot_file.write(get_graph_dot(operations_graph, 'operations'))
+    reversed_dot_path = path_prefix + REVERSED_DOT_FILE_SUFFIX
+    with open(reversed_dot_path, 'w') as dot_file:
+        dot_file.write(get_graph_dot(reversed_operations_graph, 'reversed_operations'))
+    json_path = path_prefix + JSON_FILE_SUFFIX
+    with open(json_path, 'w') as json_file:
+        json.dump(dict(operations=get_graph_json(operations_graph),
+                       reversed_operations=get_graph_json(reversed_operations_graph),
+                       analysis=analysis), json_file, indent=2)
+    return [dot_path, reversed_dot_path, json_path]
@@ -11,7 +11,7 @@ from toscatranslator.providers.common.all_requirements import ProviderRequiremen
 import copy, logging
 from toscatranslator.common.tosca_reserved_keys import *
 from toscatranslator.providers.common.provider_configuration import ProviderConfiguration
-from toscatranslator.providers.common.translator_to_provider import execute
+from toscatranslator.providers.common.fact_resolver import FactResolver
 
 SET_FACT_SOURCE = "set_fact"
 IMPORT_TASKS_MODULE = "include"
@@ -19,7 +19,7 @@ IMPORT_TASKS_MODULE = "include"
 class ProviderResource(object):
 
     def __init__(self, provider, is_delete, cluster_name, configuration_tool, tmpl, node_name, host_ip_parameter, node_type, is_software_component=False, is_relationship=False,
-                 relation_target_source = dict()):
+                 relation_target_source = dict(), fact_resolver=None, instances=None):
         """
 
         :param provider:
@@ -28,6 +28,9 @@ class ProviderResource(object):
         :param node_type:
         :param is_software_component:
         :param is_relationship:
+        :param fact_resolver: FactResolver which executes the node filter lookups, if it is not set the lookups
+        are executed at once
+        :param instances: number of instances created by the template, the template is not looped if it is not set
         """
 
         self.provider = provider
@@ -45,6 +48,8 @@ class ProviderResource(object):
         self.source = None
         self.operation = None
         self.is_delete = is_delete
+        self.fact_lookup_args = []
+        self.instances = instances
 
         self.set_defaults()
         # NOTE: Get the parameters from template using provider definition
@@ -101,6 +106,9 @@ class ProviderResource(object):
                     self.configuration_args[key] = req.get_value()
 
             if configuration_tool == 'ansible':
+                resolve_at_once = fact_resolver is None
+                if resolve_at_once:
+                    fact_resolver = FactResolver(self.is_delete, self.cluster_name)
                 provider_config = ProviderConfiguration(provider)
                 node_filter_config = provider_config.get_subsection(ANSIBLE, NODE_FILTER)
                 if not node_filter_config:
@@ -204,8 +212,27 @@ class ProviderResource(object):
                                     EXECUTOR: configuration_tool
                                 }
                             ]
-                            arg = str(execute(tmp_ansible_tasks, self.is_delete, self.cluster_name, self.provider, node_filter_value))
+                            arg = fact_resolver.lookup(tmp_ansible_tasks, self.provider, node_filter_value,
+                                                      condition='equals')
+                            self.fact_lookup_args.append(arg_key)
                     self.configuration_args[arg_key] = arg
+                if resolve_at_once:
+                    fact_resolver.resolve()
+                    self.resolve_fact_lookups(fact_resolver)
+
+    def resolve_fact_lookups(self, fact_resolver):
+        """
+        Set the values found by the node filter lookups after they are executed
+        :param fact_resolver: FactResolver which executed the lookups
+        :return: None
+        """
+        for arg_key in self.fact_lookup_args:
+            value = fact_resolver.get_value(self.configuration_args[arg_key])
+            if fact_resolver.defer_facts:
+                # NOTE: deferred value is the reference to the variable with brackets escaped as in mapping
+                value = utils.replace_brackets(value, False)
+            self.configuration_args[arg_key] = str(value)
+        self.fact_lookup_args = []
 
     @property
     def requirement_definitions(self):
@@ -239,3 +266,29 @@ class ProviderResource(object):
             if default is not None and value is None:
                 self.tmpl[PROPERTIES] = self.tmpl.get(PROPERTIES, {})
                 self.tmpl[PROPERTIES][prop_name] = default
+
+
+class ProviderResourceOperation(object):
+    """
+    Operation of ProviderResource in the graph of operations, all operations of the resource share it and only
+    the name of operation is stored per operation
+    """
+    __slots__ = ('resource', 'operation')
+
+    def __init__(self, resource, operation):
+        self.resource = resource
+        self.operation = operation
+
+    def __getattr__(self, name):
+        # NOTE: is called only for the attributes which are not in slots, the resource is not set while copying
+        if name == 'resource':
+            raise AttributeError(name)
+        return getattr(self.resource, name)
+
+    @property
+    def configuration_args(self):
+        return self.resource.configuration_args
+
+    @configuration_args.setter
+    def configuration_args(self, value):
+        self.resource.configuration_args = value
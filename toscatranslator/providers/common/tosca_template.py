@@ -1,4 +1,3 @@
-from toscaparser.imports import ImportsLoader
 from toscaparser.topology_template import TopologyTemplate
 from toscaparser.functions import GetProperty
 
@@ -7,7 +6,13 @@ from toscatranslator.common.tosca_reserved_keys import *
 
 from toscatranslator.providers.common.provider_configuration import ProviderConfiguration
 from toscatranslator.providers.common.translator_to_provider import translate as translate_to_provider
-from toscatranslator.providers.common.provider_resource import ProviderResource
+from toscatranslator.providers.common.provider_resource import ProviderResource, ProviderResourceOperation
+from toscatranslator.providers.common.fact_resolver import FactResolver
+from toscatranslator.providers.common.definitions_snapshot import get_definitions_snapshot, get_full_definition
+from toscatranslator.providers.common.mapping_cache import get_tosca_elements_map
+from toscatranslator.providers.common.mapping_rules import get_mapping_rule_table
+from toscatranslator.providers.common.operations_graph import OperationsGraph
+from toscatranslator.providers.common.translation_state import TranslationState
 
 from graphlib import TopologicalSorter
 
@@ -21,7 +26,8 @@ class ProviderToscaTemplate(object):
     DEFAULT_ARTIFACTS_DIRECTOR = ARTIFACTS
 
     def __init__(self, tosca_parser_template_object, provider, configuration_tool, cluster_name, host_ip_parameter, public_key_path,
-                 is_delete, common_map_files=[]):
+                 is_delete, common_map_files=[], common_definition_files=[], refresh_facts=False,
+                 defer_facts=False, translation_workers=1, incremental=False):
         self.provider = provider
         self.is_delete = is_delete
         self.host_ip_parameter = host_ip_parameter
@@ -29,6 +35,12 @@ class ProviderToscaTemplate(object):
         self.configuration_tool = configuration_tool
         self.provider_config = ProviderConfiguration(self.provider)
         self.cluster_name = cluster_name
+        if translation_workers < 1:
+            logging.error("Number of translation workers must be positive, got %s" % translation_workers)
+            sys.exit(1)
+        self.translation_workers = translation_workers
+        self.fact_resolver = FactResolver(self.is_delete, self.cluster_name, refresh_facts=refresh_facts,
+                                          defer_facts=defer_facts)
         for sec in self.REQUIRED_CONFIG_PARAMS:
             if not self.provider_config.config[self.provider_config.MAIN_SECTION].get(sec):
                 logging.error("Provider configuration parameter \'%s\' has missing value" % sec)
@@ -66,17 +78,23 @@ class ProviderToscaTemplate(object):
 
         for tmpl in topology_template.relationship_templates:
             self.relationship_templates[tmpl.name] = tmpl.entity_tpl
-        import_definition_file = ImportsLoader([self.definition_file()], None, list(SERVICE_TEMPLATE_KEYS),
-                                               topology_template.tpl)
-        self.definitions.update(import_definition_file.get_custom_defs())
+        definition_file = self.definition_file()
+        definitions_snapshot = get_definitions_snapshot(list(common_definition_files) + [definition_file])
+        self.definitions.update(definitions_snapshot.file_definitions[definition_file])
         self.software_types = set()
-        self.fulfil_definitions_with_parents()
+        self.fulfil_definitions_with_parents(definitions_snapshot)
         self.artifacts = []
         self.used_conditions_set = set()
         self.extra_configuration_tool_params = dict()
         self.make_extended_notations()
-        self.node_templates = self.resolve_get_property_functions(self.node_templates)
-        self.relationship_templates = self.resolve_get_property_functions(self.relationship_templates)
+        # template name: list of names of templates referenced by get functions, they are collected while the
+        # get_property functions are resolved
+        self.template_references = {}
+        self.node_templates = self.resolve_get_property_functions(self.node_templates,
+                                                                  references=self.template_references)
+        self.relationship_templates = self.resolve_get_property_functions(self.relationship_templates,
+                                                                          references=self.template_references)
+        self.node_groups = self.get_node_groups()
 
         # resolving template dependencies fo normative templates
         self.template_dependencies = dict()
@@ -85,6 +103,12 @@ class ProviderToscaTemplate(object):
 
         self.normative_nodes_graph = self.normative_nodes_graph_dependency()
 
+        # NOTE: the results of translation of the templates which are not changed are taken from the previous
+        # translation of cluster, their recorded fact lookups are passed to the resolver again
+        self.translation_state = None
+        if incremental:
+            self.translation_state = TranslationState(self.cluster_name, self.get_translation_context())
+
         self.translate_to_provider()
         self.make_extended_notations()
 
@@ -99,6 +123,7 @@ class ProviderToscaTemplate(object):
         self.replace_requirements_with_node_filter()
         self.provider_nodes = self._provider_nodes()
         self.provider_relations = self._provider_relations()
+        self.resolve_fact_lookups()
 
         self.normative_nodes_graph = self.translate_normative_graph()
 
@@ -109,6 +134,27 @@ class ProviderToscaTemplate(object):
         # for key, value in self.template_mapping.items():
         #    self.sub_graph_elements += [self.sort_nodes_and_operations_by_graph_dependency(value)]
 
+    def get_translation_context(self):
+        """
+        Get the parameters on which the translation of every template depends
+        :return: list of parameters
+        """
+        map_files = [(map_file, os.path.getmtime(map_file)) for map_file in self.map_files]
+        return [self.provider, self.configuration_tool, self.is_delete, self.host_ip_parameter, self.public_key_path,
+                self.fact_resolver.defer_facts, map_files, self.definitions, self.inputs]
+
+    def get_translated_templates(self):
+        """
+        Get the names of provider templates which were translated, not taken from the previous translation
+        :return: set of names or None if all the templates were translated
+        """
+        if self.translation_state is None:
+            return None
+        translated_templates = set()
+        for tmpl_name in self.translation_state.translated:
+            translated_templates.update(self.template_mapping.get(tmpl_name, {tmpl_name}))
+        return translated_templates
+
     def _provider_nodes(self):
         """
         Create a list of ProviderResource classes to represent a node in TOSCA
@@ -125,7 +171,9 @@ class ProviderToscaTemplate(object):
                 provider_node_instance = ProviderResource(self.provider, self.is_delete, self.cluster_name, self.configuration_tool, node,
                                                           node_name,
                                                           self.host_ip_parameter, self.definitions[node[TYPE]],
-                                                          is_software_component=is_software_component)
+                                                          is_software_component=is_software_component,
+                                                          fact_resolver=self.fact_resolver,
+                                                          instances=self.instances.get(node_name))
                 provider_nodes[node_name] = provider_node_instance
         return provider_nodes
 
@@ -136,10 +184,22 @@ class ProviderToscaTemplate(object):
                                                      rel_name,
                                                      self.host_ip_parameter, self.definitions[rel_body[TYPE]],
                                                      is_relationship=True,
-                                                     relation_target_source=self._relation_target_source)
+                                                     relation_target_source=self._relation_target_source,
+                                                     fact_resolver=self.fact_resolver)
             provider_relations[rel_name] = provider_rel_instance
         return provider_relations
 
+    def resolve_fact_lookups(self):
+        """
+        Execute fact lookups of node filters of all provider nodes and relationships together, the conditions of
+        deferred lookups are used by the configuration tool
+        :return: None
+        """
+        self.fact_resolver.resolve()
+        for provider_resource in list(self.provider_nodes.values()) + list(self.provider_relations.values()):
+            provider_resource.resolve_fact_lookups(self.fact_resolver)
+        self.used_conditions_set.update(self.fact_resolver.get_deferred_conditions())
+
     def _provider_nodes_by_name(self):
         """
         Get provider_nodes_by_name
@@ -160,14 +220,9 @@ class ProviderToscaTemplate(object):
         dependencies = {}
         for temp, dep in self.normative_nodes_graph.items():
             for elem in dep:
-                for key, val in self.template_mapping.items():
-                    if elem == key:
-                        for tpl in self.template_mapping[temp]:
-                            for el_tpl in self.template_mapping[elem]:
-                                if tpl not in dependencies:
-                                    dependencies[tpl] = {el_tpl}
-                                else:
-                                    dependencies[tpl].add(el_tpl)
+                if elem in self.template_mapping:
+                    for tpl in self.template_mapping[temp]:
+                        dependencies.setdefault(tpl, set()).update(self.template_mapping[elem])
         return dependencies
 
     def normative_nodes_graph_dependency(self):
@@ -178,20 +233,19 @@ class ProviderToscaTemplate(object):
         nodes = set(self.node_templates.keys())
         dependencies = {}
         for templ_name in nodes:
-            set_intersection = nodes.intersection(self.template_dependencies.get(templ_name, set()))
-            utils.deep_update_dict(dependencies, {templ_name: set_intersection})
+            dependencies[templ_name] = nodes.intersection(self.template_dependencies.get(templ_name, set()))
         return dependencies
 
-    def update_relationships(self, new_dependencies, templ_name, direction, rel_name, post_op, banned_ops=[]):
-        utils.deep_update_dict(new_dependencies, {
-            templ_name + SEPARATOR + rel_name: {direction + SEPARATOR + post_op}})
-        for key, value in new_dependencies.items():
-            for elem in value:
-                if elem == direction + SEPARATOR + post_op and key != templ_name + SEPARATOR + rel_name and key not in [
-                    templ_name + SEPARATOR + x for x in banned_ops]:
-                    utils.deep_update_dict(new_dependencies,
-                                           {key: {templ_name + SEPARATOR + rel_name}})
-        return new_dependencies
+    def update_relationships(self, operations_graph, templ_name, direction, rel_name, post_op, banned_ops=[]):
+        """
+        Relationship operation is executed after the operation of source or target node and before the operations
+        which depend on that operation
+        :param operations_graph: OperationsGraph
+        :return: operations_graph
+        """
+        operations_graph.insert_after(templ_name + SEPARATOR + rel_name, direction + SEPARATOR + post_op,
+                                      banned_operations={templ_name + SEPARATOR + x for x in banned_ops})
+        return operations_graph
 
     def sort_nodes_and_operations_by_graph_dependency(self):
         """
@@ -218,17 +272,10 @@ class ProviderToscaTemplate(object):
                     # if there is any other operations - add ti new_operations and translate to dict
                     # in format {node.op: {node1, node2}}
                     # node requieres node1 and node2
-                    if len(new_operations) == 1:
-                        utils.deep_update_dict(dependencies, {templ_name + SEPARATOR + 'create': set_intersection})
-                    else:
-                        for i in range(1, len(new_operations)):
-                            utils.deep_update_dict(dependencies, {
-                                templ_name + SEPARATOR + new_operations[i]: {
-                                    templ_name + SEPARATOR + new_operations[i - 1]}})
-                        utils.deep_update_dict(dependencies,
-                                               {templ_name + SEPARATOR + new_operations[0]: set_intersection})
-                else:
-                    utils.deep_update_dict(dependencies, {templ_name + SEPARATOR + 'create': set_intersection})
+                    for i in range(1, len(new_operations)):
+                        dependencies.setdefault(templ_name + SEPARATOR + new_operations[i], set()).add(
+                            templ_name + SEPARATOR + new_operations[i - 1])
+                dependencies.setdefault(templ_name + SEPARATOR + 'create', set()).update(set_intersection)
         new_normative_graph = {}
 
         # getting dependencies for create operaions of nodes, translated from 1 normative node
@@ -237,30 +284,27 @@ class ProviderToscaTemplate(object):
                 for op in reversed_full_lifecycle:
                     new_oper = elem + SEPARATOR + op
                     if new_oper in dependencies:
-                        if key + SEPARATOR + 'create' in new_normative_graph:
-                            new_normative_graph[key + SEPARATOR + 'create'].add(new_oper)
-                        else:
-                            new_normative_graph[key + SEPARATOR + 'create'] = {new_oper}
+                        new_normative_graph.setdefault(key + SEPARATOR + 'create', set()).add(new_oper)
                         break
                 else:
                     logging.error("Operation create not found")
                     sys.exit(1)
         # update dependencies
-        dependencies = utils.deep_update_dict(dependencies, new_normative_graph)
-        new_dependencies = {}
-        # new_dependencies is needed for updating set operations
-        # dict must be in format {node.op: {node1, node2}}
+        for key, value in new_normative_graph.items():
+            dependencies.setdefault(key, set()).update(value)
+        # operations_graph is needed for updating set operations
+        # dependencies must be in format {node.op: {node1.op, node2.op}}
+        operations_graph = OperationsGraph()
         for key, value in dependencies.items():
-            new_set = set()
+            operations_graph.add_operation(key)
             for elem in value:
                 for oper in reversed_full_lifecycle:
                     if elem + SEPARATOR + oper in dependencies:
-                        new_set.add(elem + SEPARATOR + oper)
+                        operations_graph.add_dependency(key, elem + SEPARATOR + oper)
                         break
                     elif elem in dependencies:
-                        new_set.add(elem)
+                        operations_graph.add_dependency(key, elem)
                         break
-            new_dependencies[key] = new_set
 
         # adding relationships operations pre_configure_source after create source node
         # pre_configure_target after create target node
@@ -276,27 +320,27 @@ class ProviderToscaTemplate(object):
             if element_type == RELATIONSHIPS:
                 if 'interfaces' in templ.tmpl and 'Configure' in templ.tmpl['interfaces']:
                     if 'pre_configure_source' in templ.tmpl['interfaces']['Configure']:
-                        new_dependencies = self.update_relationships(new_dependencies, templ.name, templ.source,
+                        operations_graph = self.update_relationships(operations_graph, templ.name, templ.source,
                                                                      'pre_configure_source', 'create', ['add_source'])
                     if 'pre_configure_target' in templ.tmpl['interfaces']['Configure']:
-                        new_dependencies = self.update_relationships(new_dependencies, templ.name, templ.target,
+                        operations_graph = self.update_relationships(operations_graph, templ.name, templ.target,
                                                                      'pre_configure_target', 'create')
                     if 'post_configure_source' in templ.tmpl['interfaces']['Configure']:
-                        if templ.source + SEPARATOR + 'configure' in new_dependencies:
-                            new_dependencies = self.update_relationships(new_dependencies, templ.name, templ.source,
+                        if templ.source + SEPARATOR + 'configure' in operations_graph:
+                            operations_graph = self.update_relationships(operations_graph, templ.name, templ.source,
                                                                          'post_configure_source', 'configure')
                         else:
-                            new_dependencies = self.update_relationships(new_dependencies, templ.name, templ.source,
+                            operations_graph = self.update_relationships(operations_graph, templ.name, templ.source,
                                                                          'post_configure_source', 'create')
                     if 'post_configure_target' in templ.tmpl['interfaces']['Configure']:
-                        if templ.target + SEPARATOR + 'configure' in new_dependencies:
-                            new_dependencies = self.update_relationships(new_dependencies, templ.name, templ.target,
+                        if templ.target + SEPARATOR + 'configure' in operations_graph:
+                            operations_graph = self.update_relationships(operations_graph, templ.name, templ.target,
                                                                          'post_configure_target', 'configure')
                         else:
-                            new_dependencies = self.update_relationships(new_dependencies, templ.name, templ.target,
+                            operations_graph = self.update_relationships(operations_graph, templ.name, templ.target,
                                                                          'post_configure_target', 'create')
                     if 'add_source' in templ.tmpl['interfaces']['Configure']:
-                        new_dependencies = self.update_relationships(new_dependencies, templ.name, templ.source,
+                        operations_graph = self.update_relationships(operations_graph, templ.name, templ.source,
                                                                      'add_source', 'create', ['pre_configure_source'])
                     if 'add_target' in templ.tmpl['interfaces']['Configure']:
                         logging.warning('Operation add_target not supported, it will be skipped')
@@ -304,18 +348,18 @@ class ProviderToscaTemplate(object):
                         logging.warning('Operation target_changed not supported, it will be skipped')
                     if 'remove_target' in templ.tmpl['interfaces']['Configure']:
                         logging.warning('Operation remove_target not supported, it will be skipped')
-        # mapping strings 'node.op' to provider template of this node with this operation
+        # mapping strings 'node.op' to the operation of provider template of this node,
+        # provider template is shared by all its operations
         templ_mappling = {}
-        for elem in new_dependencies:
-            templ_name = elem.split(SEPARATOR)[0]
-            templ = copy.deepcopy(self.provider_nodes.get(templ_name, self.provider_relations.get(templ_name)))
-            templ.operation = elem.split(SEPARATOR)[1]
-            templ_mappling[elem] = templ
+        for elem in operations_graph.dependencies:
+            templ_name, operation = elem.split(SEPARATOR)
+            templ = self.provider_nodes.get(templ_name, self.provider_relations.get(templ_name))
+            templ_mappling[elem] = ProviderResourceOperation(templ, operation)
         templ_dependencies = {}
         reversed_templ_dependencies = {}
         # create dict where all elements will be replaced with provider template from templ_mappling
         # reversed_templ_dependencies needed for delete - it just a reversed version of graph
-        for key, value in new_dependencies.items():
+        for key, value in operations_graph.items():
             new_set = set()
             for elem in value:
                 new_set.add(templ_mappling[elem])
@@ -367,9 +411,13 @@ class ProviderToscaTemplate(object):
     def resolve_in_template_dependencies(self):
         """
         TODO think through the logic to replace mentions by id
-        Changes all mentions of node_templates by name in requirements, places dictionary with node_filter instead
+        Changes all mentions of node_templates by name in requirements, places dictionary with node_filter instead.
+        The nodes of the types required by definitions are found with the index of nodes by types, the templates
+        referenced by get functions are taken from self.template_references
         :return:
         """
+        nodes_by_type = self.get_nodes_by_type()
+        requirement_node_types = {}
         for node_name, node in self.node_templates.items():
             for req in node.get(REQUIREMENTS, []):
                 for req_name, req_body in req.items():
@@ -393,37 +441,96 @@ class ProviderToscaTemplate(object):
                         if type_name is None:
                             self.add_template_dependency(node_name, req_node)
 
-            node_types_from_requirements = set()
-            req_definitions = self.definitions[node[TYPE]].get(REQUIREMENTS, [])
-            for req in req_definitions:
-                for req_name, req_def in req.items():
-                    if req_def.get(NODE, None) is not None:
-                        if req_def[NODE] != node[TYPE]:
-                            node_types_from_requirements.add(req_def[NODE])
-            for req_node_name, req_node_tmpl in self.node_templates.items():
-                if req_node_tmpl[TYPE] in node_types_from_requirements:
+            if node[TYPE] not in requirement_node_types:
+                requirement_node_types[node[TYPE]] = self.get_requirement_node_types(node[TYPE])
+            for req_node_type in requirement_node_types[node[TYPE]]:
+                for req_node_name in nodes_by_type.get(req_node_type, []):
                     self.add_template_dependency(node_name, req_node_name)
 
-        # Search in all nodes for get function mentions and get its target name
+        for tmpl_name, references in self.template_references.items():
+            for template_name in references:
+                self.add_template_dependency(tmpl_name, template_name)
+                if self.relationship_templates.get(template_name) is not None and \
+                        self._relation_target_source.get(template_name) is None:
+                    self._relation_target_source[template_name] = {
+                        'source': tmpl_name,
+                        'target': None
+                    }
+
+    def get_nodes_by_type(self):
+        """
+        Get the index of node templates by their types
+        :return: dict of type: list of node names
+        """
+        nodes_by_type = {}
+        for node_name, node in self.node_templates.items():
+            nodes_by_type.setdefault(node[TYPE], []).append(node_name)
+        return nodes_by_type
 
-        for node_name, node_tmpl in self.node_templates.items():
-            self.search_get_function(node_name, node_tmpl)
+    def get_requirement_node_types(self, node_type):
+        """
+        Get the types of nodes which are required by the definition of node type
+        :param node_type: type of node
+        :return: set of types
+        """
+        node_types_from_requirements = set()
+        for req in self.definitions[node_type].get(REQUIREMENTS, []):
+            for req_name, req_def in req.items():
+                if req_def.get(NODE, None) is not None:
+                    if req_def[NODE] != node_type:
+                        node_types_from_requirements.add(req_def[NODE])
+        return node_types_from_requirements
+
+    def get_provider_template_references(self):
+        """
+        Get the names of templates referenced by get functions of provider templates. The get functions of provider
+        templates are translated from the get functions of normative templates, so only the provider templates of the
+        normative templates with references are searched, unless the mapping adds get functions itself. The references
+        of templates which are taken from the previous translation are not searched again
+        :return: dict of template name: list of names of referenced templates
+        """
+        previous_references = {}
+        translated_templates = self.get_translated_templates()
+        if self.translation_state is not None and self.translation_state.previous is not None:
+            previous_references = self.translation_state.previous.get('references', {})
+        referencing_templates = None
+        mapping_references = []
+        self.search_get_function(self.tosca_elements_map_to_provider(), mapping_references)
+        if len(mapping_references) == 0:
+            # NOTE: self.template_references are the references of normative templates till they are replaced
+            referencing_templates = set()
+            for tmpl_name, tmpl_references in self.template_references.items():
+                if len(tmpl_references) > 0:
+                    referencing_templates.update(self.template_mapping.get(tmpl_name, {tmpl_name}))
+        references = {}
+        for templates in (self.node_templates, self.relationship_templates):
+            for tmpl_name, tmpl in templates.items():
+                if referencing_templates is not None and tmpl_name not in referencing_templates:
+                    tmpl_references = []
+                elif tmpl_name in previous_references and tmpl_name not in translated_templates:
+                    tmpl_references = previous_references[tmpl_name]
+                else:
+                    tmpl_references = []
+                    self.search_get_function(tmpl, tmpl_references)
+                references.setdefault(tmpl_name, []).extend(tmpl_references)
+        return references
 
-        for rel_name, rel_tmpl in self.relationship_templates.items():
-            self.search_get_function(rel_name, rel_tmpl)
+    def add_template_references(self, tmpl_name, data, references):
+        if references is not None:
+            self.search_get_function(data, references.setdefault(tmpl_name, []))
 
-    def search_get_function(self, node_name, data):
+    def search_get_function(self, data, references):
         """
         Function for recursion search of object in data
         Get functions are the keys of dictionary
-        :param node_name:
         :param data:
+        :param references: list to which the names of referenced templates are added
         :return:
         """
         if isinstance(data, dict):
             for k, v in data.items():
                 if k not in self.DEPENDENCY_FUNCTIONS:
-                    self.search_get_function(node_name, v)
+                    self.search_get_function(v, references)
                 else:
                     if isinstance(v, list):
                         template_name = v[0]
@@ -431,16 +538,10 @@ class ProviderToscaTemplate(object):
                         params = v.split(',')
                         template_name = params[0]
                     if not template_name in TEMPLATE_REFERENCES:
-                        self.add_template_dependency(node_name, template_name)
-                        if self.relationship_templates.get(template_name) is not None and \
-                                self._relation_target_source.get(template_name) is None:
-                            self._relation_target_source[template_name] = {
-                                'source': node_name,
-                                'target': None
-                            }
+                        references.append(template_name)
         elif isinstance(data, list):
             for i in data:
-                self.search_get_function(node_name, i)
+                self.search_get_function(i, references)
         elif isinstance(data, (str, int, float)):
             return
 
@@ -456,22 +557,10 @@ class ProviderToscaTemplate(object):
         return file_definition
 
     def tosca_elements_map_to_provider(self):
-        r = dict()
-        for file in self.map_files:
-            with open(file, 'r') as file_obj:
-                data = file_obj.read()
-                try:
-                    data_dict = json.loads(data)
-                    r.update(data_dict)
-                except:
-                    try:
-                        data_dict = yaml.safe_load(data)
-                        r.update(data_dict)
-                    except yaml.scanner.ScannerError as e:
-                        logging.error("Mapping file \'%s\' must be of type JSON or YAMl" % file)
-                        logging.error("Error parsing TOSCA template: %s%s" % (e.problem, e.context_mark))
-                        sys.exit(1)
-        return r
+        return get_tosca_elements_map(self.map_files)
+
+    def mapping_rule_table(self):
+        return get_mapping_rule_table(self.map_files, self.tosca_elements_map_to_provider())
 
     def translate_to_provider(self):
         new_element_templates, new_extra, template_mapping = translate_to_provider(self)
@@ -507,6 +596,50 @@ class ProviderToscaTemplate(object):
         self.node_templates = new_element_templates.get(NODES, {})
         self.relationship_templates = new_element_templates.get(RELATIONSHIPS, {})
         self.outputs = new_element_templates.get(OUTPUTS, {})
+        self.instances = self.get_instances()
+        self.template_references = self.get_provider_template_references()
+        if self.translation_state is not None:
+            self.translation_state.references = self.template_references
+            self.translation_state.save()
+
+    def get_node_groups(self):
+        """
+        Get the number of instances of every node template with scalable capability, the group of instances is
+        translated as one template
+        :return: dict of node name: number of instances
+        """
+        node_groups = {}
+        for node_name, node in self.node_templates.items():
+            scalable = node.get(CAPABILITIES, {}).get(SCALABLE)
+            if scalable is None:
+                continue
+            properties = scalable.get(PROPERTIES, {})
+            instances = properties.get(DEFAULT_INSTANCES, properties.get(MIN_INSTANCES, 1))
+            try:
+                instances = int(instances)
+            except (TypeError, ValueError):
+                logging.error("Number of instances of node \'%s\' must be an integer, got %s"
+                              % (node_name, json.dumps(instances)))
+                sys.exit(1)
+            if instances < 1:
+                logging.error("Number of instances of node \'%s\' must be positive, got %s" % (node_name, instances))
+                sys.exit(1)
+            node_groups[node_name] = instances
+        return node_groups
+
+    def get_instances(self):
+        """
+        Get the number of instances of provider templates which are created once per instance of normative node, the
+        mapping marks them with metadata 'instances'
+        :return: dict of provider template name: number of instances
+        """
+        instances = {}
+        for tmpl_name, tpl_names in self.template_mapping.items():
+            for tpl_name in tpl_names:
+                metadata = self.node_templates.get(tpl_name, {}).get(METADATA) or {}
+                if INSTANCES in metadata:
+                    instances[tpl_name] = self.node_groups.get(tmpl_name, int(metadata[INSTANCES]))
+        return instances
 
     def _get_property_value(self, value, tmpl_name):
         prop_keys = []
@@ -550,7 +683,15 @@ class ProviderToscaTemplate(object):
             sys.exit(1)
         return tmpl_properties
 
-    def resolve_get_property_functions(self, data=None, tmpl_name=None):
+    def resolve_get_property_functions(self, data=None, tmpl_name=None, references=None):
+        """
+        Replace get_property functions with the values of properties
+        :param data: dict of templates by names or part of template
+        :param tmpl_name: name of template which contains data
+        :param references: dict of template name: list of names of templates referenced by other get functions, the
+        references are added while the templates are walked
+        :return: data with the values of properties
+        """
         if data is None:
             data = self.node_templates
         if isinstance(data, dict):
@@ -558,18 +699,24 @@ class ProviderToscaTemplate(object):
             for key, value in data.items():
                 if key == GET_PROPERTY:
                     new_data = self._get_property_value(value, tmpl_name)
+                    self.add_template_references(tmpl_name, new_data, references)
+                elif key in self.DEPENDENCY_FUNCTIONS:
+                    self.add_template_references(tmpl_name, {key: value}, references)
+                    new_data[key] = self.resolve_get_property_functions(value, tmpl_name)
                 else:
                     new_data[key] = self.resolve_get_property_functions(value,
-                                                                        tmpl_name if tmpl_name is not None else key)
+                                                                        tmpl_name if tmpl_name is not None else key,
+                                                                        references)
             return new_data
         elif isinstance(data, list):
             new_data = []
             for v in data:
-                new_data.append(self.resolve_get_property_functions(v, tmpl_name))
+                new_data.append(self.resolve_get_property_functions(v, tmpl_name, references))
             return new_data
         elif isinstance(data, GetProperty):
-            value = data.args
-            return self._get_property_value(value, tmpl_name)
+            value = self._get_property_value(data.args, tmpl_name)
+            self.add_template_references(tmpl_name, value, references)
+            return value
         return data
 
     def make_extended_notations(self):
@@ -608,32 +755,17 @@ class ProviderToscaTemplate(object):
                                     INPUTS: []
                                 }
 
-    def _get_full_defintion(self, definition, def_type, ready_set):
-        if def_type in ready_set:
-            return definition, def_type in self.software_types
-
-        (_, _, def_type_short) = utils.tosca_type_parse(def_type)
-        is_software_type = def_type_short == 'SoftwareComponent'
-        is_software_parent = False
-        parent_def_name = definition.get(DERIVED_FROM, None)
-        if parent_def_name is not None:
-            if def_type == parent_def_name:
-                logging.critical("Invalid type \'%s\' is derived from itself" % def_type)
-                sys.exit(1)
-            if parent_def_name in ready_set:
-                parent_definition = self.definitions[parent_def_name]
-                is_software_parent = parent_def_name in self.software_types
-            else:
-                parent_definition, is_software_parent = \
-                    self._get_full_defintion(self.definitions[parent_def_name], parent_def_name, ready_set)
-            parent_definition = copy.deepcopy(parent_definition)
-            definition = utils.deep_update_dict(parent_definition, definition)
-        if is_software_type or is_software_parent:
-            self.software_types.add(def_type)
-        ready_set.add(def_type)
-        return definition, def_type in self.software_types
-
-    def fulfil_definitions_with_parents(self):
+    def fulfil_definitions_with_parents(self, definitions_snapshot):
+        # NOTE: full definitions of the types which are the same as in definition files are taken from the snapshot,
+        # they are copied because the defaults of properties are put to the templates and changed there
+        actual_types = {}
         ready_definitions = set()
-        for def_name, definition in self.definitions.items():
-            self.definitions[def_name], _ = self._get_full_defintion(definition, def_name, ready_definitions)
+        for def_name in self.definitions.keys():
+            if definitions_snapshot.is_actual(self.definitions, def_name, actual_types):
+                ready_definitions.add(def_name)
+        for def_name in ready_definitions:
+            self.definitions[def_name] = copy.deepcopy(definitions_snapshot.definitions[def_name])
+            if def_name in definitions_snapshot.software_types:
+                self.software_types.add(def_name)
+        for def_name in self.definitions.keys():
+            get_full_definition(self.definitions, def_name, ready_definitions, self.software_types)
@@ -0,0 +1,113 @@
+from toscatranslator.common import utils
+
+import os
+import hashlib
+import json
+import logging
+import tempfile
+
+TRANSLATION_STATE_DIRECTORY = 'translations'
+TRANSLATION_STATE_EXTENSION = '.json'
+SET_KEY = '__set__'
+
+
+def get_digest(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def encode_set(data):
+    if isinstance(data, set):
+        return {SET_KEY: sorted(data, key=str)}
+    raise TypeError("Object of type %s is not JSON serializable" % type(data).__name__)
+
+
+def decode_set(data):
+    if len(data) == 1 and SET_KEY in data:
+        return set(data[SET_KEY])
+    return data
+
+
+class TranslationState(object):
+    """
+    Results of translation of every node and relationship template of the cluster to the provider templates, they
+    are saved as JSON to the private temporary directory of clouni. The next translation of the cluster takes the results of
+    templates which are not changed and do not depend on the changed ones. The results are valid only for the same
+    context: provider, configuration tool, mapping files, definitions and inputs
+    """
+
+    def __init__(self, cluster_name, context, directory=None):
+        self.cluster_name = cluster_name
+        self.context = get_digest(context)
+        if directory is None:
+            directory = os.path.join(utils.get_tmp_clouni_dir(), TRANSLATION_STATE_DIRECTORY)
+        self.filename = os.path.join(directory, cluster_name + TRANSLATION_STATE_EXTENSION)
+        # template name: digest of template
+        self.digests = {}
+        # template name: set of names of templates on which it depends
+        self.dependencies = {}
+        # template name: new element templates, names of provider templates, artifacts and extra
+        self.elements = {}
+        # names of templates which were translated, not taken from the previous translation
+        self.translated = set()
+        # provider template name: list of names of templates referenced by its get functions
+        self.references = {}
+        self.previous = self.load()
+
+    def load(self):
+        if not os.path.isfile(self.filename) or not utils.make_private_dir(os.path.dirname(self.filename)):
+            return None
+        try:
+            with open(self.filename, 'r') as file_obj:
+                previous = json.load(file_obj, object_hook=decode_set)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning("Translation state \'%s\' can not be loaded: %s" % (self.filename, e))
+            return None
+        if previous.get('context') != self.context:
+            logging.info("Translation state of cluster %s is not used, the provider, mapping, definitions or inputs "
+                         "were changed" % self.cluster_name)
+            return None
+        return previous
+
+    def save(self):
+        state = dict(context=self.context, digests=self.digests, dependencies=self.dependencies,
+                     elements=self.elements, references=self.references)
+        directory = os.path.dirname(self.filename)
+        if not utils.make_private_dir(directory):
+            return
+        try:
+            serialized_state = json.dumps(state, default=encode_set)
+            file_descriptor, tmp_filename = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(file_descriptor, 'w') as file_obj:
+                file_obj.write(serialized_state)
+            os.replace(tmp_filename, self.filename)
+        except (OSError, TypeError, ValueError) as e:
+            logging.warning("Translation state \'%s\' can not be saved: %s" % (self.filename, e))
+
+    def get_unchanged_elements(self, element_templates, template_dependencies):
+        """
+        Get the results of previous translation of templates which are not changed and do not depend on the
+        changed, added or removed templates
+        :param element_templates: dict of node and relationship templates
+        :param template_dependencies: dict of template name: set of names of templates on which it depends
+        :return: dict of template name: result of translate_element with artifacts and extra
+        """
+        self.digests = dict((name, get_digest(element)) for name, element in element_templates.items())
+        self.dependencies = dict((name, set(template_dependencies.get(name, set()))) for name in element_templates)
+        if self.previous is None:
+            return {}
+        previous_digests = self.previous['digests']
+        changed = set(name for name, digest in self.digests.items() if previous_digests.get(name) != digest)
+        changed.update(set(previous_digests.keys()) - set(self.digests.keys()))
+        changed = utils.get_transitive_dependents(changed, [self.dependencies, self.previous['dependencies']])
+        unchanged = dict((name, self.previous['elements'][name]) for name in element_templates
+                         if name not in changed and name in self.previous['elements'])
+        logging.info("Translation state of cluster %s: %s templates are taken from the previous translation, %s are "
+                     "translated" % (self.cluster_name, len(unchanged), len(element_templates) - len(unchanged)))
+        return unchanged
+
+    def add_element(self, tmpl_name, result, translated=True):
+        self.elements[tmpl_name] = result
+        if translated:
+            self.translated.add(tmpl_name)
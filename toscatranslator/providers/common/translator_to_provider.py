@@ -1,15 +1,17 @@
 import ast
 import os
-from multiprocessing import Queue
 
 import yaml
 
-from distutils.dir_util import copy_tree
-
 from toscatranslator.common import utils
 from toscatranslator.common.tosca_reserved_keys import *
 from toscatranslator.configuration_tools.combined.combine_configuration_tools import get_configuration_tool_class
+from toscatranslator.providers.common.fact_resolver import NOT_FOUND, run_tasks, is_failed_result, is_matched_result, \
+    get_matched_value, FactRecorder, replace_placeholders
+from toscatranslator.providers.common.format_templates import get_format_template
+from toscatranslator.providers.common.mapping_rules import WILDCARD
 
+from multiprocessing import get_context
 from random import randint, seed
 from time import time
 
@@ -218,33 +220,8 @@ def restructure_value(mapping_value, self, if_format_str=True, if_upper=True):
 
 def format_value(value, params, if_replace_brackets=True):
     is_buffer = False
-    params_without_buffer = copy.deepcopy(params)
-    params_without_buffer.pop(BUFFER)
     if isinstance(value, six.string_types):
-        value_format = value.replace("\\\\{", "{{").replace("\\{", "{{") \
-            .replace("\\\\}", "}}").replace("\\}", "}}")
-        try:
-            temp_val = value_format.format(self=params_without_buffer)
-            is_buffer = False
-        except KeyError:
-            try:
-                temp_val = value_format.format(self=params)
-                is_buffer = True
-            except KeyError:
-                return value, is_buffer
-        try:
-            if temp_val == value_format:
-                temp_val = value.replace("\\\\{", "{").replace("\\{", "{") \
-                    .replace("\\\\}", "}").replace("\\}", "}")
-            dict_val = temp_val.replace("\'", "\"")
-            dict_val = json.loads(dict_val)
-            if if_replace_brackets:
-                dict_val = utils.replace_brackets(dict_val)
-            return dict_val, is_buffer
-        except json.decoder.JSONDecodeError:
-            if if_replace_brackets:
-                temp_val = utils.replace_brackets(temp_val)
-            return temp_val, is_buffer
+        return get_format_template(value).format(params, if_replace_brackets)
     if isinstance(value, list):
         r = []
         for v in value:
@@ -466,6 +443,29 @@ def get_restructured_mapping_item(key_prefix, parameter, mapping_value, value, s
     return None
 
 
+def apply_mapping_rules(rules, template, self):
+    """
+    Apply compiled mapping rules to the node template
+    :param rules: list of MappingRule
+    :param template: dict with sections of node template
+    :param self:
+    :return: list of dict
+    """
+    r = []
+    for rule in rules:
+        if not rule.applies_to(template):
+            continue
+        item = get_restructured_mapping_item(rule.key_prefix, rule.parameter, rule.mapping, template, self)
+        if item:
+            if not isinstance(item, list):
+                item = [item]
+            if rule.is_wildcard:
+                for i in item:
+                    i[PARAMETER] = rule.node_type.join(i[PARAMETER].rsplit(WILDCARD, 1))
+            r.extend(item)
+    return r
+
+
 def split_parameter(parameter):
     splitted_parameter = parameter.split(SEPARATOR)
     for i in range(len(splitted_parameter)):
@@ -490,7 +490,7 @@ def restructure_mapping(service_tmpl, node_tmpl, tmpl_name, self):
     :param node: input node to be mapped
     :return: restructured_mapping: dict
     """
-    tosca_elements_map_to_provider = service_tmpl.tosca_elements_map_to_provider()
+    rule_table = service_tmpl.mapping_rule_table()
     template = {}
     for section in NODE_TEMPLATE_KEYS:
         section_value = node_tmpl.get(section)
@@ -498,18 +498,17 @@ def restructure_mapping(service_tmpl, node_tmpl, tmpl_name, self):
             template[section] = section_value
 
     self[NAME] = tmpl_name
-    r = []
+    type_chain = []
     node_type = node_tmpl[TYPE]
     prev_node_type = None
     while node_type != None and prev_node_type != node_type:
-        r_parent = get_restructured_mapping_item('', '', tosca_elements_map_to_provider, {node_type: template}, self)
-        r_parent.extend(r)
-        r = r_parent
+        type_chain.append(node_type)
         prev_node_type = node_type
         node_type = service_tmpl.definitions[node_type].get(DERIVED_FROM)
     if prev_node_type == node_type:
         logging.critical("Type \'%s\' is derived from itself" % node_type)
         sys.exit(1)
+    r = apply_mapping_rules(rule_table.get_rules(tuple(type_chain)), template, self)
     for i in range(len(r)):
         # NOTE: the case when value has keys ERROR and REASON
         if r[i][MAP_KEY].get(ERROR, False):
@@ -623,13 +622,14 @@ def translate_node_from_tosca(restructured_mapping, tpl_name, self):
     return resulted_structure
 
 
-def get_source_structure_from_facts(condition, fact_name, value, arguments, executor, self, is_delete, cluster_name, provider):
+def get_source_structure_from_facts(condition, fact_name, value, arguments, executor, self, fact_resolver, provider):
     """
     :param condition:
     :param fact_name:
     :param value:
     :param arguments:
     :param executor
+    :param fact_resolver: FactResolver which executes the lookup
     :return:
     """
     if isinstance(arguments, list):
@@ -704,15 +704,16 @@ def get_source_structure_from_facts(condition, fact_name, value, arguments, exec
     ]
 
     new_global_elements_map_total_implementation += addition_for_elements_map_total_implementation
-    return execute(new_global_elements_map_total_implementation, is_delete, cluster_name, provider, value)
+    return fact_resolver.lookup(new_global_elements_map_total_implementation, provider, value, condition=condition)
 
 
-def restructure_mapping_facts(elements_map, self, is_delete, cluster_name, extra_elements_map=None, target_parameter=None, source_parameter=None,
+def restructure_mapping_facts(elements_map, self, fact_resolver, extra_elements_map=None, target_parameter=None, source_parameter=None,
                               source_value=None):
     """
     Function is used to restructure mapping values with the case of `facts`, `condition`, `arguments`, `value` keys
     :param elements_map:
     :param self:
+    :param fact_resolver: FactResolver which executes the lookups
     :param extra_elements_map:
     :param target_parameter:
     :param source_parameter:
@@ -736,7 +737,7 @@ def restructure_mapping_facts(elements_map, self, is_delete, cluster_name, extra
                 target_parameter = cur_parameter
         new_elements_map = dict()
         for k, v in elements_map.items():
-            cur_elements, extra_elements_map = restructure_mapping_facts(v, self, is_delete, cluster_name, extra_elements_map,
+            cur_elements, extra_elements_map = restructure_mapping_facts(v, self, fact_resolver, extra_elements_map,
                                                                          target_parameter,
                                                                          source_parameter, source_value)
             new_elements_map.update({k: cur_elements})
@@ -817,7 +818,7 @@ def restructure_mapping_facts(elements_map, self, is_delete, cluster_name, extra
                 logging.critical("Unsupported executor name \'%s\'" % json.dumps(executor))
                 sys.exit(1)
             provider = target_parameter.split(SEPARATOR)[0]
-            new_value = get_source_structure_from_facts(condition, fact_name, value, arguments, executor, self, is_delete, cluster_name, provider)
+            new_value = get_source_structure_from_facts(condition, fact_name, value, arguments, executor, self, fact_resolver, provider)
             return new_value, extra_elements_map
 
         return new_elements_map, extra_elements_map
@@ -825,7 +826,7 @@ def restructure_mapping_facts(elements_map, self, is_delete, cluster_name, extra
     if isinstance(elements_map, list):
         new_elements_map = []
         for k in elements_map:
-            cur_elements, extra_elements_map = restructure_mapping_facts(k, self, is_delete, cluster_name, extra_elements_map,
+            cur_elements, extra_elements_map = restructure_mapping_facts(k, self, fact_resolver, extra_elements_map,
                                                                          target_parameter,
                                                                          source_parameter, source_value)
             new_elements_map.append(cur_elements)
@@ -855,8 +856,8 @@ def restructure_get_attribute(data, service_tmpl, self):
                 self[VALUE] = value
                 self[NAME] = args[0]
                 self[KEYNAME] = args[0]
-                items = get_restructured_mapping_item('', '', service_tmpl.tosca_elements_map_to_provider(), value,
-                                                      self)
+                items = apply_mapping_rules(service_tmpl.mapping_rule_table().get_rules((node_type,)),
+                                            value[node_type], self)
                 attribute_items = []
                 for item in items:
                     if re.search(parameter, item[PARAMETER]):
@@ -879,6 +880,203 @@ def restructure_get_attribute(data, service_tmpl, self):
     return r
 
 
+def new_translation_self(service_tmpl):
+    self = dict()
+    self[ARTIFACTS] = []
+    self[EXTRA] = dict()
+    self[PUBLIC_KEY] = service_tmpl.public_key_path
+    return self
+
+
+def translate_element(service_tmpl, tmpl_name, element, fact_resolver, self):
+    """
+    Translate one template, artifacts and extra are added to self
+    :param service_tmpl: ProviderToscaTemplate
+    :param tmpl_name: name of template
+    :param element: template
+    :param fact_resolver: FactResolver or FactRecorder which gathers the lookups
+    :param self: dict shared by the templates
+    :return: dict of new templates by element types, list of names of new templates or None if the template
+    is of the provider
+    """
+    (namespace, _, _) = utils.tosca_type_parse(element[TYPE])
+    self[NAME] = tmpl_name
+    self[KEYNAME] = tmpl_name
+    self[BUFFER] = {}
+
+    if namespace == service_tmpl.provider:
+        return translate_element_from_provider(tmpl_name, element), None
+
+    restructured_mapping = restructure_mapping(service_tmpl, element, tmpl_name, self)
+    restructured_mapping = sort_host_ip_parameter(restructured_mapping, service_tmpl.host_ip_parameter)
+    restructured_mapping = restructure_mapping_buffer(restructured_mapping, self)
+    restructured_mapping, extra_mappings = restructure_mapping_facts(restructured_mapping, self, fact_resolver)
+    restructured_mapping.extend(extra_mappings)
+    restructured_mapping = restructure_get_attribute(restructured_mapping, service_tmpl, self)
+
+    new_element = {}
+    tpl_names = []
+    tpl_structure = translate_node_from_tosca(restructured_mapping, tmpl_name, self)
+    for tpl_name, temp_tpl in tpl_structure.items():
+        for node_type, tpl in temp_tpl.items():
+            (_, element_type, _) = utils.tosca_type_parse(node_type)
+            tpl[TYPE] = node_type
+            tpl_names.append(tpl_name)
+            new_element[element_type] = new_element.get(element_type, {})
+            new_element[element_type].update({tpl_name: copy.deepcopy(tpl)})
+    return new_element, tpl_names
+
+
+def add_translated_element(new_element_templates, template_mapping, tmpl_name, new_element, tpl_names):
+    if tpl_names is None:
+        return utils.deep_update_dict(new_element_templates, new_element)
+    for tpl_name in tpl_names:
+        template_mapping[tmpl_name] = template_mapping.get(tmpl_name, set())
+        template_mapping[tmpl_name].add(tpl_name)
+    for element_type, tpls in new_element.items():
+        new_element_templates[element_type] = new_element_templates.get(element_type, {})
+        new_element_templates[element_type].update(tpls)
+    return new_element_templates
+
+
+def translate_elements(service_tmpl, element_templates, fact_resolver, unchanged_elements=None):
+    """
+    Translate every template once recording the fact lookups. The recorded lookups of all the templates are passed
+    to fact_resolver and executed together, the lookups depending on the found values are passed again till all
+    the values are found. The values are substituted to the recorded results, the templates are not translated again
+    :param service_tmpl: ProviderToscaTemplate
+    :param element_templates: dict of node and relationship templates
+    :param fact_resolver: FactResolver which executes the lookups
+    :param unchanged_elements: dict of template name: result of previous translation of template which is not
+    translated again, the results are used only if the translation state is kept
+    :return: new element templates, self and template mapping
+    """
+    recorded_results = dict(unchanged_elements or {})
+    changed_templates = dict((tmpl_name, element) for tmpl_name, element in element_templates.items()
+                             if tmpl_name not in recorded_results)
+    recorded_results.update(record_elements(service_tmpl, changed_templates))
+
+    translation_state = service_tmpl.translation_state
+    if translation_state is not None:
+        for tmpl_name in element_templates.keys():
+            translation_state.add_element(tmpl_name, recorded_results[tmpl_name],
+                                          translated=tmpl_name in changed_templates)
+
+    while True:
+        for tmpl_name in element_templates.keys():
+            FactRecorder.replay(recorded_results[tmpl_name][-1], fact_resolver)
+        if not fact_resolver.resolve():
+            break
+
+    results = dict((tmpl_name, replay_translated_element(recorded_results[tmpl_name], fact_resolver))
+                   for tmpl_name in element_templates.keys())
+    return merge_translated_elements(service_tmpl, element_templates, results)
+
+
+def record_element(service_tmpl, tmpl_name, element):
+    """
+    Translate the template with its own artifacts and extra, the fact lookups are recorded instead of being executed
+    :param service_tmpl: ProviderToscaTemplate
+    :param tmpl_name: name of template
+    :param element: node or relationship template
+    :return: new element, names of provider templates, artifacts, extra and recorded lookups
+    """
+    # NOTE: the known values are not used if the result is kept in the translation state, the facts can be changed
+    # till the next translation
+    fact_recorder = FactRecorder(service_tmpl.fact_resolver,
+                                 record_known_values=service_tmpl.translation_state is not None)
+    self = new_translation_self(service_tmpl)
+    new_element, tpl_names = translate_element(service_tmpl, tmpl_name, element, fact_recorder, self)
+    return new_element, tpl_names, self[ARTIFACTS], self[EXTRA], fact_recorder.recorded
+
+
+def record_elements(service_tmpl, element_templates):
+    """
+    Translate the templates one by one recording the fact lookups, in the pool of processes if there are workers
+    :param service_tmpl: ProviderToscaTemplate
+    :param element_templates: dict of node and relationship templates
+    :return: dict of template name: result of record_element
+    """
+    workers = min(service_tmpl.translation_workers, len(element_templates))
+    if workers > 1:
+        return translate_elements_in_parallel(service_tmpl, element_templates, workers)
+    return dict((tmpl_name, record_element(service_tmpl, tmpl_name, element))
+                for tmpl_name, element in element_templates.items())
+
+
+def replay_translated_element(result, fact_resolver):
+    """
+    Pass the recorded lookups of the template to the resolver and substitute the values for the placeholders
+    :param result: result of record_element
+    :param fact_resolver: FactResolver
+    :return: new element, names of provider templates, artifacts and extra
+    """
+    new_element, tpl_names, artifacts, extra, recorded = result
+    # NOTE: the values are substituted after formatting, so the escaped brackets of deferred facts are replaced here
+    placeholders = dict((placeholder, utils.replace_brackets(value, False))
+                        for placeholder, value in FactRecorder.replay(recorded, fact_resolver).items())
+    return (replace_placeholders(new_element, placeholders), tpl_names,
+            replace_placeholders(artifacts, placeholders), replace_placeholders(extra, placeholders))
+
+
+# NOTE: the template and elements translated by the worker processes, they are inherited by fork and not pickled
+worker_translation_args = None
+
+
+def translate_element_in_worker(tmpl_name):
+    service_tmpl, element_templates = worker_translation_args
+    try:
+        return record_element(service_tmpl, tmpl_name, element_templates[tmpl_name]), None
+    except SystemExit as e:
+        return None, e.code
+
+
+def translate_elements_in_parallel(service_tmpl, element_templates, workers):
+    """
+    Translate the templates in the pool of processes
+    :param service_tmpl: ProviderToscaTemplate
+    :param element_templates: dict of node and relationship templates
+    :param workers: number of processes
+    :return: dict of template name: result of record_element
+    """
+    global worker_translation_args
+    worker_translation_args = (service_tmpl, element_templates)
+    logging.info("Translating %s templates in %s processes" % (len(element_templates), workers))
+    try:
+        with get_context('fork').Pool(workers) as pool:
+            results = pool.map(translate_element_in_worker, list(element_templates.keys()))
+    finally:
+        worker_translation_args = None
+
+    translated = {}
+    for tmpl_name, (result, exit_code) in zip(element_templates.keys(), results):
+        if result is None:
+            logging.error("Translating of template \'%s\' failed" % tmpl_name)
+            sys.exit(exit_code)
+        translated[tmpl_name] = result
+    return translated
+
+
+def merge_translated_elements(service_tmpl, element_templates, results):
+    """
+    Merge the results of templates in the order of templates as if they were translated one by one
+    :param service_tmpl: ProviderToscaTemplate
+    :param element_templates: dict of node and relationship templates
+    :param results: dict of template name: new element, names of provider templates, artifacts and extra
+    :return: new element templates, self and template mapping
+    """
+    new_element_templates = {}
+    template_mapping = {}
+    self = new_translation_self(service_tmpl)
+    for tmpl_name in element_templates.keys():
+        new_element, tpl_names, artifacts, extra = results[tmpl_name]
+        self[ARTIFACTS].extend(copy.deepcopy(artifacts))
+        utils.deep_update_dict(self[EXTRA], copy.deepcopy(extra))
+        new_element_templates = add_translated_element(new_element_templates, template_mapping, tmpl_name,
+                                                       copy.deepcopy(new_element), tpl_names)
+    return new_element_templates, self, template_mapping
+
+
 def translate(service_tmpl):
     """
     Main function of this file, the only which is used outside the file
@@ -891,45 +1089,21 @@ def translate(service_tmpl):
     element_templates = copy.copy(service_tmpl.node_templates)
     element_templates.update(copy.copy(service_tmpl.relationship_templates))
 
-    new_element_templates = {}
-    template_mapping = {}
-    self = dict()
-    self[ARTIFACTS] = []
-    self[EXTRA] = dict()
-    self[PUBLIC_KEY] = service_tmpl.public_key_path
+    unchanged_elements = None
+    if service_tmpl.translation_state is not None:
+        unchanged_elements = service_tmpl.translation_state.get_unchanged_elements(
+            element_templates, service_tmpl.template_dependencies)
 
-    for tmpl_name, element in element_templates.items():
-        (namespace, _, _) = utils.tosca_type_parse(element[TYPE])
-        self[NAME] = tmpl_name
-        self[KEYNAME] = tmpl_name
-        self[BUFFER] = {}
-
-        if namespace != service_tmpl.provider:
-            restructured_mapping = restructure_mapping(service_tmpl, element, tmpl_name, self)
-            restructured_mapping = sort_host_ip_parameter(restructured_mapping, service_tmpl.host_ip_parameter)
-            restructured_mapping = restructure_mapping_buffer(restructured_mapping, self)
-            restructured_mapping, extra_mappings = restructure_mapping_facts(restructured_mapping, self, service_tmpl.is_delete, service_tmpl.cluster_name)
-            restructured_mapping.extend(extra_mappings)
-            restructured_mapping = restructure_get_attribute(restructured_mapping, service_tmpl, self)
-
-            tpl_structure = translate_node_from_tosca(restructured_mapping, tmpl_name, self)
-            for tpl_name, temp_tpl in tpl_structure.items():
-                for node_type, tpl in temp_tpl.items():
-                    (_, element_type, _) = utils.tosca_type_parse(node_type)
-                    tpl[TYPE] = node_type
-                    if tmpl_name not in template_mapping:
-                        template_mapping[tmpl_name] = {tpl_name}
-                    else:
-                        template_mapping[tmpl_name].add(tpl_name)
-                    new_element_templates[element_type] = new_element_templates.get(element_type, {})
-                    new_element_templates[element_type].update({tpl_name: copy.deepcopy(tpl)})
-        else:
-            new_element = translate_element_from_provider(tmpl_name, element)
-            new_element_templates = utils.deep_update_dict(new_element_templates, new_element)
+    new_element_templates, self, template_mapping = translate_elements(service_tmpl, element_templates,
+                                                                       service_tmpl.fact_resolver,
+                                                                       unchanged_elements=unchanged_elements)
 
     self_extra = utils.replace_brackets(self[EXTRA], False)
     self_artifacts = utils.replace_brackets(self[ARTIFACTS], False)
-    execute(self_artifacts, service_tmpl.is_delete, service_tmpl.cluster_name, service_tmpl.provider)
+    if service_tmpl.fact_resolver.defer_facts:
+        service_tmpl.fact_resolver.defer_artifacts(self_artifacts, service_tmpl.provider)
+    else:
+        execute(self_artifacts, service_tmpl.is_delete, service_tmpl.cluster_name, service_tmpl.provider)
 
     return new_element_templates, self_extra, template_mapping
 
@@ -953,35 +1127,17 @@ def execute(new_global_elements_map_total_implementation, is_delete, cluster_nam
                                                                    store=False)
         os.remove(filename)
 
-        q = Queue()
-        playbook = {
-            'hosts': 'localhost',
-            'tasks': new_ansible_tasks
-        }
-
-        os.makedirs(os.path.join(utils.get_tmp_clouni_dir(), cluster_name, configuration_class.initial_artifacts_directory), exist_ok=True)
-        copy_tree(utils.get_project_root_path() + '/toscatranslator/configuration_tools/ansible/artifacts',
-                  os.path.join(utils.get_tmp_clouni_dir(), cluster_name, configuration_class.initial_artifacts_directory))
-        configuration_class.parallel_run([playbook], 'artifacts', 'artifacts', q, cluster_name)
-
-        # there is such a problem that if runner cotea was launched in the current process, then all subsequent launches
-        # of other playbooks from this process are impossible because the initial playbook will be launched, and
-        # even if this process is forked, the effect remains so that something inside cotea
-        # is preserved in the context of the process
-        results = q.get()
+        results = run_tasks(configuration_class, new_ansible_tasks, cluster_name)
         if target_parameter is not None:
-            value = 'not_found'
+            value = NOT_FOUND
             if_failed = False
             for result in results:
-                if result.is_failed or result.is_unreachable:
-                    logging.error("Task %s has failed because of exception: \n%s" %
-                                    (result.task_name, result.result.get('exception', '(Unknown reason)')))
+                if is_failed_result(result):
                     if_failed = True
-                if 'results' in result.result and len(result.result['results']) > 0 and 'ansible_facts' in \
-                        result.result['results'][0] and 'matched_object' in result.result['results'][0]['ansible_facts']:
-                    value = result.result['results'][0]['ansible_facts']['matched_object'][target_parameter.split('.')[-1]]
+                if is_matched_result(result):
+                    value = get_matched_value(result, target_parameter)
             if if_failed:
-                value = 'not_found'
+                value = NOT_FOUND
             return value
     return None
 